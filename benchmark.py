@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for Utlyze Taskmaster-Mem0
+Runs the bridge, MCP tools and activity monitor against a local fake Mem0
+server and writes throughput and latency percentiles to a JSON file
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import tempfile
+import platform
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int, **extra) -> Dict[str, Any]:
+    """Throughput and latency percentiles for one scenario"""
+    return {
+        "operations": len(latencies),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        **extra
+    }
+
+
+def run_concurrently(operation: Callable[[int], Any], count: int, concurrency: int) -> Dict[str, Any]:
+    """Run operation(i) count times across a thread pool, timing each call"""
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    
+    def timed(i: int):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            operation(i)
+        except Exception:
+            with lock:
+                errors += 1
+        with lock:
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(count)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def start_fake_mem0(args) -> str:
+    """Start the fake Mem0 server on a free port and return its URL"""
+    import uvicorn
+    import fake_mem0_server
+    
+    fake_mem0_server.config.update(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        quota=args.quota
+    )
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    
+    server = uvicorn.Server(uvicorn.Config(fake_mem0_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def bench_webhooks(client, args) -> Dict[str, Any]:
+    """POST /webhook/task-update for distinct tasks, then wait for the backlog"""
+    from taskmaster_bridge import task_coalescer, mem0_client
+    
+    def post(i: int):
+        response = client.post("/webhook/task-update", json={
+            "id": f"bench-webhook-{i}",
+            "name": f"Benchmark task {i}",
+            "status": "in_progress",
+            "progress": i % 100
+        })
+        response.raise_for_status()
+    
+    result = run_concurrently(post, args.requests, args.concurrency)
+    started = time.perf_counter()
+    client.portal.call(task_coalescer.drain)
+    mem0_client.flush(timeout=60)
+    result["drain_seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def bench_sync(client, args) -> Dict[str, Any]:
+    """POST /webhook/sync with a full Taskmaster state, repeatedly"""
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for run in range(args.sync_runs):
+        state = {"tasks": [
+            {"id": f"bench-sync-{i}", "name": f"Sync task {i}", "status": "pending", "progress": run}
+            for i in range(args.sync_tasks)
+        ]}
+        call_started = time.perf_counter()
+        response = client.post("/webhook/sync", json=state, params={"full": "true"})
+        latencies.append(time.perf_counter() - call_started)
+        if response.status_code != 200:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    return summarize(
+        latencies, elapsed, errors,
+        tasks_per_sync=args.sync_tasks,
+        tasks_per_second=round(args.sync_runs * args.sync_tasks / elapsed, 2) if elapsed else 0.0
+    )
+
+
+def bench_mcp(args) -> Dict[str, Any]:
+    """Concurrent MCP tool calls through the registered call_tool handler"""
+    from mcp import types
+    from mcp_server import UtlyzeMem0MCPServer
+    
+    server = UtlyzeMem0MCPServer()
+    # Cold start is measured by the startup scenario; time warm calls here
+    server._warm_up()
+    handler = server.server.request_handlers[types.CallToolRequest]
+    tools = [
+        ("search_memory", {"query": "utlyze task progress", "limit": 5}),
+        ("get_context", {"limit": 5}),
+        ("log_activity", {"activity": "Benchmark activity", "files": ["benchmark.py"]}),
+    ]
+    
+    async def run() -> Dict[str, Any]:
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies, errors = [], 0
+        
+        async def call(i: int):
+            nonlocal errors
+            name, arguments = tools[i % len(tools)]
+            request = types.CallToolRequest(
+                method="tools/call",
+                params=types.CallToolRequestParams(name=name, arguments=arguments)
+            )
+            async with semaphore:
+                call_started = time.perf_counter()
+                try:
+                    result = await handler(request)
+                    if getattr(result.root, "isError", False):
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - call_started)
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(call(i) for i in range(args.requests)))
+        return summarize(latencies, time.perf_counter() - started, errors)
+    
+    try:
+        return asyncio.run(run())
+    finally:
+        server.executor.shutdown(wait=False)
+        server.mem0_client.close()
+
+
+def bench_startup(args) -> Dict[str, Any]:
+    """Cold start of the MCP server process up to an answered list_tools"""
+    from mcp_server import measure_startup
+    
+    started = time.perf_counter()
+    startup = asyncio.run(measure_startup(runs=args.startup_runs))
+    latencies = [run["list_tools_ms"] / 1000 for run in startup["runs"]]
+    return summarize(
+        latencies, time.perf_counter() - started, 0,
+        median_initialize_ms=startup["median_initialize_ms"]
+    )
+
+
+def bench_monitor(args) -> Dict[str, Any]:
+    """ActivityMonitor cycles with fresh shell commands spooled before each"""
+    from activity_monitor import ActivityMonitor
+    
+    monitor = ActivityMonitor(watch_interval=0)
+    spool = monitor.spool_collector.spool_path
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for cycle in range(args.monitor_cycles):
+        with open(spool, "a") as f:
+            for i in range(args.commands_per_cycle):
+                f.write(f"{time.time():.3f}\t{os.getcwd()}\tbench-command --cycle {cycle} --n {i}\n")
+        cycle_started = time.perf_counter()
+        try:
+            monitor.run_once()
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - cycle_started)
+    elapsed = time.perf_counter() - started
+    monitor.stop()
+    return summarize(latencies, elapsed, errors, commands_per_cycle=args.commands_per_cycle)
+
+
+def git_revision() -> str:
+    """Short commit hash of the checkout being benchmarked"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def compare(results: Dict[str, Any], baseline_path: str, threshold: float) -> bool:
+    """Print changes against a previous results file; False if anything regressed"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    
+    ok = True
+    print(f"\nCompared with {baseline_path} ({baseline.get('revision', 'unknown')}):")
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_better in (("throughput_per_second", True), ("p50_ms", False), ("p99_ms", False)):
+            old, new = previous.get(metric), current.get(metric)
+            if not old:
+                continue
+            change = (new - old) / old
+            regressed = (change < -threshold) if higher_is_better else (change > threshold)
+            ok = ok and not regressed
+            marker = "  REGRESSION" if regressed else ""
+            print(f"  {name:10} {metric:22} {old:>10} -> {new:>10} ({change:+.1%}){marker}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Utlyze Taskmaster-Mem0 against a fake Mem0 server")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change counted as a regression")
+    parser.add_argument("--scenarios", default="webhooks,sync,mcp,startup,monitor", help="Comma-separated scenarios to run")
+    parser.add_argument("--requests", type=int, default=200, help="Webhook and MCP calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent callers")
+    parser.add_argument("--sync-tasks", type=int, default=50, help="Tasks in each /webhook/sync state")
+    parser.add_argument("--sync-runs", type=int, default=5, help="Number of /webhook/sync calls")
+    parser.add_argument("--startup-runs", type=int, default=3, help="MCP server cold starts to time")
+    parser.add_argument("--monitor-cycles", type=int, default=20, help="ActivityMonitor cycles")
+    parser.add_argument("--commands-per-cycle", type=int, default=10, help="Shell commands spooled per cycle")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake Mem0 latency per request (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random fake Mem0 latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake Mem0 requests that fail")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of fake Mem0 requests answered with 429")
+    parser.add_argument("--quota", type=float, default=0.0, help="Fake Mem0 requests per second before 429 (also used as MEM0_RATE_LIMIT)")
+    args = parser.parse_args()
+    
+    # Keep benchmark state and traffic away from real Mem0 and ~/.utlyze
+    state_dir = tempfile.mkdtemp(prefix="utlyze-bench-")
+    os.environ["UTLYZE_STATE_DIR"] = state_dir
+    os.environ["UTLYZE_SPOOL"] = os.path.join(state_dir, "activity.spool")
+    os.environ.setdefault("MEM0_API_KEY", "benchmark")
+    os.environ.setdefault("MEM0_TELEMETRY", "False")
+    # Only pace requests when the fake server enforces a quota
+    os.environ.setdefault("MEM0_RATE_LIMIT", str(args.quota))
+    os.environ["MEM0_HOST"] = start_fake_mem0(args)
+    
+    import logging
+    logging.disable(logging.WARNING)
+    
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    results = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "fake_mem0": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "quota": args.quota
+        },
+        "parameters": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "sync_tasks": args.sync_tasks,
+            "sync_runs": args.sync_runs,
+            "startup_runs": args.startup_runs,
+            "monitor_cycles": args.monitor_cycles
+        },
+        "scenarios": {}
+    }
+    
+    print("⏱  Utlyze Taskmaster-Mem0 benchmark")
+    print("=" * 50)
+    if {"webhooks", "sync"} & set(scenarios):
+        from fastapi.testclient import TestClient
+        from taskmaster_bridge import app
+        
+        with TestClient(app) as client:
+            if "webhooks" in scenarios:
+                results["scenarios"]["webhooks"] = bench_webhooks(client, args)
+            if "sync" in scenarios:
+                results["scenarios"]["sync"] = bench_sync(client, args)
+    if "mcp" in scenarios:
+        results["scenarios"]["mcp"] = bench_mcp(args)
+    if "startup" in scenarios:
+        results["scenarios"]["startup"] = bench_startup(args)
+    if "monitor" in scenarios:
+        results["scenarios"]["monitor"] = bench_monitor(args)
+    
+    for name, result in results["scenarios"].items():
+        print(
+            f"{name:10} {result['operations']:>6} ops  {result['throughput_per_second']:>9}/s  "
+            f"p50 {result['p50_ms']:>9} ms  p99 {result['p99_ms']:>9} ms  errors {result['errors']}"
+        )
+    
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+    
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
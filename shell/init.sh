@@ -70,13 +70,25 @@ utlyze_context() {
         return 1
     fi
     
-    python3 -c "
+    # Ask the bridge first: it keeps warm pooled connections to Mem0,
+    # so we skip building a client and a TLS handshake per call
+    local response=""
+    if command -v curl &> /dev/null; then
+        response=$(curl -sf --max-time 5 "http://localhost:${TASKMASTER_BRIDGE_PORT:-8080}/context?limit=10" 2>/dev/null)
+    fi
+    
+    UTLYZE_CONTEXT_JSON="$response" python3 -c "
+import os
 import sys
+import json
 sys.path.append('$UTLYZE_DIR/src')
-from mem0_client import UtlyzeMem0Client
 
-client = UtlyzeMem0Client()
-context = client.get_current_context(limit=10)
+if os.environ.get('UTLYZE_CONTEXT_JSON'):
+    context = json.loads(os.environ['UTLYZE_CONTEXT_JSON'])['context']
+else:
+    from mem0_client import UtlyzeMem0Client
+    client = UtlyzeMem0Client()
+    context = client.get_current_context(limit=10)
 
 print('\n🧠 Current Utlyze Context:')
 print('=' * 50)
@@ -88,6 +100,17 @@ for i, memory in enumerate(context):
 "
 }
 
+# Spool file the activity hook appends to; the activity monitor ships it in batches
+UTLYZE_STATE_DIR="${UTLYZE_STATE_DIR:-$HOME/.utlyze}"
+UTLYZE_SPOOL="${UTLYZE_SPOOL:-$UTLYZE_STATE_DIR/activity.spool}"
+export UTLYZE_STATE_DIR UTLYZE_SPOOL
+mkdir -p "$UTLYZE_STATE_DIR" 2>/dev/null
+
+# zsh only provides EPOCHSECONDS through this module
+if [ -n "$ZSH_VERSION" ]; then
+    zmodload zsh/datetime 2>/dev/null
+fi
+
 # Function to log current activity (called automatically)
 _utlyze_log_activity() {
     if [ -z "$MEM0_API_KEY" ] || [ -z "$UTLYZE_ACTIVITY_LOGGING" ]; then
@@ -99,22 +122,10 @@ _utlyze_log_activity() {
         return
     fi
     
-    # Log activity in background
-    (
-        python3 -c "
-import sys
-import os
-sys.path.append('$UTLYZE_DIR/src')
-from mem0_client import UtlyzeMem0Client
-
-client = UtlyzeMem0Client()
-client.add_terminal_activity({
-    'cwd': os.getcwd(),
-    'git_branch': os.popen('git branch --show-current 2>/dev/null').read().strip() or 'no-git',
-    'last_command': '$1'
-})
-" 2>/dev/null
-    ) &
+    # Append one "<epoch>\t<cwd>\t<command>" line; no subprocess per prompt
+    local cmd="${1//$'\t'/ }"
+    cmd="${cmd//$'\n'/ }"
+    printf '%s\t%s\t%s\n' "${EPOCHSECONDS:-$(date +%s)}" "$PWD" "$cmd" >> "$UTLYZE_SPOOL" 2>/dev/null
 }
 
 # Enable activity logging (disabled by default to avoid noise)
@@ -144,6 +155,15 @@ alias uts="utlyze_sync"
 # Export the Utlyze directory for other scripts
 export UTLYZE_MEM0_DIR="$UTLYZE_DIR"
 
+# One monitor daemon watches every repository in the watch list;
+# its pid file tells it apart from any other activity_monitor.py
+UTLYZE_WATCH_LIST="${UTLYZE_WATCH_LIST:-$UTLYZE_STATE_DIR/watch-list}"
+UTLYZE_MONITOR_PID="$UTLYZE_STATE_DIR/monitor.pid"
+
+_utlyze_monitor_running() {
+    [ -f "$UTLYZE_MONITOR_PID" ] && kill -0 "$(cat "$UTLYZE_MONITOR_PID" 2>/dev/null)" 2>/dev/null
+}
+
 # Function to start activity monitor
 utlyze_monitor() {
     if [ -z "$MEM0_API_KEY" ]; then
@@ -152,19 +172,57 @@ utlyze_monitor() {
     fi
     
     local cmd="${1:-start}"
+    local repo
     
     case "$cmd" in
         start)
+            if _utlyze_monitor_running; then
+                echo -e "${YELLOW}Activity monitor already running (PID $(cat "$UTLYZE_MONITOR_PID"))${NC}"
+                return 0
+            fi
+            # Watch the current directory when nothing has been added yet,
+            # unless only the command spool should be collected
+            if [ "$2" != "--spool-only" ] && [ ! -s "$UTLYZE_WATCH_LIST" ]; then
+                echo "$PWD" >> "$UTLYZE_WATCH_LIST"
+            fi
             echo -e "${BLUE}Starting activity monitor...${NC}"
-            python3 "$UTLYZE_DIR/src/activity_monitor.py" --daemon
+            python3 "$UTLYZE_DIR/src/activity_monitor.py" --daemon \
+                --watch-list "$UTLYZE_WATCH_LIST" --pid-file "$UTLYZE_MONITOR_PID"
             ;;
         stop)
             echo -e "${YELLOW}Stopping activity monitor...${NC}"
-            pkill -f "activity_monitor.py"
+            if _utlyze_monitor_running; then
+                kill "$(cat "$UTLYZE_MONITOR_PID")"
+            fi
+            ;;
+        watch)
+            # The running daemon picks up watch list changes on its next cycle
+            repo="$(cd "${2:-$PWD}" 2>/dev/null && pwd)" || { echo -e "${RED}No such directory: $2${NC}"; return 1; }
+            if ! grep -qxF "$repo" "$UTLYZE_WATCH_LIST" 2>/dev/null; then
+                echo "$repo" >> "$UTLYZE_WATCH_LIST"
+            fi
+            echo -e "${GREEN}Watching $repo${NC}"
+            _utlyze_monitor_running || utlyze_monitor start
+            ;;
+        unwatch)
+            repo="$(cd "${2:-$PWD}" 2>/dev/null && pwd)" || repo="$2"
+            if [ -f "$UTLYZE_WATCH_LIST" ]; then
+                grep -vxF "$repo" "$UTLYZE_WATCH_LIST" > "$UTLYZE_WATCH_LIST.tmp"
+                mv "$UTLYZE_WATCH_LIST.tmp" "$UTLYZE_WATCH_LIST"
+            fi
+            echo -e "${YELLOW}No longer watching $repo${NC}"
             ;;
         status)
-            if pgrep -f "activity_monitor.py" > /dev/null; then
-                echo -e "${GREEN}Activity monitor is running${NC}"
+            if _utlyze_monitor_running; then
+                echo -e "${GREEN}Activity monitor is running (PID $(cat "$UTLYZE_MONITOR_PID"))${NC}"
+                if [ -f "$UTLYZE_WATCH_LIST" ]; then
+                    echo "Watching:"
+                    sed 's/^/  /' "$UTLYZE_WATCH_LIST"
+                fi
+                # Current interval and scheduler decisions, written each cycle
+                if [ -f "$UTLYZE_STATE_DIR/monitor-stats.json" ]; then
+                    cat "$UTLYZE_STATE_DIR/monitor-stats.json"
+                fi
             else
                 echo -e "${YELLOW}Activity monitor is not running${NC}"
             fi
@@ -174,16 +232,20 @@ utlyze_monitor() {
             python3 "$UTLYZE_DIR/src/activity_monitor.py" --once
             ;;
         *)
-            echo "Usage: utlyze_monitor [start|stop|status|once]"
+            echo "Usage: utlyze_monitor [start [--spool-only]|stop|status|once|watch [dir]|unwatch [dir]]"
             ;;
     esac
 }
 
-# Auto-start activity monitor on shell init (if enabled)
-if [ -n "$UTLYZE_AUTO_MONITOR" ]; then
-    # Check if monitor is already running
-    if ! pgrep -f "activity_monitor.py" > /dev/null; then
+# Auto-start activity monitor on shell init (if enabled); it also
+# collects the command spool written when activity logging is on
+if ! _utlyze_monitor_running; then
+    if [ -n "$UTLYZE_AUTO_MONITOR" ]; then
         utlyze_monitor start 2>/dev/null
+    elif [ -n "$UTLYZE_ACTIVITY_LOGGING" ]; then
+        # Activity logging alone only ships the spool; repositories are
+        # watched once added with utlyze_monitor watch
+        utlyze_monitor start --spool-only 2>/dev/null
     fi
 fi
 
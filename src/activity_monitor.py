@@ -8,8 +8,12 @@ import os
 import sys
 import time
 import json
+import atexit
+import signal
 import threading
 import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -20,102 +24,451 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Import mem0 client
-from mem0_client import UtlyzeMem0Client
+from mem0_client import UtlyzeMem0Client, state_path
+from file_watcher import RecentFileTracker
+
+
+class GitStateCache:
+    """Caches parsed git state until HEAD, the index or refs change"""
+    
+    def __init__(self, cwd: str, max_age: float = 300.0):
+        """
+        Initialize the cache
+        
+        Args:
+            cwd: Directory inside the repository
+            max_age: Re-query git at least this often (seconds), as a safety net
+        """
+        self.cwd = cwd
+        self.max_age = max_age
+        self.git_dir = self._find_git_dir(cwd)
+        self.fingerprint = None
+        self.fetched_at = 0.0
+        self.state: Dict[str, Any] = {}
+        self.commit_subjects: Dict[str, str] = {}
+        self.stats = {"hits": 0, "git_calls": 0}
+    
+    def _find_git_dir(self, cwd: str) -> Optional[str]:
+        """Locate the .git directory without forking git"""
+        path = os.path.abspath(cwd)
+        while True:
+            candidate = os.path.join(path, ".git")
+            if os.path.isdir(candidate):
+                return candidate
+            if os.path.isfile(candidate):
+                # Worktrees and submodules use a "gitdir: <path>" file
+                with open(candidate) as f:
+                    line = f.read().strip()
+                if line.startswith("gitdir:"):
+                    return os.path.normpath(os.path.join(path, line[len("gitdir:"):].strip()))
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+    
+    def _mtime(self, *parts: str) -> float:
+        try:
+            return os.stat(os.path.join(self.git_dir, *parts)).st_mtime_ns
+        except OSError:
+            return 0
+    
+    def _current_fingerprint(self, extra: Any = None) -> tuple:
+        """mtimes of the files git updates whenever branch, commit or index change"""
+        ref = ""
+        try:
+            with open(os.path.join(self.git_dir, "HEAD")) as f:
+                head = f.read().strip()
+            if head.startswith("ref:"):
+                ref = head[len("ref:"):].strip()
+        except OSError:
+            pass
+        return (
+            self._mtime("HEAD"),
+            self._mtime("index"),
+            self._mtime("packed-refs"),
+            self._mtime(*ref.split("/")) if ref else 0,
+            extra
+        )
+    
+    def get(self, extra: Any = None) -> Dict[str, Any]:
+        """
+        Return branch, last commit and dirty state
+        
+        `extra` is folded into the cache key so callers can force a refresh
+        on events git metadata doesn't reflect (e.g. unstaged file edits).
+        """
+        if not self.git_dir:
+            return {}
+        
+        fingerprint = self._current_fingerprint(extra)
+        if fingerprint == self.fingerprint and time.monotonic() - self.fetched_at < self.max_age:
+            self.stats["hits"] += 1
+            return dict(self.state)
+        
+        # One call gives branch, HEAD oid and the changed file list
+        output = subprocess.check_output(
+            ["git", "status", "--porcelain=v2", "--branch"],
+            cwd=self.cwd,
+            stderr=subprocess.DEVNULL
+        ).decode()
+        self.stats["git_calls"] += 1
+        
+        branch, oid, changes = "HEAD", None, 0
+        for line in output.splitlines():
+            if line.startswith("# branch.head "):
+                branch = line[len("# branch.head "):]
+                branch = "HEAD" if branch == "(detached)" else branch
+            elif line.startswith("# branch.oid "):
+                oid = line[len("# branch.oid "):]
+                oid = None if oid == "(initial)" else oid
+            elif line and not line.startswith("#"):
+                changes += 1
+        
+        self.state = {
+            "branch": branch,
+            "last_commit": self._commit_summary(oid),
+            "is_dirty": changes > 0,
+            "modified_files": changes
+        }
+        # git status may refresh the index, so fingerprint after it ran
+        self.fingerprint = self._current_fingerprint(extra)
+        self.fetched_at = time.monotonic()
+        return dict(self.state)
+    
+    def _commit_summary(self, oid: Optional[str]) -> str:
+        """'<short sha> <subject>' for a commit, looked up once per oid"""
+        if not oid:
+            return ""
+        if oid not in self.commit_subjects:
+            self.commit_subjects = {
+                oid: subprocess.check_output(
+                    ["git", "log", "-1", "--oneline", oid],
+                    cwd=self.cwd,
+                    stderr=subprocess.DEVNULL
+                ).decode().strip()
+            }
+            self.stats["git_calls"] += 1
+        return self.commit_subjects[oid]
+
+
+class SpoolCollector:
+    """Ships shell commands appended to the activity spool file in batches"""
+    
+    def __init__(
+        self,
+        mem0_client: UtlyzeMem0Client,
+        spool_path: str,
+        branch_lookup=None,
+        batch_size: int = 50,
+        rotate_bytes: int = 1024 * 1024
+    ):
+        """
+        Initialize the collector
+        
+        Args:
+            mem0_client: Client used to store the batched activity
+            spool_path: File the shell hook appends "<epoch>\t<cwd>\t<command>" lines to
+            branch_lookup: Optional callable returning the git branch of a directory
+            batch_size: Max commands per stored memory
+            rotate_bytes: Rotate the spool once it is fully read and this large
+        """
+        self.mem0_client = mem0_client
+        self.spool_path = spool_path
+        self.offset_path = spool_path + ".offset"
+        self.branch_lookup = branch_lookup
+        self.batch_size = batch_size
+        self.rotate_bytes = rotate_bytes
+        self.stats = {"lines": 0, "batches": 0, "rotations": 0}
+    
+    def _load_offset(self) -> Dict[str, int]:
+        try:
+            with open(self.offset_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"inode": 0, "offset": 0}
+    
+    def _save_offset(self, inode: int, offset: int):
+        tmp_path = self.offset_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"inode": inode, "offset": offset}, f)
+        os.replace(tmp_path, self.offset_path)
+    
+    def _read_lines(self, path: str, offset: int) -> tuple:
+        """Read complete lines from offset; returns (lines, new_offset)"""
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # Leave a partially written last line for the next pass
+        end = data.rfind(b"\n") + 1
+        lines = data[:end].decode(errors="replace").splitlines()
+        return lines, offset + end
+    
+    def collect(self) -> int:
+        """Ship new spool lines and return how many commands were read"""
+        try:
+            st = os.stat(self.spool_path)
+        except FileNotFoundError:
+            return 0
+        
+        position = self._load_offset()
+        offset = position["offset"]
+        if position["inode"] != st.st_ino or st.st_size < offset:
+            # Spool was rotated or truncated behind our back
+            offset = 0
+        
+        lines, offset = self._read_lines(self.spool_path, offset)
+        
+        if offset >= self.rotate_bytes and offset == st.st_size:
+            # Shells reopen the spool for every append, so after the rename new
+            # lines go to a fresh file; drain whatever raced in before it
+            rotated_path = self.spool_path + ".1"
+            os.replace(self.spool_path, rotated_path)
+            more, _ = self._read_lines(rotated_path, offset)
+            lines.extend(more)
+            os.remove(rotated_path)
+            self.stats["rotations"] += 1
+            st, offset = None, 0
+        
+        self._ship(lines)
+        self._save_offset(st.st_ino if st else 0, offset)
+        return len(lines)
+    
+    def _ship(self, lines: List[str]):
+        """Group commands by directory and store them a batch at a time"""
+        by_cwd: Dict[str, List[str]] = {}
+        for line in lines:
+            parts = line.split("\t", 2)
+            if len(parts) != 3 or not parts[2].strip():
+                continue
+            by_cwd.setdefault(parts[1], []).append(parts[2].strip())
+        
+        for cwd, commands in by_cwd.items():
+            branch = self.branch_lookup(cwd) if self.branch_lookup else None
+            for i in range(0, len(commands), self.batch_size):
+                self.mem0_client.add_terminal_activity({
+                    "cwd": cwd,
+                    "git_branch": branch or "no-git",
+                    "commands": commands[i:i + self.batch_size]
+                })
+                self.stats["batches"] += 1
+            self.stats["lines"] += len(commands)
+
+
+class AdaptiveScheduler:
+    """Chooses how long the monitor sleeps based on recent activity"""
+    
+    def __init__(self, base_interval: float, min_interval: float, max_interval: float, backoff: float = 2.0):
+        """
+        Initialize the scheduler
+        
+        Args:
+            base_interval: Interval used before any activity is seen
+            min_interval: Interval while files, branches or commands are changing
+            max_interval: Upper bound reached by backing off while idle
+            backoff: Factor the interval grows by after each idle cycle
+        """
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max_interval
+        self.backoff = max(backoff, 1.0)
+        self.interval = max(self.min_interval, min(base_interval, self.max_interval))
+        self.idle_streak = 0
+        self.stats = {"cycles": 0, "active_cycles": 0, "idle_cycles": 0, "interval_changes": 0}
+    
+    def next_interval(self, active: bool) -> float:
+        """Record one cycle's outcome and return the sleep before the next"""
+        previous = self.interval
+        self.stats["cycles"] += 1
+        if active:
+            self.stats["active_cycles"] += 1
+            self.idle_streak = 0
+            self.interval = self.min_interval
+        else:
+            self.stats["idle_cycles"] += 1
+            self.idle_streak += 1
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        
+        if self.interval != previous:
+            self.stats["interval_changes"] += 1
+            reason = "activity detected" if active else f"idle for {self.idle_streak} cycles"
+            logger.info(f"Monitor interval {previous:g}s -> {self.interval:g}s ({reason})")
+        return self.interval
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "interval": self.interval,
+            "idle_streak": self.idle_streak,
+            "min_interval": self.min_interval,
+            "max_interval": self.max_interval
+        }
+
+
+class RepoState:
+    """Tracking state for one watched repository"""
+    
+    def __init__(self, root: str):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.project = os.path.basename(self.root.rstrip(os.sep)) or self.root
+        self.last_activity: Dict[str, Any] = {}
+        self.file_tracker: Optional[RecentFileTracker] = None
+        # Serializes scans of this repo across pool workers
+        self.lock = threading.Lock()
+        self.stats = {"scans": 0, "syncs": 0, "errors": 0, "last_sync": None}
+    
+    def close(self):
+        if self.file_tracker:
+            self.file_tracker.close()
+            self.file_tracker = None
 
 
 class ActivityMonitor:
     """Monitors development activity and syncs to Mem0"""
     
-    def __init__(self, watch_interval: int = 60):
+    def __init__(
+        self,
+        watch_interval: int = 60,
+        repos: Optional[List[str]] = None,
+        watch_list: Optional[str] = None
+    ):
         """
         Initialize the activity monitor
         
         Args:
             watch_interval: How often to collect activity (seconds)
+            repos: Repositories to watch (defaults to the current directory)
+            watch_list: File listing repositories to watch, one per line;
+                re-read whenever it changes
         """
         self.watch_interval = watch_interval
         self.mem0_client = UtlyzeMem0Client()
-        self.last_activity = {}
+        self.repos: Dict[str, RepoState] = {}
+        self.repos_lock = threading.Lock()
+        self.watch_list = watch_list
+        self.watch_list_mtime = None
+        # Shell commands come from any directory, so only the most recently
+        # used git caches are kept
+        self.git_caches: "OrderedDict[str, GitStateCache]" = OrderedDict()
+        self.git_caches_lock = threading.Lock()
+        self.max_git_caches = int(os.getenv("UTLYZE_MONITOR_GIT_CACHES", "64"))
+        # Scans of all repos share one bounded pool
+        self.pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("UTLYZE_MONITOR_WORKERS", "4")),
+            thread_name_prefix="monitor-scan"
+        )
+        
+        if watch_list:
+            self.reload_watch_list()
+        else:
+            self.set_repos(repos or [os.getcwd()])
+        
+        self.spool_collector = SpoolCollector(
+            self.mem0_client,
+            os.getenv("UTLYZE_SPOOL") or state_path("activity.spool"),
+            branch_lookup=lambda cwd: self.get_git_info(cwd).get("branch")
+        )
+        # Back off while nothing changes, tighten up while work is happening;
+        # UTLYZE_MONITOR_ADAPTIVE=0 keeps the fixed watch_interval
+        adaptive = os.getenv("UTLYZE_MONITOR_ADAPTIVE", "1") != "0"
+        self.scheduler = AdaptiveScheduler(
+            base_interval=watch_interval,
+            min_interval=float(os.getenv("UTLYZE_MONITOR_MIN_INTERVAL", "15")) if adaptive else watch_interval,
+            max_interval=float(os.getenv("UTLYZE_MONITOR_MAX_INTERVAL", "900")) if adaptive else watch_interval,
+            backoff=float(os.getenv("UTLYZE_MONITOR_BACKOFF", "2"))
+        )
+        self.stats_path = state_path("monitor-stats.json")
+        # Retention deletes memories, so it only runs in the background when
+        # MEM0_RETENTION_INTERVAL (hours) is set; 0, the default, disables it
+        self.retention_interval = float(os.getenv("MEM0_RETENTION_INTERVAL", "0")) * 3600
+        self.retention_due = None
+        self.retention_thread = None
+        self.wake = threading.Event()
         self.running = False
         self.thread = None
+    
+    def set_repos(self, roots: List[str]):
+        """Watch exactly these repositories, keeping state for ones already watched"""
+        wanted = {}
+        for root in roots:
+            state = RepoState(root)
+            if os.path.isdir(state.root):
+                wanted[state.root] = state
+            else:
+                logger.warning(f"Not watching {root}: not a directory")
+        
+        with self.repos_lock:
+            for root in set(self.repos) - set(wanted):
+                self.repos.pop(root).close()
+                logger.info(f"Stopped watching {root}")
+            for root, state in wanted.items():
+                if root not in self.repos:
+                    self.repos[root] = state
+                    logger.info(f"Watching {root}")
+    
+    def reload_watch_list(self) -> bool:
+        """Re-read the watch list if it changed; returns whether it did"""
+        try:
+            mtime = os.stat(self.watch_list).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self.watch_list_mtime and self.watch_list_mtime is not None:
+            return False
+        self.watch_list_mtime = mtime
         
-    def get_git_info(self, cwd: str) -> Dict[str, str]:
+        roots = []
+        if mtime is not None:
+            with open(self.watch_list) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        roots.append(line)
+        self.set_repos(roots)
+        return True
+    
+    def get_git_info(self, cwd: str, extra: Any = None) -> Dict[str, str]:
         """Get current git branch and status"""
         try:
-            # Get current branch
-            branch = subprocess.check_output(
-                ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-                cwd=cwd,
-                stderr=subprocess.DEVNULL
-            ).decode().strip()
-            
-            # Get last commit
-            commit = subprocess.check_output(
-                ["git", "log", "-1", "--oneline"],
-                cwd=cwd,
-                stderr=subprocess.DEVNULL
-            ).decode().strip()
+            with self.git_caches_lock:
+                cache = self.git_caches.get(cwd)
+                if cache is None:
+                    cache = self.git_caches[cwd] = GitStateCache(cwd)
+                    while len(self.git_caches) > self.max_git_caches:
+                        self.git_caches.popitem(last=False)
+                else:
+                    self.git_caches.move_to_end(cwd)
             
-            # Check if dirty
-            status = subprocess.check_output(
-                ["git", "status", "--porcelain"],
-                cwd=cwd,
-                stderr=subprocess.DEVNULL
-            ).decode().strip()
-            
-            return {
-                "branch": branch,
-                "last_commit": commit,
-                "is_dirty": len(status) > 0,
-                "modified_files": len(status.splitlines()) if status else 0
-            }
+            # Re-query git when its metadata or the tracked files change
+            return cache.get(extra=extra)
         except Exception:
             return {}
     
-    def get_open_files(self) -> List[str]:
-        """Get list of recently modified files in current directory"""
+    def get_open_files(self, repo: RepoState) -> List[str]:
+        """Get the most recently modified files in a repository"""
         try:
-            cwd = os.getcwd()
-            recent_files = []
-            
-            # Find files modified in last hour
-            for root, dirs, files in os.walk(cwd):
-                # Skip hidden directories
-                dirs[:] = [d for d in dirs if not d.startswith('.')]
-                
-                for file in files:
-                    if file.startswith('.'):
-                        continue
-                        
-                    filepath = os.path.join(root, file)
-                    try:
-                        mtime = os.path.getmtime(filepath)
-                        if time.time() - mtime < 3600:  # Last hour
-                            relative_path = os.path.relpath(filepath, cwd)
-                            recent_files.append(relative_path)
-                    except:
-                        continue
-            
-            return recent_files[:10]  # Limit to 10 most recent
+            # The tracker is built once and then kept current by inotify
+            # (or a pruned scandir rescan), honouring .gitignore
+            if repo.file_tracker is None:
+                repo.file_tracker = RecentFileTracker(repo.root, window=3600)
+            return repo.file_tracker.recent(10)
         except Exception as e:
-            logger.error(f"Error getting open files: {e}")
+            logger.error(f"Error getting open files in {repo.root}: {e}")
             return []
     
-    def get_terminal_context(self) -> Dict[str, Any]:
-        """Get current terminal context"""
-        cwd = os.getcwd()
+    def get_terminal_context(self, repo: RepoState) -> Dict[str, Any]:
+        """Get current context of a repository"""
+        cwd = repo.root
         
         context = {
             "cwd": cwd,
-            "project": os.path.basename(cwd),
+            "project": repo.project,
             "timestamp": datetime.now().isoformat(),
             "user": os.getenv("USER", "unknown"),
             "shell": os.getenv("SHELL", "unknown"),
-            "recent_files": self.get_open_files()
+            "recent_files": self.get_open_files(repo)
         }
         
         # Add git info if in a git repo
-        git_info = self.get_git_info(cwd)
+        tracker_version = repo.file_tracker.version if repo.file_tracker else None
+        git_info = self.get_git_info(cwd, extra=tracker_version)
         if git_info:
             context["git"] = git_info
         
@@ -124,94 +477,176 @@ class ActivityMonitor:
             context["virtual_env"] = os.path.basename(os.getenv("VIRTUAL_ENV"))
         
         # Check for Node.js project
-        if os.path.exists("package.json"):
+        if os.path.exists(os.path.join(cwd, "package.json")):
             context["node_project"] = True
             
         # Check for Python project
-        if os.path.exists("requirements.txt") or os.path.exists("pyproject.toml"):
+        if os.path.exists(os.path.join(cwd, "requirements.txt")) or os.path.exists(os.path.join(cwd, "pyproject.toml")):
             context["python_project"] = True
         
         return context
     
-    def has_activity_changed(self, current: Dict[str, Any]) -> bool:
+    def has_activity_changed(self, current: Dict[str, Any], previous: Dict[str, Any]) -> bool:
         """Check if activity has meaningfully changed"""
-        if not self.last_activity:
+        if not previous:
             return True
         
         # Check if directory changed
-        if current.get("cwd") != self.last_activity.get("cwd"):
+        if current.get("cwd") != previous.get("cwd"):
             return True
         
         # Check if git branch changed
-        if current.get("git", {}).get("branch") != self.last_activity.get("git", {}).get("branch"):
+        if current.get("git", {}).get("branch") != previous.get("git", {}).get("branch"):
             return True
         
         # Check if files have been modified
         current_files = set(current.get("recent_files", []))
-        last_files = set(self.last_activity.get("recent_files", []))
+        last_files = set(previous.get("recent_files", []))
         
         if current_files != last_files:
             return True
         
         # Check if git status changed significantly
-        if current.get("git", {}).get("is_dirty") != self.last_activity.get("git", {}).get("is_dirty"):
+        if current.get("git", {}).get("is_dirty") != previous.get("git", {}).get("is_dirty"):
             return True
         
         return False
     
-    def sync_activity(self):
-        """Sync current activity to Mem0"""
+    def sync_repo(self, repo: RepoState) -> bool:
+        """Sync one repository's activity to Mem0; returns whether anything changed"""
+        with repo.lock:
+            try:
+                repo.stats["scans"] += 1
+                context = self.get_terminal_context(repo)
+                
+                # Only sync if activity has changed
+                if not self.has_activity_changed(context, repo.last_activity):
+                    logger.debug(f"No significant activity change in {repo.root}, skipping sync")
+                    return False
+                
+                # Create activity memory
+                activity_description = f"""
+                Development Activity Update:
+                - Working in: {context['project']} ({context['cwd']})
+                - Git branch: {context.get('git', {}).get('branch', 'N/A')}
+                - Recent files: {', '.join(context['recent_files'][:5]) if context['recent_files'] else 'None'}
+                - Git status: {'Modified files' if context.get('git', {}).get('is_dirty') else 'Clean'}
+                - Time: {context['timestamp']}
+                """
+                
+                # Queue for Mem0 (flushed in the background by the client)
+                self.mem0_client.add_memory(
+                    activity_description,
+                    {
+                        "type": "development_activity",
+                        "source": "activity_monitor",
+                        "project": context['project'],
+                        "cwd": context['cwd'],
+                        "git_branch": context.get('git', {}).get('branch'),
+                        "timestamp": context['timestamp']
+                    }
+                )
+                
+                logger.info(f"Activity synced: {context['project']} on {context.get('git', {}).get('branch', 'N/A')}")
+                repo.last_activity = context
+                repo.stats["syncs"] += 1
+                repo.stats["last_sync"] = context['timestamp']
+                return True
+                
+            except Exception as e:
+                repo.stats["errors"] += 1
+                logger.error(f"Error syncing activity for {repo.root}: {e}")
+                return False
+    
+    def sync_activity(self) -> bool:
+        """Sync every watched repository; returns whether any changed"""
+        if self.watch_list:
+            self.reload_watch_list()
+        with self.repos_lock:
+            repos = list(self.repos.values())
+        # list() waits for every repo; any() alone would stop at the first change
+        return any(list(self.pool.map(self.sync_repo, repos)))
+    
+    def collect_shell_activity(self) -> int:
+        """Ship commands logged by the shell hook since the last pass"""
         try:
-            context = self.get_terminal_context()
-            
-            # Only sync if activity has changed
-            if not self.has_activity_changed(context):
-                logger.debug("No significant activity change, skipping sync")
-                return
-            
-            # Create activity memory
-            activity_description = f"""
-            Development Activity Update:
-            - Working in: {context['project']} ({context['cwd']})
-            - Git branch: {context.get('git', {}).get('branch', 'N/A')}
-            - Recent files: {', '.join(context['recent_files'][:5]) if context['recent_files'] else 'None'}
-            - Git status: {'Modified files' if context.get('git', {}).get('is_dirty') else 'Clean'}
-            - Time: {context['timestamp']}
-            """
-            
-            # Add to Mem0
-            messages = [{"role": "user", "content": activity_description}]
-            result = self.mem0_client.client.add(
-                messages,
-                user_id="utlyze",
-                metadata={
-                    "type": "development_activity",
-                    "source": "activity_monitor",
-                    "project": context['project'],
-                    "git_branch": context.get('git', {}).get('branch'),
-                    "timestamp": context['timestamp']
-                }
-            )
-            
-            logger.info(f"Activity synced: {context['project']} on {context.get('git', {}).get('branch', 'N/A')}")
-            self.last_activity = context
-            
+            count = self.spool_collector.collect()
+            if count:
+                logger.info(f"Shipped {count} shell commands from spool")
+            return count
         except Exception as e:
-            logger.error(f"Error syncing activity: {e}")
+            logger.error(f"Error collecting shell activity: {e}")
+            return 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Scheduler decisions and collection counters"""
+        with self.repos_lock:
+            repos = {
+                root: {**repo.stats, "file_tracker": repo.file_tracker.mode if repo.file_tracker else None}
+                for root, repo in self.repos.items()
+            }
+        return {
+            "pid": os.getpid(),
+            "scheduler": self.scheduler.get_stats(),
+            "repos": repos,
+            "git": self._git_cache_stats(),
+            "client": self.mem0_client.get_stats(),
+            "updated": datetime.now().isoformat()
+        }
+    
+    def _git_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit and git call counters of the cached directories"""
+        with self.git_caches_lock:
+            return {cwd: dict(cache.stats) for cwd, cache in self.git_caches.items()}
+    
+    def _save_stats(self):
+        """Write stats where `utlyze_monitor status` can show them"""
+        try:
+            tmp_path = self.stats_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.get_stats(), f, indent=2, default=str)
+            os.replace(tmp_path, self.stats_path)
+        except OSError as e:
+            logger.debug(f"Could not write monitor stats: {e}")
+    
+    def maybe_apply_retention(self):
+        """Start a background retention pass once the last one is old enough"""
+        if self.retention_interval <= 0 or (self.retention_thread and self.retention_thread.is_alive()):
+            return
+        if self.retention_due is None:
+            last_run = self.mem0_client.retention_engine().last_run()
+            self.retention_due = last_run.timestamp() + self.retention_interval if last_run else 0.0
+        if time.time() < self.retention_due:
+            return
+        
+        def apply():
+            try:
+                self.mem0_client.apply_retention()
+            except Exception as e:
+                logger.error(f"Retention failed: {e}")
+            self.retention_due = time.time() + self.retention_interval
+        
+        self.retention_thread = threading.Thread(target=apply, daemon=True)
+        self.retention_thread.start()
     
     def monitor_loop(self):
         """Main monitoring loop"""
-        logger.info("Activity monitor started")
+        logger.info(f"Activity monitor started for {len(self.repos)} repositories")
         
         while self.running:
             try:
-                self.sync_activity()
-                time.sleep(self.watch_interval)
+                changed = self.sync_activity()
+                shipped = self.collect_shell_activity()
+                interval = self.scheduler.next_interval(changed or shipped > 0)
+                self.maybe_apply_retention()
             except KeyboardInterrupt:
                 break
             except Exception as e:
                 logger.error(f"Monitor error: {e}")
-                time.sleep(self.watch_interval)
+                interval = self.scheduler.interval
+            self._save_stats()
+            # An event wait lets stop() interrupt a long idle sleep
+            self.wake.wait(interval)
         
         logger.info("Activity monitor stopped")
     
@@ -226,16 +661,43 @@ class ActivityMonitor:
         self.thread.start()
         logger.info("Activity monitor started in background")
     
+    def request_stop(self):
+        """Ask the monitor loop to exit after the current cycle"""
+        self.running = False
+        self.wake.set()
+    
     def stop(self):
         """Stop the activity monitor"""
-        self.running = False
+        self.request_stop()
         if self.thread:
             self.thread.join(timeout=5)
+        self.pool.shutdown(wait=True)
+        with self.repos_lock:
+            for repo in self.repos.values():
+                repo.close()
+        self.mem0_client.flush(timeout=5)
         logger.info("Activity monitor stopped")
     
     def run_once(self):
         """Run a single activity sync"""
         self.sync_activity()
+        self.collect_shell_activity()
+
+
+def write_pid_file(path: str):
+    """Record this daemon's pid so the shell can find exactly this process"""
+    with open(path, "w") as f:
+        f.write(str(os.getpid()))
+    
+    def remove():
+        try:
+            with open(path) as f:
+                if f.read().strip() == str(os.getpid()):
+                    os.remove(path)
+        except OSError:
+            pass
+    
+    atexit.register(remove)
 
 
 def main():
@@ -247,7 +709,7 @@ def main():
         "--interval",
         type=int,
         default=60,
-        help="Sync interval in seconds (default: 60)"
+        help="Initial sync interval in seconds; adapts between UTLYZE_MONITOR_MIN_INTERVAL and UTLYZE_MONITOR_MAX_INTERVAL (default: 60)"
     )
     parser.add_argument(
         "--once",
@@ -259,6 +721,20 @@ def main():
         action="store_true",
         help="Run as daemon process"
     )
+    parser.add_argument(
+        "--repos",
+        nargs="+",
+        help="Repositories to watch (default: current directory)"
+    )
+    parser.add_argument(
+        "--watch-list",
+        help="File listing repositories to watch, one per line; re-read when it changes"
+    )
+    parser.add_argument(
+        "--pid-file",
+        default=state_path("monitor.pid"),
+        help="Where the daemon records its pid"
+    )
     
     args = parser.parse_args()
     
@@ -267,10 +743,13 @@ def main():
         print("Error: MEM0_API_KEY environment variable not set")
         sys.exit(1)
     
-    monitor = ActivityMonitor(watch_interval=args.interval)
+    def build_monitor() -> ActivityMonitor:
+        return ActivityMonitor(watch_interval=args.interval, repos=args.repos, watch_list=args.watch_list)
     
     if args.once:
+        monitor = build_monitor()
         monitor.run_once()
+        monitor.stop()
     elif args.daemon:
         # Daemonize the process
         try:
@@ -283,14 +762,23 @@ def main():
             print(f"Fork failed: {e}")
             sys.exit(1)
         
-        # Child process continues
+        # Child process continues; build the client here so its
+        # background writer thread lives in the daemon
+        write_pid_file(args.pid_file)
+        monitor = build_monitor()
+        signal.signal(signal.SIGTERM, lambda signum, frame: monitor.request_stop())
+        monitor.running = True
         monitor.monitor_loop()
+        monitor.stop()
     else:
         # Run in foreground
+        monitor = build_monitor()
+        monitor.running = True
         try:
             monitor.monitor_loop()
         except KeyboardInterrupt:
             print("\nShutting down activity monitor...")
+        monitor.stop()
 
 
 if __name__ == "__main__":
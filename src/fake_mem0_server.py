@@ -0,0 +1,342 @@
+"""
+Fake Mem0 Server
+Local stand-in for the Mem0 platform API used by MemoryClient, with
+configurable latency and error/429 injection for reproducible benchmarks
+
+Point the client at it with MEM0_HOST=http://127.0.0.1:<port>
+"""
+
+import os
+import re
+import time
+import uuid
+import random
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fault injection and latency, adjustable at runtime through /_fake/config
+config = {
+    "latency": float(os.getenv("FAKE_MEM0_LATENCY", "0")),
+    "jitter": float(os.getenv("FAKE_MEM0_JITTER", "0")),
+    "error_rate": float(os.getenv("FAKE_MEM0_ERROR_RATE", "0")),
+    "rate_limit_rate": float(os.getenv("FAKE_MEM0_RATE_LIMIT_RATE", "0")),
+    "retry_after": float(os.getenv("FAKE_MEM0_RETRY_AFTER", "1")),
+    # Requests per second before answering 429, like a plan quota; 0 is unlimited
+    "quota": float(os.getenv("FAKE_MEM0_QUOTA", "0")),
+}
+
+memories: Dict[str, Dict[str, Any]] = {}
+store_lock = threading.Lock()
+request_counts: Dict[str, int] = {}
+quota_window = {"start": 0.0, "count": 0}
+
+app = FastAPI(title="Fake Mem0", version="1.0.0")
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    """Apply configured latency, then fail a share of requests on purpose"""
+    path = request.url.path
+    if path.startswith("/_fake"):
+        return await call_next(request)
+    
+    request_counts[path] = request_counts.get(path, 0) + 1
+    delay = config["latency"] + random.uniform(0, config["jitter"])
+    if delay > 0:
+        await asyncio.sleep(delay)
+    
+    # The ping made while constructing MemoryClient is never failed
+    if path != "/v1/ping/":
+        if not request.headers.get("authorization", "").startswith("Token "):
+            return JSONResponse({"detail": "Invalid API key"}, status_code=401)
+        if config["quota"] > 0:
+            now = time.monotonic()
+            if now - quota_window["start"] >= 1.0:
+                quota_window.update(start=now, count=0)
+            quota_window["count"] += 1
+            if quota_window["count"] > config["quota"]:
+                return JSONResponse(
+                    {"detail": "Quota exceeded"},
+                    status_code=429,
+                    headers={"Retry-After": f"{quota_window['start'] + 1.0 - now:.3f}"}
+                )
+        roll = random.random()
+        if roll < config["rate_limit_rate"]:
+            return JSONResponse(
+                {"detail": "Rate limit exceeded"},
+                status_code=429,
+                headers={"Retry-After": str(config["retry_after"])}
+            )
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            return JSONResponse({"detail": "Injected failure"}, status_code=500)
+    
+    return await call_next(request)
+
+
+def _now() -> str:
+    # Mem0 timestamps are timezone-aware
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _instant(value: Any) -> Any:
+    """ISO timestamps as aware datetimes (naive ones are UTC, as in Mem0); other values as they are"""
+    if not isinstance(value, str):
+        return value
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _compare(actual: Any, expected: Any) -> bool:
+    """Match a field against a value or an operator dict (in, contains, gte, lte, gt, lt, ne)"""
+    if not isinstance(expected, dict):
+        return actual == expected
+    for op, value in expected.items():
+        if op == "in" and actual not in value:
+            return False
+        if op == "contains" and (actual is None or value not in actual):
+            return False
+        if op == "ne" and actual == value:
+            return False
+        if op in ("gte", "lte", "gt", "lt"):
+            if actual is None:
+                return False
+            # Timestamps compare by instant whatever their offsets
+            if isinstance(_instant(actual), datetime) and isinstance(_instant(value), datetime):
+                actual, value = _instant(actual), _instant(value)
+            if op == "gte" and not actual >= value:
+                return False
+            if op == "lte" and not actual <= value:
+                return False
+            if op == "gt" and not actual > value:
+                return False
+            if op == "lt" and not actual < value:
+                return False
+    return True
+
+
+def _matches(memory: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate v2-style filters (AND/OR/NOT, metadata, top-level fields)"""
+    for key, value in (filters or {}).items():
+        if key == "AND":
+            if not all(_matches(memory, f) for f in value):
+                return False
+        elif key == "OR":
+            if not any(_matches(memory, f) for f in value):
+                return False
+        elif key == "NOT":
+            if any(_matches(memory, f) for f in value):
+                return False
+        elif key == "metadata":
+            metadata = memory.get("metadata") or {}
+            if not all(_compare(metadata.get(k), v) for k, v in value.items()):
+                return False
+        elif value == "*":
+            if memory.get(key) is None:
+                return False
+        elif not _compare(memory.get(key), value):
+            return False
+    return True
+
+
+def _entity_filters(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine v1 top-level entity ids and v2 filters into one filter"""
+    conditions = [{key: body[key]} for key in ("user_id", "agent_id", "app_id", "run_id") if body.get(key)]
+    if body.get("filters"):
+        conditions.append(body["filters"])
+    if body.get("metadata") and not body.get("messages"):
+        conditions.append({"metadata": body["metadata"]})
+    return {"AND": conditions} if conditions else {}
+
+
+def _terms(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def _wrap(results: List[Dict[str, Any]], body: Dict[str, Any], version: str) -> Any:
+    """v1.0 output is a bare list; later formats wrap results"""
+    if version == "v1" and body.get("output_format", "v1.0") == "v1.0":
+        return results
+    return {"results": results}
+
+
+@app.get("/v1/ping/")
+async def ping():
+    return {"status": "ok", "user_email": "bench@localhost", "org_id": "local", "project_id": "local"}
+
+
+@app.post("/v1/memories/")
+@app.post("/v3/memories/add/")
+async def add_memory(request: Request):
+    """Store the message contents verbatim as one memory"""
+    body = await request.json()
+    messages = body.get("messages") or []
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    text = "\n".join(m.get("content", "") for m in messages if isinstance(m, dict)).strip()
+    if not text:
+        return JSONResponse({"detail": "messages must not be empty"}, status_code=400)
+    
+    now = _now()
+    memory = {
+        "id": str(uuid.uuid4()),
+        "memory": text,
+        "user_id": body.get("user_id"),
+        "agent_id": body.get("agent_id"),
+        "app_id": body.get("app_id"),
+        "run_id": body.get("run_id"),
+        "metadata": body.get("metadata") or {},
+        "categories": [],
+        "created_at": now,
+        "updated_at": now,
+    }
+    with store_lock:
+        memories[memory["id"]] = memory
+    event = [{"id": memory["id"], "memory": text, "event": "ADD"}]
+    version = "v3" if request.url.path.startswith("/v3") else "v1"
+    return _wrap(event, body, version)
+
+
+@app.post("/v1/memories/search/")
+@app.post("/v2/memories/search/")
+@app.post("/v3/memories/search/")
+async def search_memories(request: Request):
+    """Rank matching memories by shared terms with the query, newest first on ties"""
+    body = await request.json()
+    filters = _entity_filters(body)
+    limit = body.get("top_k") or body.get("limit") or 10
+    query_terms = _terms(body.get("query", ""))
+    
+    with store_lock:
+        candidates = [m for m in memories.values() if _matches(m, filters)]
+    scored = []
+    for memory in candidates:
+        overlap = len(query_terms & _terms(memory["memory"]))
+        if overlap or not query_terms:
+            scored.append((overlap, memory["created_at"], memory))
+    scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    results = [
+        {**memory, "score": overlap / max(len(query_terms), 1)}
+        for overlap, _, memory in scored[:int(limit)]
+    ]
+    return _wrap(results, body, request.url.path.split("/")[1])
+
+
+@app.get("/v1/memories/")
+async def list_memories_v1(request: Request):
+    params = dict(request.query_params)
+    filters = _entity_filters(params)
+    with store_lock:
+        results = [m for m in memories.values() if _matches(m, filters)]
+    results.sort(key=lambda m: m["created_at"], reverse=True)
+    return results[:int(params.get("limit", 100))]
+
+
+@app.post("/v2/memories/")
+@app.post("/v3/memories/")
+async def list_memories(request: Request):
+    """Paged listing in the v2 response shape, newest first"""
+    body = await request.json()
+    filters = _entity_filters(body)
+    page = int(request.query_params.get("page", body.get("page", 1)))
+    page_size = int(request.query_params.get("page_size", body.get("page_size", 100)))
+    
+    with store_lock:
+        results = [m for m in memories.values() if _matches(m, filters)]
+    results.sort(key=lambda m: m["created_at"], reverse=True)
+    start = (page - 1) * page_size
+    page_results = results[start:start + page_size]
+    base = str(request.url.remove_query_params(["page", "page_size"]))
+    return {
+        "count": len(results),
+        "next": f"{base}?page={page + 1}&page_size={page_size}" if start + page_size < len(results) else None,
+        "previous": f"{base}?page={page - 1}&page_size={page_size}" if page > 1 else None,
+        "results": page_results,
+    }
+
+
+@app.get("/v1/memories/{memory_id}/")
+async def get_memory(memory_id: str):
+    memory = memories.get(memory_id)
+    if memory is None:
+        return JSONResponse({"detail": "Memory not found"}, status_code=404)
+    return memory
+
+
+@app.delete("/v1/memories/{memory_id}/")
+async def delete_memory(memory_id: str):
+    with store_lock:
+        if memories.pop(memory_id, None) is None:
+            return JSONResponse({"detail": "Memory not found"}, status_code=404)
+    return {"message": "Memory deleted successfully!"}
+
+
+@app.delete("/v1/batch/")
+async def batch_delete(request: Request):
+    body = await request.json()
+    ids = [entry.get("memory_id") for entry in body.get("memories", [])]
+    with store_lock:
+        deleted = sum(1 for memory_id in ids if memories.pop(memory_id, None) is not None)
+    return {"message": f"Successfully deleted {deleted} memories"}
+
+
+@app.get("/_fake/config")
+async def get_config():
+    """Current fault injection settings and request counts"""
+    return {"config": config, "memories": len(memories), "requests": request_counts}
+
+
+@app.post("/_fake/config")
+async def update_config(request: Request):
+    """Change latency or fault injection without restarting"""
+    updates = await request.json()
+    for key, value in updates.items():
+        if key not in config:
+            return JSONResponse({"detail": f"Unknown setting: {key}"}, status_code=400)
+        config[key] = float(value)
+    return {"config": config}
+
+
+@app.post("/_fake/reset")
+async def reset():
+    """Drop all stored memories and request counts"""
+    with store_lock:
+        memories.clear()
+    request_counts.clear()
+    return {"status": "reset"}
+
+
+def main():
+    """Run the fake server standalone"""
+    import argparse
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Fake Mem0 API server")
+    parser.add_argument("--port", type=int, default=int(os.getenv("FAKE_MEM0_PORT", "8765")))
+    parser.add_argument("--latency", type=float, help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, help="Extra random latency up to this many seconds")
+    parser.add_argument("--error-rate", type=float, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, help="Fraction of requests answered with 429")
+    parser.add_argument("--quota", type=float, help="Requests per second before answering 429")
+    args = parser.parse_args()
+    
+    for key in ("latency", "jitter", "error_rate", "rate_limit_rate", "quota"):
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+    
+    logger.info(f"Starting fake Mem0 on port {args.port} with {config}")
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Recent File Tracking for the Activity Monitor
+Keeps the most recently modified files of a project up to date using
+inotify where available, with an os.scandir rescan as fallback
+"""
+
+import os
+import sys
+import time
+import heapq
+import errno
+import struct
+import ctypes
+import ctypes.util
+import fnmatch
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Directories that are never interesting, even without a .gitignore
+DEFAULT_IGNORES = [
+    ".*",
+    "node_modules/",
+    "venv/",
+    "__pycache__/",
+    "build/",
+    "dist/",
+    "target/",
+    "*.pyc",
+]
+
+# inotify constants from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_ATTRIB | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class GitignoreMatcher:
+    """Minimal .gitignore matcher for pruning project scans"""
+    
+    def __init__(self, root: str):
+        self.rules: List[Tuple[str, bool, bool, bool]] = []
+        for pattern in DEFAULT_IGNORES:
+            self._add_rule(pattern)
+        for path in (os.path.join(root, ".gitignore"), os.path.join(root, ".git", "info", "exclude")):
+            try:
+                with open(path) as f:
+                    for line in f:
+                        self._add_rule(line)
+            except OSError:
+                continue
+    
+    def _add_rule(self, line: str):
+        """Parse one gitignore line into (pattern, negate, dir_only, anchored)"""
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            return
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.strip("/") if dir_only else line
+        anchored = "/" in line
+        self.rules.append((line.lstrip("/"), negate, dir_only, anchored))
+    
+    def _match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Return True/False if a rule decides the path, None otherwise"""
+        decision = None
+        name = rel_path.rsplit("/", 1)[-1]
+        for pattern, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            target = rel_path if anchored else name
+            if fnmatch.fnmatchcase(target, pattern):
+                decision = not negate
+        return decision
+    
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """Check a path relative to the root, including its parent directories"""
+        parts = rel_path.replace(os.sep, "/").split("/")
+        for i in range(1, len(parts)):
+            if self._match("/".join(parts[:i]), True):
+                return True
+        return bool(self._match("/".join(parts), is_dir))
+
+
+class Inotify:
+    """Thin ctypes wrapper around the Linux inotify API"""
+    
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    
+    def add_watch(self, path: str, mask: int) -> int:
+        """Watch a directory and return its watch descriptor"""
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch failed for {path}: {os.strerror(err)}")
+        return wd
+    
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """Return all pending (wd, mask, name) events without blocking"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+    
+    def close(self):
+        """Release the inotify descriptor"""
+        os.close(self.fd)
+
+
+class RecentFileTracker:
+    """Tracks the most recently modified files under a project root"""
+    
+    def __init__(self, root: str, window: int = 3600, use_inotify: Optional[bool] = None):
+        """
+        Initialize the tracker
+        
+        Args:
+            root: Project directory to track
+            window: Only files modified within this many seconds are kept
+            use_inotify: Force inotify on/off (defaults to on for Linux)
+        """
+        self.root = os.path.abspath(root)
+        self.window = window
+        self.ignore = GitignoreMatcher(self.root)
+        self.mtimes: Dict[str, float] = {}
+        self.inotify = None
+        self.watches: Dict[int, str] = {}
+        self.version = 0
+        
+        if use_inotify is None:
+            use_inotify = sys.platform.startswith("linux")
+        if use_inotify:
+            try:
+                self.inotify = Inotify()
+            except OSError as e:
+                logger.warning(f"inotify unavailable, falling back to scanning: {e}")
+        
+        self._scan()
+        logger.info(f"Tracking recent files in {self.root} ({'inotify' if self.inotify else 'scandir'})")
+    
+    @property
+    def mode(self) -> str:
+        """Change detection strategy currently in use"""
+        return "inotify" if self.inotify else "scandir"
+    
+    def recent(self, limit: int = 10) -> List[str]:
+        """Return the most recently modified files, newest first"""
+        if self.inotify:
+            self._drain_events()
+        else:
+            self._scan()
+        
+        cutoff = time.time() - self.window
+        for path in [p for p, mtime in self.mtimes.items() if mtime < cutoff]:
+            del self.mtimes[path]
+        
+        newest = heapq.nlargest(limit, self.mtimes.items(), key=lambda item: item[1])
+        return [path for path, _ in newest]
+    
+    def close(self):
+        """Stop watching the project"""
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None
+    
+    def _scan(self):
+        """Walk the project with os.scandir, pruning ignored directories"""
+        cutoff = time.time() - self.window
+        found: Dict[str, float] = {}
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            if self.inotify:
+                self._watch(directory)
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    rel_path = os.path.relpath(entry.path, self.root)
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if self.ignore.is_ignored(rel_path, is_dir):
+                            continue
+                        if is_dir:
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            mtime = entry.stat(follow_symlinks=False).st_mtime
+                            if mtime >= cutoff:
+                                found[rel_path] = mtime
+                    except OSError:
+                        continue
+        
+        if found != self.mtimes:
+            self.version += 1
+        self.mtimes = found
+    
+    def _watch(self, directory: str):
+        """Add an inotify watch, falling back to scanning if we run out"""
+        try:
+            wd = self.inotify.add_watch(directory, WATCH_MASK)
+            self.watches[wd] = directory
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                logger.warning("inotify watch limit reached, falling back to scanning")
+                self.close()
+            # Directories that vanished or aren't readable are simply skipped
+    
+    def _drain_events(self):
+        """Apply pending inotify events to the recent-files index"""
+        rescan = False
+        for wd, mask, name in self.inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            
+            path = os.path.join(directory, name)
+            rel_path = os.path.relpath(path, self.root)
+            is_dir = bool(mask & IN_ISDIR)
+            if self.ignore.is_ignored(rel_path, is_dir):
+                continue
+            
+            self.version += 1
+            if is_dir:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # New directory: watch it and pick up anything already inside
+                    rescan = True
+                continue
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                self.mtimes.pop(rel_path, None)
+                continue
+            try:
+                self.mtimes[rel_path] = os.stat(path).st_mtime
+            except OSError:
+                self.mtimes.pop(rel_path, None)
+        
+        if rescan:
+            self._scan()
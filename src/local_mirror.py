@@ -0,0 +1,289 @@
+"""
+Local Memory Mirror
+Keeps a SQLite/FTS5 copy of Utlyze memories for offline and low-latency search
+"""
+
+import os
+import re
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterable, Set
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Metadata keys that get their own indexed column
+INDEXED_FIELDS = ["type", "task_id", "project", "file_path", "timestamp"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY,
+    memory_id TEXT UNIQUE,
+    content TEXT NOT NULL,
+    type TEXT,
+    task_id TEXT,
+    project TEXT,
+    file_path TEXT,
+    timestamp TEXT,
+    created_at TEXT,
+    metadata TEXT,
+    origin TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_memories_type ON memories(type);
+CREATE INDEX IF NOT EXISTS idx_memories_task_id ON memories(task_id);
+CREATE INDEX IF NOT EXISTS idx_memories_project ON memories(project);
+CREATE INDEX IF NOT EXISTS idx_memories_file_path ON memories(file_path);
+CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories(timestamp);
+
+-- Batched file_activity memories list many paths under metadata.file_paths
+CREATE TABLE IF NOT EXISTS memory_files (
+    memory_rowid INTEGER NOT NULL,
+    file_path TEXT NOT NULL,
+    PRIMARY KEY (memory_rowid, file_path)
+);
+CREATE INDEX IF NOT EXISTS idx_memory_files_path ON memory_files(file_path);
+
+-- Bookkeeping such as how far remote memories have been pulled
+CREATE TABLE IF NOT EXISTS mirror_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+    content,
+    content='memories',
+    content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    DELETE FROM memory_files WHERE memory_rowid = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE ON memories BEGIN
+    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+
+class LocalMemoryMirror:
+    """SQLite mirror of Mem0 memories with full-text search"""
+    
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the mirror database
+        
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            self.conn.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"SQLite FTS5 support is required for the local mirror: {e}")
+        logger.info(f"Local memory mirror opened at {db_path}")
+    
+    def add(self, content: str, metadata: Dict[str, Any], memory_id: Optional[str] = None) -> int:
+        """Store a memory written through this client and return its row id"""
+        row = self._row(content, metadata, memory_id, metadata.get("timestamp"), "local")
+        with self.lock, self.conn:
+            if memory_id:
+                row_id = self._upsert(row)
+            else:
+                row_id = self.conn.execute(
+                    f"INSERT INTO memories ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)})",
+                    list(row.values())
+                ).lastrowid
+            self._index_files(row_id, metadata)
+            return row_id
+    
+    def attach_memory_id(self, row_id: int, memory_id: str):
+        """Record the Mem0 id of a locally written memory once it is stored"""
+        with self.lock, self.conn:
+            try:
+                self.conn.execute("UPDATE memories SET memory_id = ? WHERE id = ?", (memory_id, row_id))
+            except sqlite3.IntegrityError:
+                # Already pulled from Mem0 under that id; keep the remote copy
+                self.conn.execute("DELETE FROM memories WHERE id = ?", (row_id,))
+    
+    def upsert_remote(self, memories: Iterable[Dict[str, Any]]) -> int:
+        """Insert or refresh memories pulled from Mem0"""
+        count = 0
+        with self.lock, self.conn:
+            for memory in memories:
+                if not memory.get("id"):
+                    continue
+                metadata = memory.get("metadata") or {}
+                row_id = self._upsert(self._row(
+                    memory.get("memory", ""),
+                    metadata,
+                    memory["id"],
+                    memory.get("created_at"),
+                    "remote"
+                ))
+                self._index_files(row_id, metadata)
+                count += 1
+        return count
+    
+    def search(
+        self,
+        query: Optional[str] = None,
+        limit: Optional[int] = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the mirror
+        
+        Free text is matched with FTS5 and ranked by bm25; without a query
+        the newest memories matching the filters are returned. Filters
+        are indexed fields plus since/until bounds on the timestamp.
+        Results use the same shape as Mem0 search results.
+        """
+        clauses, params = [], []
+        for field, value in (filters or {}).items():
+            if field in ("since", "until"):
+                clauses.append(f"COALESCE(m.timestamp, m.created_at) {'>=' if field == 'since' else '<='} ?")
+                params.append(str(value))
+                continue
+            if field not in INDEXED_FIELDS:
+                raise ValueError(f"Unsupported mirror filter: {field}")
+            if field == "file_path":
+                clauses.append("(m.file_path = ? OR m.id IN (SELECT memory_rowid FROM memory_files WHERE file_path = ?))")
+                params.extend([str(value), str(value)])
+            else:
+                clauses.append(f"m.{field} = ?")
+                params.append(str(value))
+        
+        match = self._match_expression(query) if query else None
+        if match:
+            sql = (
+                "SELECT m.*, bm25(memories_fts) AS rank FROM memories_fts "
+                "JOIN memories m ON m.id = memories_fts.rowid "
+                "WHERE memories_fts MATCH ?"
+            )
+            params.insert(0, match)
+            if clauses:
+                sql += " AND " + " AND ".join(clauses)
+            sql += " ORDER BY rank"
+        else:
+            sql = "SELECT m.*, 0.0 AS rank FROM memories m"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += " ORDER BY COALESCE(m.timestamp, m.created_at) DESC"
+        
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit if limit is not None else -1, offset])
+        
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._to_result(row) for row in rows]
+    
+    def delete(self, memory_ids: Iterable[str]) -> int:
+        """Remove memories by Mem0 id; returns how many were mirrored"""
+        rows = [(memory_id,) for memory_id in memory_ids]
+        with self.lock, self.conn:
+            return self.conn.executemany("DELETE FROM memories WHERE memory_id = ?", rows).rowcount
+    
+    def memory_ids(self) -> Set[str]:
+        """Mem0 ids of every mirrored memory that has one"""
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT memory_id FROM memories WHERE memory_id IS NOT NULL")}
+    
+    def get_meta(self, key: str) -> Optional[str]:
+        """Bookkeeping value stored under key, or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM mirror_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key: str, value: str):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO mirror_meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+    
+    def count(self) -> int:
+        """Number of mirrored memories"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+    
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.conn.close()
+    
+    def _upsert(self, row: Dict[str, Any]) -> int:
+        """Insert a row or update the one with the same memory_id; returns its row id"""
+        updates = ", ".join(f"{column} = excluded.{column}" for column in row if column != "memory_id")
+        self.conn.execute(
+            f"INSERT INTO memories ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)}) "
+            f"ON CONFLICT(memory_id) DO UPDATE SET {updates}",
+            list(row.values())
+        )
+        return self.conn.execute("SELECT id FROM memories WHERE memory_id = ?", (row["memory_id"],)).fetchone()[0]
+    
+    def _index_files(self, row_id: int, metadata: Dict[str, Any]):
+        """Index every path of a batched file_activity memory"""
+        # A refreshed memory may list different paths than before, or none
+        self.conn.execute("DELETE FROM memory_files WHERE memory_rowid = ?", (row_id,))
+        file_paths = metadata.get("file_paths")
+        if not isinstance(file_paths, list):
+            return
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO memory_files (memory_rowid, file_path) VALUES (?, ?)",
+            [(row_id, str(file_path)) for file_path in file_paths]
+        )
+    
+    def _row(
+        self,
+        content: str,
+        metadata: Dict[str, Any],
+        memory_id: Optional[str],
+        created_at: Optional[str],
+        origin: str
+    ) -> Dict[str, Any]:
+        """Build a memories row from content and metadata"""
+        row = {
+            "memory_id": memory_id,
+            "content": content.strip(),
+            "created_at": created_at or datetime.now().isoformat(),
+            "metadata": json.dumps(metadata, default=str),
+            "origin": origin
+        }
+        for field in INDEXED_FIELDS:
+            value = metadata.get(field)
+            row[field] = str(value) if value is not None else None
+        return row
+    
+    def _match_expression(self, query: str) -> Optional[str]:
+        """Turn free text into an FTS5 query that matches any of its terms"""
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return None
+        return " OR ".join(f'"{term}"' for term in terms)
+    
+    def _to_result(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a row to the Mem0 search result shape"""
+        return {
+            "id": row["memory_id"],
+            "memory": row["content"],
+            "metadata": json.loads(row["metadata"] or "{}"),
+            "created_at": row["created_at"],
+            # bm25 is lower-is-better; flip it so higher means more relevant
+            "score": -row["rank"] if row["rank"] else 0.0,
+            "source": "local_mirror"
+        }
@@ -3,18 +3,26 @@ MCP Server for Utlyze Mem0 Integration
 Provides memory access to Cursor, VSCode, and other MCP-compatible tools
 """
 
+import time
+
+# Taken before any other import so startup timing includes them
+_STARTED = time.perf_counter()
+
 import os
 import sys
 import json
 import asyncio
 import logging
+import threading
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from mem0_client import UtlyzeMem0Client
+# mem0_client (and the mem0 SDK behind it) is imported on first use so the
+# MCP handshake doesn't wait for it
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import (
@@ -22,20 +30,65 @@ from mcp.types import (
     TextContent,
     ImageContent,
     EmbeddedResource,
-    LoggingLevel
+    LoggingLevel,
+    InitializedNotification
 )
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Log per-phase startup times (imports, handshake, client ready) to stderr
+STARTUP_TIMING = os.getenv("MCP_STARTUP_TIMING", "0") == "1"
+_IMPORTED = time.perf_counter()
+
+
 class UtlyzeMem0MCPServer:
     """MCP Server providing Mem0 memory access"""
     
     def __init__(self):
         self.server = Server("utlyze-mem0")
-        self.mem0_client = UtlyzeMem0Client()
+        self._mem0_client = None
+        self._client_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("MCP_TOOL_WORKERS", "8")),
+            thread_name_prefix="mcp-tool"
+        )
+        self.timings: Dict[str, float] = {"imports_ms": (_IMPORTED - _STARTED) * 1000}
+        if STARTUP_TIMING:
+            logger.info(f"Startup timing: imports_ms={self.timings['imports_ms']:.1f}")
         self._setup_tools()
-        
+        self.server.notification_handlers[InitializedNotification] = self._on_initialized
+    
+    @property
+    def mem0_client(self):
+        """The Mem0 client, built on first use"""
+        if self._mem0_client is None:
+            with self._client_lock:
+                if self._mem0_client is None:
+                    from mem0_client import UtlyzeMem0Client
+                    self._mem0_client = UtlyzeMem0Client()
+                    self._record_timing("client_ready_ms")
+        return self._mem0_client
+    
+    def _record_timing(self, phase: str):
+        """Note how long after process start a startup phase finished"""
+        self.timings[phase] = (time.perf_counter() - _STARTED) * 1000
+        if STARTUP_TIMING:
+            logger.info(f"Startup timing: {phase}={self.timings[phase]:.1f}")
+    
+    def _warm_up(self):
+        """Build the client ahead of the first tool call"""
+        try:
+            self.mem0_client
+        except Exception as e:
+            # The next tool call retries and reports the error to the caller
+            logger.warning(f"Mem0 client warm-up failed: {str(e)}")
+    
+    async def _on_initialized(self, notification: InitializedNotification):
+        """Handshake done: warm the client in the background"""
+        self._record_timing("handshake_ms")
+        asyncio.get_running_loop().run_in_executor(self.executor, self._warm_up)
+    
     def _setup_tools(self):
         """Register available tools"""
         
@@ -64,7 +117,7 @@ class UtlyzeMem0MCPServer:
                         "properties": {
                             "query": {
                                 "type": "string",
-                                "description": "Search query"
+                                "description": "Search query; task:<id>, type:<type>, file:<path>, project:<name> and since:/until: (e.g. since:7d) narrow it exactly"
                             },
                             "limit": {
                                 "type": "integer",
@@ -133,124 +186,16 @@ class UtlyzeMem0MCPServer:
         @self.server.call_tool()
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             try:
-                if name == "get_context":
-                    limit = arguments.get("limit", 10)
-                    context = self.mem0_client.get_current_context(limit=limit)
-                    
-                    if not context:
-                        return [TextContent(
-                            type="text",
-                            text="No memories found in current context."
-                        )]
-                    
-                    # Format context for display
-                    formatted = "🧠 Current Utlyze Context:\n\n"
-                    for i, memory in enumerate(context):
-                        formatted += f"{i+1}. {memory['content'].strip()}\n"
-                        if memory.get('metadata'):
-                            formatted += f"   Type: {memory['metadata'].get('type', 'unknown')}\n"
-                            formatted += f"   Time: {memory['metadata'].get('timestamp', 'unknown')}\n"
-                        formatted += "\n"
-                    
-                    return [TextContent(type="text", text=formatted)]
-                
-                elif name == "search_memory":
-                    query = arguments["query"]
-                    limit = arguments.get("limit", 10)
-                    
-                    results = self.mem0_client.client.search(
-                        query,
-                        user_id="utlyze",
-                        limit=limit
-                    )
-                    
-                    if not results:
-                        return [TextContent(
-                            type="text",
-                            text=f"No memories found matching: {query}"
-                        )]
-                    
-                    formatted = f"🔍 Search Results for '{query}':\n\n"
-                    for i, result in enumerate(results):
-                        formatted += f"{i+1}. {result.get('memory', '').strip()}\n"
-                        formatted += f"   Score: {result.get('score', 0):.2f}\n\n"
-                    
-                    return [TextContent(type="text", text=formatted)]
-                
-                elif name == "add_memory":
-                    content = arguments["content"]
-                    metadata = arguments.get("metadata", {})
-                    metadata["source"] = "mcp_cursor"
-                    metadata["timestamp"] = datetime.now().isoformat()
-                    
-                    # Use messages format for mem0 API
-                    messages = [{"role": "user", "content": content}]
-                    result = self.mem0_client.client.add(
-                        messages,
-                        user_id="utlyze",
-                        metadata=metadata
-                    )
-                    
-                    return [TextContent(
-                        type="text",
-                        text=f"✅ Memory added successfully: {result}"
-                    )]
-                
-                elif name == "get_task_history":
-                    task_id = arguments["task_id"]
-                    memories = self.mem0_client.get_task_context(task_id)
-                    
-                    if not memories:
-                        return [TextContent(
-                            type="text",
-                            text=f"No history found for task: {task_id}"
-                        )]
-                    
-                    formatted = f"📋 Task History for {task_id}:\n\n"
-                    for memory in memories:
-                        formatted += f"- {memory.get('memory', '').strip()}\n"
-                        if memory.get('created_at'):
-                            formatted += f"  Time: {memory['created_at']}\n"
-                        formatted += "\n"
-                    
-                    return [TextContent(type="text", text=formatted)]
-                
-                elif name == "log_activity":
-                    activity = arguments["activity"]
-                    files = arguments.get("files", [])
-                    
-                    memory_content = f"""
-                    Development Activity:
-                    {activity}
-                    Files: {', '.join(files) if files else 'None specified'}
-                    Time: {datetime.now().isoformat()}
-                    Source: Cursor/VSCode
-                    """
-                    
-                    # Use messages format for mem0 API
-                    messages = [{"role": "user", "content": memory_content}]
-                    result = self.mem0_client.client.add(
-                        messages,
-                        user_id="utlyze",
-                        metadata={
-                            "type": "development_activity",
-                            "source": "mcp_cursor",
-                            "files": files,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                    )
-                    
-                    return [TextContent(
-                        type="text",
-                        text=f"✅ Activity logged: {activity}"
-                    )]
-                
-                else:
-                    return [TextContent(
-                        type="text",
-                        text=f"Unknown tool: {name}"
-                    )]
-                    
+                # Mem0 calls block, so run the tool on the executor and keep
+                # the stdio loop free to serve other requests concurrently.
+                # If the client cancels the request, the pending executor
+                # job is cancelled along with this coroutine.
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, self._run_tool, name, arguments)
+            
+            except asyncio.CancelledError:
+                logger.info(f"Tool {name} cancelled by client")
+                raise
             except Exception as e:
                 logger.error(f"Error in tool {name}: {str(e)}")
                 return [TextContent(
@@ -258,15 +203,176 @@ class UtlyzeMem0MCPServer:
                     text=f"Error: {str(e)}"
                 )]
     
+    def _stale_notice(self, memories: List[Dict[str, Any]]) -> str:
+        """Warning line when results were served from cache because Mem0 is failing"""
+        stale = [memory for memory in memories if isinstance(memory, dict) and memory.get("stale")]
+        if not stale:
+            return ""
+        return f"⚠️ Mem0 is unavailable; showing cached results from {stale[0].get('stale_since')}\n\n"
+    
+    def _run_tool(self, name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+        """Execute a tool call (runs on the executor, may block on Mem0)"""
+        if name == "get_context":
+            limit = arguments.get("limit", 10)
+            context = self.mem0_client.get_current_context(limit=limit)
+            
+            if not context:
+                return [TextContent(
+                    type="text",
+                    text="No memories found in current context."
+                )]
+            
+            # Format context for display
+            formatted = self._stale_notice(context) + "🧠 Current Utlyze Context:\n\n"
+            for i, memory in enumerate(context):
+                formatted += f"{i+1}. {memory['content'].strip()}\n"
+                if memory.get('metadata'):
+                    formatted += f"   Type: {memory['metadata'].get('type', 'unknown')}\n"
+                    formatted += f"   Time: {memory['metadata'].get('timestamp', 'unknown')}\n"
+                formatted += "\n"
+            
+            return [TextContent(type="text", text=formatted)]
+        
+        elif name == "search_memory":
+            query = arguments["query"]
+            limit = arguments.get("limit", 10)
+            
+            results = self.mem0_client.search_memories(query, limit=limit)
+            
+            if not results:
+                return [TextContent(
+                    type="text",
+                    text=f"No memories found matching: {query}"
+                )]
+            
+            formatted = self._stale_notice(results) + f"🔍 Search Results for '{query}':\n\n"
+            for i, result in enumerate(results):
+                formatted += f"{i+1}. {result.get('memory', '').strip()}\n"
+                formatted += f"   Score: {result.get('score', 0):.2f}\n\n"
+            
+            return [TextContent(type="text", text=formatted)]
+        
+        elif name == "add_memory":
+            content = arguments["content"]
+            metadata = arguments.get("metadata", {})
+            metadata["source"] = "mcp_cursor"
+            metadata["timestamp"] = datetime.now().isoformat()
+            
+            result = self.mem0_client.add_memory(content, metadata)
+            
+            if isinstance(result, dict) and result.get("status") == "queued":
+                return [TextContent(
+                    type="text",
+                    text="✅ Memory queued for storage"
+                )]
+            
+            return [TextContent(
+                type="text",
+                text=f"✅ Memory added successfully: {result}"
+            )]
+        
+        elif name == "get_task_history":
+            task_id = arguments["task_id"]
+            memories = self.mem0_client.get_task_context(task_id)
+            
+            if not memories:
+                return [TextContent(
+                    type="text",
+                    text=f"No history found for task: {task_id}"
+                )]
+            
+            formatted = self._stale_notice(memories) + f"📋 Task History for {task_id}:\n\n"
+            for memory in memories:
+                formatted += f"- {memory.get('memory', '').strip()}\n"
+                if memory.get('created_at'):
+                    formatted += f"  Time: {memory['created_at']}\n"
+                formatted += "\n"
+            
+            return [TextContent(type="text", text=formatted)]
+        
+        elif name == "log_activity":
+            activity = arguments["activity"]
+            files = arguments.get("files", [])
+            
+            memory_content = f"""
+            Development Activity:
+            {activity}
+            Files: {', '.join(files) if files else 'None specified'}
+            Time: {datetime.now().isoformat()}
+            Source: Cursor/VSCode
+            """
+            
+            self.mem0_client.add_memory(
+                memory_content,
+                {
+                    "type": "development_activity",
+                    "source": "mcp_cursor",
+                    "files": files,
+                    "timestamp": datetime.now().isoformat()
+                }
+            )
+            
+            return [TextContent(
+                type="text",
+                text=f"✅ Activity logged: {activity}"
+            )]
+        
+        else:
+            return [TextContent(
+                type="text",
+                text=f"Unknown tool: {name}"
+            )]
+    
     async def run(self):
         """Run the MCP server"""
-        async with stdio_server() as (read_stream, write_stream):
-            logger.info("Utlyze Mem0 MCP Server started")
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options()
-            )
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                logger.info("Utlyze Mem0 MCP Server started")
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.server.create_initialization_options()
+                )
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            if self._mem0_client is not None:
+                self._mem0_client.close()
+
+
+async def measure_startup(runs: int = 5) -> Dict[str, Any]:
+    """
+    Start this server as an MCP client would and time the cold start
+    
+    Each run spawns a fresh process, completes the handshake and lists
+    tools; the server side logs its own phase timings to stderr.
+    """
+    from mcp import ClientSession
+    from mcp.client.stdio import stdio_client, StdioServerParameters
+    
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=[os.path.abspath(__file__)],
+        env={**os.environ, "MCP_STARTUP_TIMING": "1"}
+    )
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        async with stdio_client(params) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                initialized = time.perf_counter()
+                await session.list_tools()
+                listed = time.perf_counter()
+        samples.append({
+            "initialize_ms": round((initialized - started) * 1000, 1),
+            "list_tools_ms": round((listed - started) * 1000, 1)
+        })
+    
+    summary = {"runs": samples}
+    for key in ("initialize_ms", "list_tools_ms"):
+        values = sorted(sample[key] for sample in samples)
+        summary[f"median_{key}"] = values[len(values) // 2]
+    return summary
 
 
 async def main():
@@ -276,4 +382,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if "--measure-startup" in sys.argv:
+        print(json.dumps(asyncio.run(measure_startup()), indent=2))
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -4,30 +4,1458 @@ Handles all interactions with Mem0 cloud memory service
 """
 
 import os
+import re
 import json
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import time
+import base64
+import hashlib
+import fcntl
+import atexit
+import threading
+import importlib.util
+from collections import deque, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Callable, Iterable, Tuple
+import httpx
 from mem0 import MemoryClient
+from local_mirror import LocalMemoryMirror
+from outbox import Outbox
+from rate_limiter import RateLimiter, RateLimitedTransport
+from retention import RetentionEngine, load_policies
+from metrics import REGISTRY
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MEM0_LATENCY = REGISTRY.histogram(
+    "mem0_operation_duration_seconds", "Latency of Mem0 API calls", ("operation",)
+)
+MEM0_IN_FLIGHT = REGISTRY.gauge(
+    "mem0_operations_in_flight", "Mem0 API calls currently in progress", ("operation",)
+)
+MEM0_ERRORS = REGISTRY.counter(
+    "mem0_operation_errors_total", "Mem0 API calls that raised", ("operation", "error")
+)
+
+
+# One pooled HTTP client per (host, api key), shared by every client in the process
+_http_clients: Dict[Tuple[str, str], httpx.Client] = {}
+_http_clients_lock = threading.Lock()
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Process-wide limiter for Mem0 requests
+    
+    MEM0_RATE_LIMIT is the plan quota in requests per second; without it
+    requests are only slowed down after Mem0 answers 429. Unless
+    MEM0_RATE_LIMIT_STATE=0, once Mem0 throttles the bucket moves to a
+    state file so the bridge, MCP server, monitor and shell helpers
+    back off on one budget.
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        quota = float(os.getenv("MEM0_RATE_LIMIT", "0"))
+        state = os.getenv("MEM0_RATE_LIMIT_STATE", "1")
+        _rate_limiter = RateLimiter(
+            quota if quota > 0 else None,
+            burst=float(os.getenv("MEM0_RATE_LIMIT_BURST", str(quota) if quota > 0 else "10")),
+            min_rate=float(os.getenv("MEM0_RATE_LIMIT_MIN", "0.5")),
+            path=None if state == "0" else state_path("ratelimit.json") if state == "1" else os.path.expanduser(state)
+        )
+        REGISTRY.gauge(
+            "mem0_rate_limit_rate", "Current Mem0 request rate allowed by the limiter (0 while not pacing)"
+        ).set_function(lambda: _rate_limiter.current_rate() or 0.0)
+        REGISTRY.counter(
+            "mem0_rate_limited_total", "Mem0 responses that were 429 Too Many Requests"
+        ).set_function(lambda: _rate_limiter.stats["throttled"])
+        REGISTRY.counter(
+            "mem0_rate_limit_wait_seconds_total", "Time spent waiting for rate limiter tokens"
+        ).set_function(lambda: _rate_limiter.stats["waited"])
+    return _rate_limiter
+
+
+def get_http_client(host: str, api_key: str) -> httpx.Client:
+    """
+    Shared keep-alive HTTP client for Mem0 requests
+    
+    Pool sizes and timeouts come from MEM0_HTTP_* settings; HTTP/2 is
+    used when the h2 package is installed unless MEM0_HTTP2=0.
+    """
+    key = (host, api_key)
+    with _http_clients_lock:
+        client = _http_clients.get(key)
+        if client is None or client.is_closed:
+            http2 = os.getenv("MEM0_HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+            transport = httpx.HTTPTransport(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("MEM0_HTTP_MAX_CONNECTIONS", "32")),
+                    max_keepalive_connections=int(os.getenv("MEM0_HTTP_MAX_KEEPALIVE", "16")),
+                    keepalive_expiry=float(os.getenv("MEM0_HTTP_KEEPALIVE_EXPIRY", "120"))
+                )
+            )
+            # Every SDK call goes through this transport, so this is the one
+            # place that paces requests and absorbs 429s
+            transport = RateLimitedTransport(
+                transport, get_rate_limiter(), retries=int(os.getenv("MEM0_RATE_LIMIT_RETRIES", "3"))
+            )
+            client = httpx.Client(
+                transport=transport,
+                timeout=httpx.Timeout(
+                    float(os.getenv("MEM0_HTTP_TIMEOUT", "30")),
+                    connect=float(os.getenv("MEM0_HTTP_CONNECT_TIMEOUT", "5"))
+                )
+            )
+            _http_clients[key] = client
+            logger.info(f"Opened pooled Mem0 connection to {host} ({'HTTP/2' if http2 else 'HTTP/1.1'})")
+        return client
+
+
+def close_http_clients():
+    """Close every pooled HTTP client"""
+    with _http_clients_lock:
+        for client in _http_clients.values():
+            client.close()
+        _http_clients.clear()
+
+
+atexit.register(close_http_clients)
+
+
+def state_path(name: str) -> str:
+    """Path of a file in the local Utlyze state directory"""
+    state_dir = os.path.expanduser(os.getenv("UTLYZE_STATE_DIR", "~/.utlyze"))
+    os.makedirs(state_dir, exist_ok=True)
+    return os.path.join(state_dir, name)
+
+
+class WriteBehindQueue:
+    """Buffers memory writes and flushes them to Mem0 in batches"""
+    
+    def __init__(
+        self,
+        send: Callable[[Dict[str, Any]], Any],
+        max_batch: int = 20,
+        max_age: float = 0.5,
+        max_workers: int = 4,
+        max_pending: int = 10000
+    ):
+        """
+        Initialize the write-behind queue
+        
+        Args:
+            send: Callable that performs a single Mem0 write
+            max_batch: Flush as soon as this many writes are buffered
+            max_age: Flush once the oldest buffered write is this old (seconds)
+            max_workers: Concurrent Mem0 calls used to drain a batch
+            max_pending: Buffered writes allowed before callers are throttled
+        """
+        self.send = send
+        self.max_batch = max_batch
+        self.max_age = max_age
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.in_flight = 0
+        self.flush_requested = False
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "batches": 0}
+        self.condition = threading.Condition()
+        self.max_workers = max(1, max_workers)
+        self.running = True
+        self.thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self.thread.start()
+    
+    def put(self, item: Dict[str, Any]) -> Future:
+        """Buffer a write and return a future for its Mem0 result"""
+        future = Future()
+        with self.condition:
+            # Apply backpressure instead of growing without bound
+            while self.running and len(self.pending) >= self.max_pending:
+                self.condition.wait(timeout=self.max_age)
+            if not self.running:
+                raise RuntimeError("Write-behind queue is closed")
+            
+            self.pending.append((time.monotonic(), item, future))
+            self.stats["queued"] += 1
+            # Wake the flusher for a full batch, or to start the age timer
+            # when an idle queue gets its first write
+            if len(self.pending) == 1 or len(self.pending) >= self.max_batch:
+                self.condition.notify_all()
+        return future
+    
+    def depth(self) -> int:
+        """Number of writes buffered or in flight"""
+        with self.condition:
+            return len(self.pending) + self.in_flight
+    
+    def _take_batch(self) -> List[Any]:
+        """Wait until a batch is due and remove it from the buffer"""
+        with self.condition:
+            while self.running:
+                if len(self.pending) >= self.max_batch or (self.pending and self.flush_requested):
+                    break
+                if self.pending:
+                    age = time.monotonic() - self.pending[0][0]
+                    if age >= self.max_age:
+                        break
+                    self.condition.wait(timeout=self.max_age - age)
+                else:
+                    self.condition.wait()
+            
+            batch = [self.pending.popleft() for _ in range(min(self.max_batch, len(self.pending)))]
+            if not self.pending:
+                self.flush_requested = False
+            self.in_flight += len(batch)
+            self.stats["batches"] += 1 if batch else 0
+            self.condition.notify_all()
+            return batch
+    
+    def _flush_loop(self):
+        """Drain batches until the queue is closed and empty"""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if not self.running:
+                    return
+                continue
+            self._send_batch(batch)
+    
+    def _send_batch(self, batch: List[Any]):
+        """Send a batch concurrently and resolve the callers' futures"""
+        # The Mem0 add API takes one memory per call, so a batch is
+        # drained by a few short-lived workers instead of one request.
+        # Plain threads are used because executors refuse work once the
+        # interpreter starts shutting down, which is when close() flushes.
+        lanes = [batch[i::self.max_workers] for i in range(min(self.max_workers, len(batch)))]
+        workers = [threading.Thread(target=self._send_lane, args=(lane,), daemon=True) for lane in lanes]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    
+    def _send_lane(self, lane: List[Any]):
+        """Send one worker's share of a batch"""
+        for _, item, future in lane:
+            try:
+                future.set_result(self.send(item))
+                self._record("sent")
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {str(e)}")
+                future.set_exception(e)
+                self._record("failed")
+    
+    def _record(self, outcome: str):
+        """Update counters once a buffered write has settled"""
+        with self.condition:
+            self.stats[outcome] += 1
+            self.in_flight -= 1
+            self.condition.notify_all()
+    
+    def request_flush(self):
+        """Have the flusher send buffered writes now without waiting for them"""
+        with self.condition:
+            if self.pending:
+                self.flush_requested = True
+                self.condition.notify_all()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every buffered write has been sent"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.pending or self.in_flight:
+                # Make the flusher pick up partial batches right away
+                if self.pending:
+                    self.flush_requested = True
+                    self.condition.notify_all()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(timeout=remaining if remaining is not None else self.max_age)
+        return True
+    
+    def close(self, timeout: Optional[float] = 10.0):
+        """Flush outstanding writes and stop the flusher"""
+        if not self.running:
+            return
+        self.flush(timeout=timeout)
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join(timeout=timeout)
+
+
+class ReadCache:
+    """Bounded LRU cache with TTL for Mem0 read results"""
+    
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0):
+        """
+        Initialize the read cache
+        
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self.lock = threading.Lock()
+    
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """Return (hit, value) for a key, dropping it if expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry["stored_at"] > self.ttl:
+                if entry is not None:
+                    del self.entries[key]
+                self.stats["misses"] += 1
+                return False, None
+            
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return True, list(entry["value"])
+    
+    def begin_read(self) -> int:
+        """Snapshot the invalidation generation before fetching from Mem0"""
+        with self.lock:
+            return self.generation
+    
+    def set(self, key: Tuple, value: List[Any], tags: Iterable[str], generation: int):
+        """Store a read result tagged for invalidation"""
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            # A write landed while this read was in flight, so the result
+            # may already be stale; don't cache it
+            if generation != self.generation:
+                return
+            
+            self.entries[key] = {"value": list(value), "tags": set(tags), "stored_at": time.monotonic()}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+    
+    def invalidate(self, tags: Iterable[str]):
+        """Drop every entry carrying any of the given tags"""
+        tags = set(tags)
+        with self.lock:
+            self.generation += 1
+            stale = [key for key, entry in self.entries.items() if entry["tags"] & tags]
+            for key in stale:
+                del self.entries[key]
+            self.stats["invalidations"] += len(stale)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self.entries),
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0
+            }
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Mem0 while the circuit breaker is open"""
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """HTTP status behind a Mem0 SDK or httpx error (None for network errors)"""
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "status_code", None):
+        return response.status_code
+    status = (getattr(error, "debug_info", None) or {}).get("status_code")
+    return int(status) if status else None
+
+
+class CircuitBreaker:
+    """
+    Stops calling Mem0 after repeated failures or slow calls
+    
+    Opens after failure_threshold consecutive failures (calls slower than
+    slow_call count as failures), rejects calls for reset_timeout seconds,
+    then lets a single probe through; its outcome closes or reopens it.
+    """
+    
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, slow_call: float = 2.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.slow_call = slow_call
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.stats = {"opened": 0, "rejected": 0}
+        self.lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """Whether a call may go to Mem0 now"""
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            self.stats["rejected"] += 1
+            return False
+    
+    def record(self, duration: Optional[float]):
+        """Record a call's outcome; None means it failed"""
+        failed = duration is None or duration > self.slow_call
+        with self.lock:
+            self.probing = False
+            if not failed:
+                if self.state != self.CLOSED:
+                    logger.info("Mem0 circuit closed, provider recovered")
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.stats["opened"] += 1
+                    logger.warning(f"Mem0 circuit opened after {self.failures} failed or slow calls")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+    
+    def state_code(self) -> int:
+        """0 closed, 1 half open, 2 open (for metrics)"""
+        return (self.CLOSED, self.HALF_OPEN, self.OPEN).index(self.state)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {**self.stats, "state": self.state, "failures": self.failures}
+
+
+class LastGoodResults:
+    """Most recent successful result per read, kept to serve while Mem0 is failing"""
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.served = 0
+        self.lock = threading.Lock()
+    
+    def put(self, key: Tuple, value: Any):
+        with self.lock:
+            self.entries[key] = (datetime.now().isoformat(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def get(self, key: Tuple) -> Optional[Tuple[str, Any]]:
+        """(stored at, value) for a key, if it was ever read successfully"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.served += 1
+            return entry
+
+
+class DedupeIndex:
+    """Remembers the last content hash per memory key to skip no-op writes"""
+    
+    # Memory types whose repeats carry no new information
+    DEDUPE_TYPES = {"task_update", "terminal_activity", "development_activity", "file_activity"}
+    
+    # Lines that only change because they carry the current time
+    VOLATILE_LINES = re.compile(
+        r"^\s*(Last Updated|Time|Last Modified|Completion Time|Sync Time):.*$",
+        re.MULTILINE
+    )
+    VOLATILE_METADATA = {"timestamp", "idempotency_key"}
+    
+    def __init__(self, path: Optional[str] = None, max_keys: int = 10000, save_interval: float = 30.0):
+        """
+        Initialize the index
+        
+        Args:
+            path: JSON file the seen hashes are persisted to (None keeps them in memory)
+            max_keys: Keys remembered before the least recently written is dropped
+            save_interval: Min seconds between background saves
+        """
+        self.path = path
+        self.max_keys = max_keys
+        self.save_interval = save_interval
+        self.hashes = OrderedDict()
+        self.stats = {"suppressed": 0, "by_type": {}}
+        self.lock = threading.Lock()
+        # Keys recorded since the last save; they win over the file on merge
+        self.changed = set()
+        self.saved_at = time.monotonic()
+        if path:
+            self.hashes.update(self._read())
+            while len(self.hashes) > self.max_keys:
+                self.hashes.popitem(last=False)
+    
+    def _read(self) -> Dict[str, str]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def key_for(self, metadata: Dict[str, Any]) -> Optional[str]:
+        """Identity of the thing a memory describes, or None if not deduplicated"""
+        memory_type = metadata.get("type")
+        if memory_type not in self.DEDUPE_TYPES:
+            return None
+        subject = metadata.get("task_id") or metadata.get("cwd") or metadata.get("project") or ""
+        target = metadata.get("file_path") or ""
+        if not target and metadata.get("file_paths"):
+            # Batched file_activity: each chunk of a task's files has its own key
+            target = f"batch:{metadata.get('file_batch', metadata['file_paths'][0])}"
+        return f"{memory_type}|{subject}|{target}"
+    
+    def digest(self, content: str, metadata: Dict[str, Any]) -> str:
+        """Hash of normalized content plus the non-volatile metadata"""
+        normalized = " ".join(self.VOLATILE_LINES.sub("", content).split())
+        stable = {k: v for k, v in metadata.items() if k not in self.VOLATILE_METADATA}
+        payload = normalized + "\n" + json.dumps(stable, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def is_duplicate(self, content: str, metadata: Dict[str, Any]) -> bool:
+        """Whether the write would repeat the last one stored for its key"""
+        key = self.key_for(metadata)
+        if key is None:
+            return False
+        
+        digest = self.digest(content, metadata)
+        with self.lock:
+            if self.hashes.get(key) != digest:
+                return False
+            self.hashes.move_to_end(key)
+            self.stats["suppressed"] += 1
+            by_type = self.stats["by_type"]
+            by_type[metadata["type"]] = by_type.get(metadata["type"], 0) + 1
+            return True
+    
+    def record(self, content: str, metadata: Dict[str, Any]):
+        """Remember a write once Mem0 has stored it"""
+        key = self.key_for(metadata)
+        if key is None:
+            return
+        
+        digest = self.digest(content, metadata)
+        with self.lock:
+            self.hashes[key] = digest
+            self.hashes.move_to_end(key)
+            while len(self.hashes) > self.max_keys:
+                self.hashes.popitem(last=False)
+            self.changed.add(key)
+            due = time.monotonic() - self.saved_at >= self.save_interval
+        if due:
+            self.save()
+    
+    def save(self):
+        """Persist the seen hashes, merged with those other processes saved meanwhile"""
+        if not self.path:
+            return
+        with self.lock:
+            if not self.changed:
+                return
+            changed = {key: self.hashes[key] for key in self.changed if key in self.hashes}
+            self.changed = set()
+            self.saved_at = time.monotonic()
+        
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            merged = OrderedDict(self._read())
+            for key, digest in changed.items():
+                merged[key] = digest
+                merged.move_to_end(key)
+            while len(merged) > self.max_keys:
+                merged.popitem(last=False)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(merged, f)
+            os.replace(tmp_path, self.path)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        
+        with self.lock:
+            # Adopt what other processes stored, except keys recorded here since
+            for key, digest in merged.items():
+                if key not in self.changed:
+                    self.hashes[key] = digest
+            while len(self.hashes) > self.max_keys:
+                self.hashes.popitem(last=False)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {**self.stats, "by_type": dict(self.stats["by_type"]), "keys": len(self.hashes)}
+
+
+class TaskSnapshot:
+    """Persisted per-task hashes of the last Taskmaster state synced to Mem0"""
+    
+    # Task fields that end up in the stored task memory, and the values the
+    # bridge's TaskUpdate model gives the optional ones
+    HASHED_FIELDS = ("name", "status", "progress", "description", "agent", "affected_files")
+    DEFAULTS = {"description": "", "agent": "unassigned", "affected_files": []}
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the snapshot
+        
+        Args:
+            path: JSON file the task hashes are persisted to (None keeps them in memory)
+        """
+        self.path = path
+        self.hashes: Dict[str, str] = {}
+        # Only a snapshot changed here is saved, so processes that never sync
+        # don't overwrite a newer one with the copy they loaded
+        self.changed = False
+        self.lock = threading.Lock()
+        if path:
+            try:
+                with open(path) as f:
+                    self.hashes.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+    
+    @classmethod
+    def canonical(cls, task: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Hashed fields of a task with optional ones defaulted
+        
+        Raw sync payloads and validated webhook/ingest tasks hash the same
+        whether or not they spell out the defaults.
+        """
+        fields = {}
+        for field in cls.HASHED_FIELDS:
+            value = task.get(field)
+            fields[field] = cls.DEFAULTS.get(field) if value is None else value
+        return fields
+    
+    def digest(self, task: Dict[str, Any]) -> str:
+        """Short hash of the fields that affect a task's memory"""
+        fields = self.canonical(task)
+        return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    
+    def diff(self, tasks: List[Dict[str, Any]], full: bool = False) -> Dict[str, List]:
+        """
+        Split a task list into added, changed and unchanged tasks
+        
+        Only when full=True, meaning the list is every task Taskmaster
+        has, are known tasks missing from it reported as removed.
+        """
+        with self.lock:
+            known = dict(self.hashes)
+        diff = {"added": [], "changed": [], "unchanged": [], "removed": []}
+        seen = set()
+        for task in tasks:
+            task_id = str(task.get("id"))
+            seen.add(task_id)
+            previous = known.get(task_id)
+            if previous is None:
+                diff["added"].append(task)
+            elif previous != self.digest(task):
+                diff["changed"].append(task)
+            else:
+                diff["unchanged"].append(task)
+        if full:
+            diff["removed"] = sorted(set(known) - seen)
+        return diff
+    
+    def is_current(self, task: Dict[str, Any]) -> bool:
+        """Whether the task matches what was last synced"""
+        with self.lock:
+            return self.hashes.get(str(task.get("id"))) == self.digest(task)
+    
+    def record(self, task: Dict[str, Any]):
+        with self.lock:
+            self.hashes[str(task.get("id"))] = self.digest(task)
+            self.changed = True
+    
+    def forget(self, task_id: str):
+        with self.lock:
+            self.hashes.pop(task_id, None)
+            self.changed = True
+    
+    def save(self):
+        """Atomically write the snapshot to disk if it changed"""
+        if not self.path:
+            return
+        with self.lock:
+            if not self.changed:
+                return
+            snapshot = dict(self.hashes)
+            self.changed = False
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.changed = True
+            logger.warning(f"Could not save Taskmaster snapshot: {str(e)}")
+    
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+
+class InstrumentedMemoryClient:
+    """Wraps MemoryClient so every API call is timed and counted"""
+    
+    def __init__(self, client: MemoryClient):
+        self._client = client
+    
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        
+        def instrumented(*args, **kwargs):
+            MEM0_IN_FLIGHT.inc(operation=name)
+            started = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            except Exception as e:
+                MEM0_ERRORS.inc(operation=name, error=type(e).__name__)
+                raise
+            finally:
+                MEM0_IN_FLIGHT.dec(operation=name)
+                MEM0_LATENCY.observe(time.perf_counter() - started, operation=name)
+        
+        return instrumented
+
+
+# Structured terms recognised in queries, e.g. "task:42 type:task_update since:7d login";
+# anything else is free text for semantic search
+QUERY_FIELDS = {
+    "task": "task_id",
+    "task_id": "task_id",
+    "type": "type",
+    "file": "file_path",
+    "file_path": "file_path",
+    "project": "project",
+    "since": "since",
+    "until": "until"
+}
+QUERY_TERM = re.compile(r'\b(\w+):("[^"]*"|\S+)')
+RELATIVE_TIME = re.compile(r"^(\d+)([mhdw])$")
+
+# Incremental mirror pulls re-list this much before the previous pull
+MIRROR_PULL_OVERLAP = timedelta(minutes=5)
+
 
 class UtlyzeMem0Client:
     """Centralized Mem0 client for Utlyze project memory management"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, write_behind: Optional[bool] = None):
         self.api_key = api_key or os.getenv("MEM0_API_KEY")
         if not self.api_key:
             raise ValueError("MEM0_API_KEY not found in environment")
         
-        self.client = MemoryClient(api_key=self.api_key)
+        # MEM0_HOST points the client at a self-hosted or fake Mem0 API
+        host = os.getenv("MEM0_HOST") or "https://api.mem0.ai"
+        self.http_client = get_http_client(host, self.api_key)
+        self.client = InstrumentedMemoryClient(
+            MemoryClient(api_key=self.api_key, host=host, client=self.http_client)
+        )
         self.user_id = "utlyze"
+        
+        # Buffer writes so callers don't wait on the cloud round trip
+        if write_behind is None:
+            write_behind = os.getenv("MEM0_WRITE_BEHIND", "1") != "0"
+        self.write_queue = None
+        if write_behind:
+            self.write_queue = WriteBehindQueue(
+                self._send_memory,
+                max_batch=int(os.getenv("MEM0_WRITE_BATCH_SIZE", "20")),
+                max_age=float(os.getenv("MEM0_WRITE_FLUSH_INTERVAL", "0.5")),
+                max_workers=int(os.getenv("MEM0_WRITE_WORKERS", "4"))
+            )
+            atexit.register(self.close)
+        
+        # Cache repeated context/history reads; writes invalidate entries
+        self.cache = ReadCache(
+            max_entries=int(os.getenv("MEM0_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("MEM0_CACHE_TTL", "30"))
+        )
+        
+        # Interactive reads get a hard deadline and stop hitting Mem0 while
+        # it is failing; the last good result is served, marked stale
+        self.deadlines = {
+            "search": float(os.getenv("MEM0_SEARCH_DEADLINE", "3")),
+            "get_all": float(os.getenv("MEM0_LIST_DEADLINE", "5"))
+        }
+        self.read_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("MEM0_READ_WORKERS", "8")), thread_name_prefix="mem0-read"
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("MEM0_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("MEM0_BREAKER_RESET", "30")),
+            slow_call=float(os.getenv("MEM0_BREAKER_SLOW_CALL", "2"))
+        )
+        self.last_good = LastGoodResults(max_entries=int(os.getenv("MEM0_CACHE_SIZE", "256")))
+        self.query_stats = {"list": 0, "search": 0}
+        
+        # Max concurrent Mem0 writes during a full Taskmaster sync
+        self.sync_concurrency = int(os.getenv("MEM0_SYNC_CONCURRENCY", "8"))
+        
+        # Optional SQLite mirror answering searches locally or when Mem0 is down
+        self.mirror = None
+        self.mirror_mode = os.getenv("MEM0_MIRROR_MODE", "fallback")
+        self.mirror_stats = {"local_hits": 0, "fallbacks": 0, "pulled": 0, "dropped": 0, "last_pull": None}
+        self.mirror_reconcile_interval = float(os.getenv("MEM0_MIRROR_RECONCILE_INTERVAL", "86400"))
+        self._stop = threading.Event()
+        mirror_path = os.getenv("MEM0_LOCAL_MIRROR", "")
+        if mirror_path and mirror_path != "0":
+            self.mirror = LocalMemoryMirror(
+                state_path("memories.db") if mirror_path == "1" else os.path.expanduser(mirror_path)
+            )
+            pull_interval = float(os.getenv("MEM0_MIRROR_PULL_INTERVAL", "300"))
+            if pull_interval > 0:
+                threading.Thread(target=self._mirror_pull_loop, args=(pull_interval,), daemon=True).start()
+        
+        # Skip writes that would repeat the last memory for the same task/directory
+        self.dedupe = None
+        if os.getenv("MEM0_DEDUPE", "1") != "0":
+            self.dedupe = DedupeIndex(
+                state_path("dedupe.json"),
+                max_keys=int(os.getenv("MEM0_DEDUPE_MAX_KEYS", "10000"))
+            )
+        
+        # Durable journal of pending writes, replayed if Mem0 was unreachable
+        self.outbox = None
+        self.outbox_in_flight = set()
+        outbox_path = os.getenv("MEM0_OUTBOX", "1")
+        if outbox_path != "0":
+            self.outbox = Outbox(state_path("outbox.jsonl") if outbox_path == "1" else os.path.expanduser(outbox_path))
+            self.replay_grace = float(os.getenv("MEM0_OUTBOX_REPLAY_GRACE", "60"))
+            self.replay_max_attempts = int(os.getenv("MEM0_OUTBOX_MAX_ATTEMPTS", "10"))
+            self.replay_max_backoff = float(os.getenv("MEM0_OUTBOX_MAX_BACKOFF", "300"))
+            # Failed replays per journal key: attempts so far and next try time
+            self.replay_attempts: Dict[str, Dict[str, float]] = {}
+            threading.Thread(target=self._replay_loop, daemon=True).start()
+        
+        # Last synced state per task, so full syncs only write what changed
+        self.task_snapshot = TaskSnapshot(
+            os.getenv("MEM0_SYNC_SNAPSHOT") or state_path("taskmaster-snapshot.json")
+        )
+        self.sync_lock = threading.Lock()
+        
+        self._register_metrics()
         logger.info("Mem0 client initialized for Utlyze")
     
-    def add_task_update(self, task_data: Dict[str, Any]) -> str:
-        """Add a task update to memory"""
+    def _register_metrics(self):
+        """Expose client internals as scrape-time metrics"""
+        def cache_stats(name: str) -> Callable[[], float]:
+            return lambda: self.cache.get_stats()[name]
+        
+        REGISTRY.counter("mem0_cache_hits_total", "Read cache hits").set_function(cache_stats("hits"))
+        REGISTRY.counter("mem0_cache_misses_total", "Read cache misses").set_function(cache_stats("misses"))
+        if self.write_queue is not None:
+            REGISTRY.gauge(
+                "mem0_write_queue_depth", "Writes buffered or in flight in the write-behind queue"
+            ).set_function(self.write_queue.depth)
+            REGISTRY.counter(
+                "mem0_write_queue_failed_total", "Write-behind sends that failed"
+            ).set_function(lambda: self.write_queue.stats["failed"])
+        if self.dedupe is not None:
+            REGISTRY.counter(
+                "mem0_dedupe_suppressed_total", "Writes suppressed as unchanged"
+            ).set_function(lambda: self.dedupe.stats["suppressed"])
+        if self.outbox is not None:
+            REGISTRY.counter(
+                "mem0_outbox_replayed_total", "Journaled writes replayed to Mem0"
+            ).set_function(lambda: self.outbox.stats["replayed"])
+        REGISTRY.gauge(
+            "mem0_circuit_state", "Mem0 circuit breaker state (0 closed, 1 half open, 2 open)"
+        ).set_function(self.breaker.state_code)
+        REGISTRY.counter(
+            "mem0_stale_reads_total", "Reads answered with a stale result while Mem0 was failing"
+        ).set_function(lambda: self.last_good.served)
+    
+    def add_memory(self, content: str, metadata: Dict[str, Any], wait: bool = False, force: bool = False) -> Any:
+        """
+        Store a memory in Mem0
+        
+        With write-behind enabled this returns immediately with an ack of
+        the form {"status": "queued", "future": Future}; pass wait=True to
+        perform the write inline and get the Mem0 result back. Writes that
+        would only repeat the previous memory for the same task or
+        directory return {"status": "duplicate"} without touching Mem0,
+        unless force=True.
+        """
+        if not force and self.dedupe is not None and self.dedupe.is_duplicate(content, metadata):
+            logger.debug(f"Suppressed unchanged {metadata.get('type')} memory")
+            return {"status": "duplicate"}
+        
+        # Use messages format for mem0 API
+        item = {
+            "messages": [{"role": "user", "content": content}],
+            "metadata": metadata
+        }
+        if self.outbox is not None:
+            # Journal first so the write survives crashes and Mem0 outages
+            item["outbox_key"] = self.outbox.append(item)
+            # Held until sent so replay never resends a write still queued here
+            self.outbox_in_flight.add(item["outbox_key"])
+        if self.mirror is not None:
+            # Mirror right away so local search sees the write while it's queued
+            item["mirror_row"] = self._mirror_call(self.mirror.add, content, metadata)
+        if self.write_queue is None or wait:
+            return self._send_memory(item)
+        
+        future = self.write_queue.put(item)
+        self.cache.invalidate(self._invalidation_tags(metadata))
+        return {"status": "queued", "future": future}
+    
+    def _send_memory(self, item: Dict[str, Any]) -> Any:
+        """Perform a single Mem0 add call"""
+        metadata = item["metadata"]
+        if item.get("outbox_key"):
+            # Lets a replayed write be told apart from the original
+            metadata = {**metadata, "idempotency_key": item["outbox_key"]}
+        try:
+            result = self.client.add(item["messages"], user_id=self.user_id, metadata=metadata)
+        finally:
+            # A failed write is left in the journal for replay to pick up
+            self.outbox_in_flight.discard(item.get("outbox_key"))
+        if item.get("outbox_key"):
+            self.outbox.ack(item["outbox_key"])
+        if self.dedupe is not None:
+            # Only a stored write makes later identical ones redundant
+            self.dedupe.record(item["messages"][0]["content"], item["metadata"])
+        self.cache.invalidate(self._invalidation_tags(item["metadata"]))
+        if item.get("mirror_row"):
+            memory_ids = self._memory_ids(result)
+            if memory_ids:
+                self._mirror_call(self.mirror.attach_memory_id, item["mirror_row"], memory_ids[0])
+        return result
+    
+    def _replay_loop(self):
+        """Resend journaled writes that never reached Mem0, backing off on failure"""
+        backoff = 1.0
+        max_backoff = self.replay_max_backoff
+        compact_bytes = int(os.getenv("MEM0_OUTBOX_COMPACT_BYTES", str(256 * 1024)))
+        acked_at_compaction = self.outbox.stats["acked"]
+        compacted_size = 0
+        while not self._stop.wait(backoff):
+            try:
+                self.replay_outbox()
+                # Every ack leaves a settled put behind. Acks from this process
+                # are counted; growth from other processes sharing the journal
+                # shows in its size, measured against what the last compaction
+                # kept so a backlog of unsent writes isn't rewritten every tick
+                acked = self.outbox.stats["acked"] - acked_at_compaction
+                if acked >= 500 or self.outbox.size() >= max(compact_bytes, 2 * compacted_size):
+                    self.outbox.compact()
+                    acked_at_compaction = self.outbox.stats["acked"]
+                    compacted_size = self.outbox.size()
+                backoff = min(5.0, max_backoff)
+            except Exception as e:
+                backoff = min(backoff * 2, max_backoff)
+                logger.warning(f"Outbox replay failed, retrying in {backoff:.0f}s: {str(e)}")
+    
+    def replay_outbox(self) -> int:
+        """
+        Send pending journaled writes; returns how many were stored
+        
+        Each write is retried on its own backoff, so a write Mem0 keeps
+        failing doesn't hold up the ones behind it. Writes rejected as
+        invalid (4xx other than 401/403/408/429), or still failing after
+        MEM0_OUTBOX_MAX_ATTEMPTS tries, go to the dead-letter file. A
+        network error, 401/403 or overload (429, 502-504) concerns every
+        write and ends the pass.
+        """
+        replayed = 0
+        with self.outbox.replay_lock() as acquired:
+            if not acquired:
+                # Another local process is already draining the journal
+                return 0
+            
+            # Skip writes still queued in this process, and recent ones that
+            # are most likely still in another process's write queue
+            pending = self.outbox.pending(min_age=self.replay_grace)
+            keys = {record["key"] for record in pending}
+            for key in list(self.replay_attempts):
+                if key not in keys:
+                    # Acked or dead-lettered elsewhere
+                    del self.replay_attempts[key]
+            
+            for record in pending:
+                key = record["key"]
+                attempt = self.replay_attempts.get(key)
+                if key in self.outbox_in_flight or (attempt and time.monotonic() < attempt["next_try"]):
+                    continue
+                try:
+                    self._send_memory({**record["item"], "outbox_key": key})
+                except Exception as e:
+                    status = error_status(e)
+                    if status is None or status in (401, 403, 429, 502, 503, 504):
+                        # Not this write's fault, so it isn't charged an attempt;
+                        # the replay loop backs off as a whole
+                        raise
+                    attempt = self.replay_attempts.setdefault(key, {"attempts": 0, "next_try": 0.0})
+                    attempt["attempts"] += 1
+                    rejected = 400 <= status < 500 and status != 408
+                    if rejected or attempt["attempts"] >= self.replay_max_attempts:
+                        self.outbox.dead_letter(record, f"{type(e).__name__} (HTTP {status}): {str(e)}")
+                        del self.replay_attempts[key]
+                    else:
+                        delay = min(self.replay_max_backoff, 5.0 * 2 ** (attempt["attempts"] - 1))
+                        attempt["next_try"] = time.monotonic() + delay
+                        logger.warning(f"Replay of outbox write {key} failed, retrying in {delay:.0f}s: {str(e)}")
+                    continue
+                self.replay_attempts.pop(key, None)
+                self.outbox.stats["replayed"] += 1
+                replayed += 1
+        
+        if replayed:
+            logger.info(f"Replayed {replayed} journaled writes to Mem0")
+        return replayed
+    
+    def _memory_ids(self, result: Any) -> List[str]:
+        """Extract memory ids from a Mem0 add response"""
+        if isinstance(result, dict):
+            result = result.get("results", [])
+        if not isinstance(result, list):
+            return []
+        return [entry["id"] for entry in result if isinstance(entry, dict) and entry.get("id")]
+    
+    def _mirror_call(self, method: Callable, *args) -> Any:
+        """Run a mirror operation without letting mirror errors break Mem0 traffic"""
+        try:
+            return method(*args)
+        except Exception as e:
+            logger.warning(f"Local mirror operation failed: {str(e)}")
+            return None
+    
+    def _mirror_pull_loop(self, interval: float):
+        """Periodically copy remote memories into the local mirror"""
+        while not self._stop.wait(interval):
+            try:
+                self.pull_remote_memories()
+            except Exception as e:
+                logger.warning(f"Local mirror pull failed: {str(e)}")
+    
+    def pull_remote_memories(self, page_size: int = 100, full: bool = False) -> int:
+        """
+        Copy remote Utlyze memories into the local mirror
+        
+        Only memories created or updated since the previous pull are listed.
+        A full listing runs on the first pull, when full is set, or once every
+        MEM0_MIRROR_RECONCILE_INTERVAL seconds, and drops mirrored memories
+        that were deleted remotely.
+        """
+        if self.mirror is None:
+            return 0
+        
+        started = datetime.now(timezone.utc)
+        pulled_through = self.mirror.get_meta("pulled_through")
+        reconciled_at = self.mirror.get_meta("reconciled_at")
+        full = full or pulled_through is None or reconciled_at is None or (
+            started - datetime.fromisoformat(reconciled_at)
+        ).total_seconds() >= self.mirror_reconcile_interval
+        
+        conditions = None
+        if not full:
+            # Overlap the previous pull to tolerate clock skew and slow writes
+            mark = (datetime.fromisoformat(pulled_through) - MIRROR_PULL_OVERLAP).isoformat()
+            conditions = [{"OR": [{"created_at": {"gte": mark}}, {"updated_at": {"gte": mark}}]}]
+        known = self.mirror.memory_ids() if full else set()
+        
+        batch, seen, pulled = [], set(), 0
+        for memory in self.iter_memories(conditions, page_size=page_size):
+            batch.append(memory)
+            seen.add(memory.get("id"))
+            if len(batch) >= page_size:
+                pulled += self.mirror.upsert_remote(batch)
+                batch = []
+        pulled += self.mirror.upsert_remote(batch)
+        
+        dropped = 0
+        if full:
+            dropped = self.mirror.delete(known - seen)
+            self.mirror.set_meta("reconciled_at", started.isoformat())
+        self.mirror.set_meta("pulled_through", started.isoformat())
+        
+        self.mirror_stats["pulled"] += pulled
+        self.mirror_stats["dropped"] += dropped
+        self.mirror_stats["last_pull"] = started.isoformat()
+        logger.info(
+            f"Local mirror refreshed with {pulled} remote memories"
+            + (f", dropped {dropped} deleted remotely" if full else " (incremental)")
+        )
+        return pulled
+    
+    def _fetch_page(
+        self,
+        conditions: Optional[List[Dict[str, Any]]],
+        page: int,
+        page_size: int
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """One v2 get_all page and whether another follows"""
+        response = self.client.get_all(
+            version="v2",
+            filters={"AND": [{"user_id": self.user_id}, *(conditions or [])]},
+            page=page,
+            page_size=page_size
+        )
+        results = response.get("results", []) if isinstance(response, dict) else response
+        has_next = bool(response.get("next")) if isinstance(response, dict) else len(results) >= page_size
+        return results, has_next and bool(results)
+    
+    def iter_memories(
+        self,
+        conditions: Optional[List[Dict[str, Any]]] = None,
+        page_size: int = 100,
+        offset: int = 0
+    ):
+        """Yield stored Utlyze memories one Mem0 page at a time, starting at offset"""
+        page, skip = offset // page_size + 1, offset % page_size
+        while True:
+            results, has_next = self._fetch_page(conditions, page, page_size)
+            yield from results[skip:]
+            skip = 0
+            if not has_next:
+                return
+            page += 1
+    
+    @staticmethod
+    def encode_cursor(offset: int) -> str:
+        """Opaque cursor for a position in a paged listing"""
+        return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        """Offset behind a cursor from encode_cursor; ValueError if malformed"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            kind, offset = raw.split(":", 1)
+            if kind != "o" or int(offset) < 0:
+                raise ValueError
+            return int(offset)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError(f"Invalid cursor: {cursor}")
+    
+    def get_memories_page(
+        self,
+        conditions: Optional[List[Dict[str, Any]]] = None,
+        limit: int = 50,
+        offset: int = 0,
+        local_filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of stored memories and the cursor of the next page
+        
+        Reads at most two Mem0 pages, so memory use depends on limit and
+        not on how many memories match. Falls back to the local mirror
+        (with the equivalent local_filters) when Mem0 is unreachable.
+        """
+        page, skip = offset // limit + 1, offset % limit
+        
+        def fetch() -> Dict[str, Any]:
+            memories, has_next = self._fetch_page(conditions, page, limit)
+            memories = memories[skip:]
+            if skip and has_next:
+                # Unaligned offset: the rest of this page comes from the next one
+                more, has_next = self._fetch_page(conditions, page + 1, limit)
+                memories.extend(more[:skip])
+                has_next = has_next or len(more) > skip
+            return {"memories": memories, "has_next": has_next}
+        
+        key = ("page", json.dumps(conditions, sort_keys=True, default=str), limit, offset)
+        try:
+            listing, stale = self._guarded_read("get_all", key, fetch)
+            memories, has_next = listing["memories"], listing["has_next"]
+        except Exception as e:
+            if self.mirror is None:
+                raise
+            logger.warning(f"Mem0 listing failed, answering from local mirror: {str(e)}")
+            self.mirror_stats["fallbacks"] += 1
+            memories = self.mirror.search(None, limit + 1, local_filters, offset=offset)
+            has_next = len(memories) > limit
+            memories = memories[:limit]
+            stale = False
+        
+        page_result = {
+            "memories": memories,
+            "next_cursor": self.encode_cursor(offset + len(memories)) if has_next else None
+        }
+        if stale:
+            page_result["stale"] = True
+        return page_result
+    
+    def _guarded_read(self, operation: str, key: Tuple, call: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run an interactive Mem0 read under its deadline and the circuit breaker
+        
+        Returns (result, stale). If the call fails, overruns its deadline
+        or is refused by the open circuit, the last good result for the
+        same key is returned marked stale; without one the error propagates.
+        """
+        try:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Mem0 circuit is open")
+            deadline = self.deadlines[operation]
+            started = time.monotonic()
+            future = self.read_executor.submit(call)
+            try:
+                result = future.result(timeout=deadline)
+            except FutureTimeoutError:
+                # A call that already started can't be interrupted; it's
+                # left to finish in the background and its result dropped
+                future.cancel()
+                self.breaker.record(None)
+                raise TimeoutError(f"Mem0 {operation} exceeded its {deadline:g}s deadline")
+            except Exception:
+                self.breaker.record(None)
+                raise
+            self.breaker.record(time.monotonic() - started)
+        except Exception as e:
+            entry = self.last_good.get(key)
+            if entry is None:
+                raise
+            stored_at, result = entry
+            logger.warning(f"Serving stale {operation} result from {stored_at}: {str(e)}")
+            return self.mark_stale(result, stored_at), True
+        
+        self.last_good.put(key, result)
+        return result, False
+    
+    @staticmethod
+    def mark_stale(result: Any, stored_at: str) -> Any:
+        """Copy of a read result with each memory flagged as stale"""
+        def mark(memories):
+            return [
+                {**memory, "stale": True, "stale_since": stored_at} if isinstance(memory, dict) else memory
+                for memory in memories
+            ]
+        
+        if isinstance(result, list):
+            return mark(result)
+        if isinstance(result, dict):
+            field = "memories" if "memories" in result else "results"
+            return {**result, field: mark(result.get(field) or []), "stale": True}
+        return result
+    
+    def _invalidation_tags(self, metadata: Dict[str, Any]) -> List[str]:
+        """Cache tags affected by a write with the given metadata"""
+        # Any write can change "recent" context and free-text searches
+        tags = ["any"]
+        if metadata.get("task_id"):
+            tags.append(f"task:{metadata['task_id']}")
+        if metadata.get("type"):
+            tags.append(f"type:{metadata['type']}")
+        return tags
+    
+    def _search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        tags: Iterable[str] = ("any",),
+        local_query: Optional[str] = None,
+        local_filters: Optional[Dict[str, Any]] = None,
+        conditions: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Read-through cached Mem0 search
+        
+        conditions restrict the search with v2 filters. local_query and
+        local_filters describe the same lookup for the local mirror,
+        which answers first in local_first mode and takes over when Mem0
+        is unreachable.
+        """
+        key = (query, self.user_id, limit, json.dumps(conditions, sort_keys=True) if conditions else None)
+        hit, results = self.cache.get(key)
+        if hit:
+            return results
+        
+        if self.mirror is not None and self.mirror_mode == "local_first":
+            results = self._mirror_call(self.mirror.search, local_query, limit, local_filters)
+            if results:
+                self.mirror_stats["local_hits"] += 1
+                return results
+        
+        generation = self.cache.begin_read()
+        # v2 filters also scope plain searches; current SDKs reject a
+        # top-level user_id for search
+        kwargs = {"version": "v2", "filters": {"AND": [{"user_id": self.user_id}, *(conditions or [])]}}
+        if limit is not None:
+            kwargs["limit"] = limit
+        
+        def search() -> List[Dict[str, Any]]:
+            response = self.client.search(query, **kwargs)
+            # Newer API versions and output formats wrap the list
+            return response.get("results", []) if isinstance(response, dict) else response
+        
+        try:
+            results, stale = self._guarded_read("search", key, search)
+        except Exception as e:
+            if self.mirror is None:
+                raise
+            logger.warning(f"Mem0 search failed, answering from local mirror: {str(e)}")
+            self.mirror_stats["fallbacks"] += 1
+            return self.mirror.search(local_query, limit, local_filters)
+        
+        if not stale:
+            self.cache.set(key, results, tags, generation)
+        return results
+    
+    def search_memories(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Search Utlyze memories; structured terms like task:42 become exact filters"""
+        return self.query_memories(query, limit=limit)
+    
+    @staticmethod
+    def parse_time(value: str) -> str:
+        """
+        UTC ISO timestamp for an ISO date/time or a relative age like 30m, 24h, 7d, 2w
+        
+        Mem0 created_at is UTC, so a date/time without an offset is taken as UTC.
+        """
+        match = RELATIVE_TIME.match(value)
+        if match:
+            unit = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}[match.group(2)]
+            return (datetime.now(timezone.utc) - timedelta(**{unit: int(match.group(1))})).isoformat()
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid time: {value}")
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc).isoformat()
+    
+    def plan_query(self, query: Optional[str] = None, **fields: Any) -> Dict[str, Any]:
+        """
+        Split a lookup into exact metadata filters and free text
+        
+        Structured terms in the query (see QUERY_FIELDS) and keyword
+        arguments (task_id, type, file_path, project, since, until) become
+        filters. The plan is answered by a date-ordered listing unless
+        free text remains, which needs semantic search.
+        """
+        filters = {}
+        text = query or ""
+        for match in QUERY_TERM.finditer(text):
+            field = QUERY_FIELDS.get(match.group(1).lower())
+            if field:
+                filters[field] = match.group(2).strip('"')
+        text = QUERY_TERM.sub(lambda m: "" if m.group(1).lower() in QUERY_FIELDS else m.group(0), text)
+        text = " ".join(text.split())
+        filters.update({field: value for field, value in fields.items() if value is not None})
+        
+        for field in ("since", "until"):
+            if field in filters:
+                filters[field] = self.parse_time(str(filters[field]))
+        
+        conditions = []
+        for field, value in filters.items():
+            if field == "since":
+                conditions.append({"created_at": {"gte": value}})
+            elif field == "until":
+                conditions.append({"created_at": {"lte": value}})
+            elif field == "file_path":
+                # Batched file_activity memories list their paths under file_paths
+                conditions.append({"OR": [
+                    {"metadata": {"file_path": value}},
+                    {"metadata": {"file_paths": {"contains": value}}}
+                ]})
+            else:
+                conditions.append({"metadata": {field: value}})
+        
+        tags = [f"task:{filters['task_id']}"] if "task_id" in filters else []
+        if "type" in filters:
+            tags.append(f"type:{filters['type']}")
+        return {
+            "route": "search" if text else "list",
+            "text": text,
+            "filters": filters,
+            "conditions": conditions,
+            "tags": tags or ["any"]
+        }
+    
+    def query_memories(self, query: Optional[str] = None, limit: int = 10, **fields: Any) -> List[Dict[str, Any]]:
+        """
+        Answer a lookup with the cheapest exact Mem0 call
+        
+        Purely structured lookups (task, type, file, project, time range)
+        are metadata-filtered listings, newest first; only free text goes
+        to vector search, still restricted by any filters.
+        """
+        plan = self.plan_query(query, **fields)
+        logger.info(
+            f"Query plan: {plan['route']} filters={plan['filters']}"
+            + (f" text={plan['text']!r}" if plan["text"] else "")
+        )
+        self.query_stats[plan["route"]] += 1
+        if plan["route"] == "search":
+            return self._search(
+                plan["text"],
+                limit=limit,
+                tags=plan["tags"],
+                local_query=plan["text"],
+                local_filters=plan["filters"],
+                conditions=plan["conditions"]
+            )
+        
+        key = ("list", json.dumps(plan["conditions"], sort_keys=True), limit)
+        hit, memories = self.cache.get(key)
+        if hit:
+            return memories
+        generation = self.cache.begin_read()
+        page = self.get_memories_page(plan["conditions"], limit=limit, local_filters=plan["filters"])
+        if not page.get("stale"):
+            self.cache.set(key, page["memories"], plan["tags"], generation)
+        return page["memories"]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Runtime counters for the cache and write queue"""
+        stats = {"cache": self.cache.get_stats(), "queries": dict(self.query_stats)}
+        if self.write_queue is not None:
+            stats["write_queue"] = {**self.write_queue.stats, "depth": self.write_queue.depth()}
+        if self.dedupe is not None:
+            stats["dedupe"] = self.dedupe.get_stats()
+        stats["rate_limit"] = get_rate_limiter().get_stats()
+        if self.outbox is not None:
+            stats["outbox"] = dict(self.outbox.stats)
+        stats["circuit"] = {**self.breaker.get_stats(), "stale_served": self.last_good.served}
+        if self.mirror is not None:
+            stats["mirror"] = {
+                **self.mirror_stats,
+                "mode": self.mirror_mode,
+                "memories": self._mirror_call(self.mirror.count)
+            }
+        return stats
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for all queued writes to reach Mem0"""
+        if self.write_queue is None:
+            return True
+        return self.write_queue.flush(timeout=timeout)
+    
+    def close(self):
+        """Flush queued writes and release background resources"""
+        self._stop.set()
+        self.read_executor.shutdown(wait=False)
+        if self.write_queue is not None:
+            self.write_queue.close()
+        if self.outbox is not None:
+            self.outbox.sync()
+        if self.dedupe is not None:
+            self.dedupe.save()
+        # Webhook updates record the snapshot between full syncs
+        self.task_snapshot.save()
+    
+    def add_task_update(self, task_data: Dict[str, Any], wait: bool = False, force: bool = False) -> Any:
+        """Add a task update to memory (force=True writes it even if unchanged)"""
         memory_content = f"""
         Task: {task_data.get('name', 'Unknown')}
         Status: {task_data.get('status', 'Unknown')}
@@ -47,19 +1475,29 @@ class UtlyzeMem0Client:
             "status": task_data.get('status')
         }
         
-        # Use messages format for mem0 API
-        messages = [{"role": "user", "content": memory_content}]
-        result = self.client.add(messages, user_id=self.user_id, metadata=metadata)
-        logger.info(f"Task update stored: {task_data.get('name')}")
+        result = self.add_memory(memory_content, metadata, wait=wait, force=force)
+        status = result.get("status") if isinstance(result, dict) else None
+        if status == "duplicate":
+            logger.info(f"Task update unchanged, not stored: {task_data.get('name')}")
+        elif status == "queued":
+            logger.info(f"Task update queued: {task_data.get('name')}")
+        else:
+            logger.info(f"Task update stored: {task_data.get('name')}")
         return result
     
-    def add_terminal_activity(self, activity_data: Dict[str, Any]) -> str:
-        """Log terminal activity"""
+    def add_terminal_activity(self, activity_data: Dict[str, Any], wait: bool = False) -> Any:
+        """Log terminal activity (a single command, or a batch under 'commands')"""
+        if activity_data.get('commands'):
+            commands = "\n".join(f"        - {command}" for command in activity_data['commands'])
+            command_lines = f"Commands ({len(activity_data['commands'])}):\n{commands}"
+        else:
+            command_lines = f"Command: {activity_data.get('last_command', '')}"
+        
         memory_content = f"""
         Terminal Activity:
         Directory: {activity_data.get('cwd', 'Unknown')}
         Branch: {activity_data.get('git_branch', 'No git')}
-        Command: {activity_data.get('last_command', '')}
+        {command_lines}
         Time: {datetime.now().isoformat()}
         """
         
@@ -68,79 +1506,200 @@ class UtlyzeMem0Client:
             "cwd": activity_data.get('cwd'),
             "timestamp": datetime.now().isoformat()
         }
+        if activity_data.get('commands'):
+            metadata["command_count"] = len(activity_data['commands'])
         
-        # Use messages format for mem0 API
-        messages = [{"role": "user", "content": memory_content}]
-        result = self.client.add(messages, user_id=self.user_id, metadata=metadata)
-        return result
+        return self.add_memory(memory_content, metadata, wait=wait)
     
-    def get_current_context(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get current project context"""
-        # Search for recent memories
-        recent_memories = self.client.search(
-            "utlyze project",
-            user_id=self.user_id,
-            limit=limit
-        )
+    @staticmethod
+    def context_entry(memory: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a Mem0 memory the way context consumers expect"""
+        entry = {
+            "content": memory.get("memory", ""),
+            "metadata": memory.get("metadata", {}),
+            "created_at": memory.get("created_at", "")
+        }
+        if memory.get("stale"):
+            entry["stale"] = True
+            entry["stale_since"] = memory.get("stale_since")
+        return entry
+    
+    def get_current_context(self, limit: int = 10, **filters: Any) -> List[Dict[str, Any]]:
+        """Get current project context: the most recent memories, optionally filtered"""
+        recent_memories = self.query_memories(limit=limit, **filters)
         
         # Format for easy consumption
-        context = []
-        for memory in recent_memories:
-            context.append({
-                "content": memory.get("memory", ""),
-                "metadata": memory.get("metadata", {}),
-                "created_at": memory.get("created_at", "")
-            })
+        context = [self.context_entry(memory) for memory in recent_memories]
         
         return context
     
-    def get_task_context(self, task_id: str) -> List[Dict[str, Any]]:
-        """Get all memories related to a specific task"""
-        task_memories = self.client.search(
-            f"task_id: {task_id}",
-            user_id=self.user_id
+    def get_task_context(self, task_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get memories related to a specific task (use get_task_history for paging)"""
+        return self.query_memories(limit=limit or 100, task_id=task_id)
+    
+    def task_conditions(self, task_id: str) -> List[Dict[str, Any]]:
+        """get_all filter conditions selecting one task's memories"""
+        return self.plan_query(task_id=task_id)["conditions"]
+    
+    def get_task_history(self, task_id: str, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+        """One page of a task's memories with the cursor of the next page"""
+        return self.get_memories_page(
+            self.task_conditions(task_id),
+            limit=limit,
+            offset=offset,
+            local_filters={"task_id": task_id}
         )
-        return task_memories
     
-    def sync_with_taskmaster(self, taskmaster_state: Dict[str, Any]) -> Dict[str, Any]:
-        """Sync current Taskmaster state to memory"""
+    def sync_with_taskmaster(
+        self,
+        taskmaster_state: Dict[str, Any],
+        concurrency: Optional[int] = None,
+        force: bool = False,
+        full: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Sync current Taskmaster state to memory
+        
+        The state is diffed against the snapshot of the last sync, so only
+        added and changed tasks are written; force=True rewrites every
+        task. With full=True the state is taken to be every task, and
+        known tasks missing from it are recorded as removed. Writes run in parallel
+        with at most `concurrency` Mem0 calls in flight (capped at
+        MEM0_SYNC_CONCURRENCY), and the sync summary is only written once
+        every task has either been stored or failed.
+        """
+        tasks = taskmaster_state.get("tasks", [])
+        # Callers may ask for less parallelism than configured, never more
+        concurrency = min(max(1, concurrency or self.sync_concurrency), max(1, self.sync_concurrency))
         sync_result = {
             "synced_tasks": 0,
-            "errors": []
+            "unchanged_tasks": 0,
+            "skipped_tasks": 0,
+            "added": [],
+            "changed": [],
+            "removed": [],
+            "errors": [],
+            "results": []
         }
         
-        # Sync all active tasks
-        for task in taskmaster_state.get("tasks", []):
+        def sync_task(task: Dict[str, Any]) -> Dict[str, Any]:
+            started = time.monotonic()
             try:
-                self.add_task_update(task)
-                sync_result["synced_tasks"] += 1
+                result = self.add_task_update(task, wait=True, force=force)
+                status = "unchanged" if isinstance(result, dict) and result.get("status") == "duplicate" else "synced"
+                self.task_snapshot.record(task)
+                return {"task_id": task.get("id"), "status": status, "duration": round(time.monotonic() - started, 3)}
             except Exception as e:
-                sync_result["errors"].append(f"Error syncing task {task.get('id')}: {str(e)}")
+                return {"task_id": task.get("id"), "status": "error", "error": str(e), "duration": round(time.monotonic() - started, 3)}
+        
+        def remove_task(task_id: str) -> Dict[str, Any]:
+            started = time.monotonic()
+            removal_memory = f"""
+            Task Removed: {task_id}
+            The task no longer exists in Taskmaster
+            Removal Time: {datetime.now().isoformat()}
+            """
+            try:
+                self.add_memory(
+                    removal_memory,
+                    {
+                        "type": "task_update",
+                        "task_id": task_id,
+                        "project": "utlyze",
+                        "status": "removed",
+                        "timestamp": datetime.now().isoformat()
+                    },
+                    wait=True
+                )
+                self.task_snapshot.forget(task_id)
+                return {"task_id": task_id, "status": "removed", "duration": round(time.monotonic() - started, 3)}
+            except Exception as e:
+                return {"task_id": task_id, "status": "error", "error": str(e), "duration": round(time.monotonic() - started, 3)}
+        
+        # One sync at a time so overlapping syncs don't diff against a moving snapshot
+        with self.sync_lock:
+            diff = self.task_snapshot.diff(tasks, full=full)
+            if force:
+                diff.update(added=[], changed=tasks, unchanged=[])
+            sync_result["added"] = [task.get("id") for task in diff["added"]]
+            sync_result["changed"] = [task.get("id") for task in diff["changed"]]
+            sync_result["skipped_tasks"] = len(diff["unchanged"])
+            
+            # Fan out the writes; results follow the order of the tasks in the
+            # request, with removals last
+            writes = {id(task) for task in diff["added"] + diff["changed"]}
+            jobs = [(sync_task, task) for task in tasks if id(task) in writes]
+            jobs += [(remove_task, task_id) for task_id in diff["removed"]]
+            if jobs:
+                with ThreadPoolExecutor(max_workers=min(concurrency, len(jobs)), thread_name_prefix="mem0-sync") as executor:
+                    sync_result["results"] = list(executor.map(lambda job: job[0](job[1]), jobs))
+            self.task_snapshot.save()
+        
+        for result in sync_result["results"]:
+            if result["status"] == "synced":
+                sync_result["synced_tasks"] += 1
+            elif result["status"] == "unchanged":
+                sync_result["unchanged_tasks"] += 1
+            elif result["status"] == "removed":
+                sync_result["removed"].append(result["task_id"])
+            else:
+                sync_result["errors"].append(f"Error syncing task {result['task_id']}: {result['error']}")
         
         # Add sync summary
         summary = f"""
         Taskmaster Sync Complete:
-        Total Tasks: {len(taskmaster_state.get('tasks', []))}
-        Active Tasks: {len([t for t in taskmaster_state.get('tasks', []) if t.get('status') != 'completed'])}
+        Total Tasks: {len(tasks)}
+        Active Tasks: {len([t for t in tasks if t.get('status') != 'completed'])}
+        Added Tasks: {len(sync_result['added'])}
+        Changed Tasks: {len(sync_result['changed'])}
+        Removed Tasks: {len(sync_result['removed'])}
+        Skipped Tasks: {sync_result['skipped_tasks']}
+        Synced Tasks: {sync_result['synced_tasks']}
+        Unchanged Tasks: {sync_result['unchanged_tasks']}
+        Failed Tasks: {len(sync_result['errors'])}
         Sync Time: {datetime.now().isoformat()}
         """
         
-        # Use messages format for mem0 API
-        messages = [{"role": "user", "content": summary}]
-        self.client.add(
-            messages,
-            user_id=self.user_id,
-            metadata={"type": "sync_summary", "timestamp": datetime.now().isoformat()}
+        self.add_memory(
+            summary,
+            {"type": "sync_summary", "timestamp": datetime.now().isoformat()}
         )
         
+        logger.info(
+            f"Taskmaster sync finished: {len(sync_result['added'])} added, {len(sync_result['changed'])} changed, "
+            f"{len(sync_result['removed'])} removed, {sync_result['skipped_tasks']} skipped of {len(tasks)} tasks"
+        )
         return sync_result
     
-    def cleanup_old_memories(self, days: int = 30) -> int:
-        """Clean up old memories (optional utility)"""
-        # Note: Mem0 cloud handles retention, but this is here if needed
-        # Would need to implement based on Mem0's deletion API
-        logger.info(f"Cleanup requested for memories older than {days} days")
-        return 0
+    def delete_memories(self, memory_ids: List[str], memory_type: Optional[str] = None, batch_size: int = 100) -> int:
+        """Batch-delete memories from Mem0 and the local mirror"""
+        for start in range(0, len(memory_ids), batch_size):
+            batch = memory_ids[start:start + batch_size]
+            self.client.batch_delete([{"memory_id": memory_id} for memory_id in batch])
+            if self.mirror is not None:
+                self._mirror_call(self.mirror.delete, batch)
+        self.cache.invalidate(["any", f"type:{memory_type}"] if memory_type else ["any"])
+        return len(memory_ids)
+    
+    def retention_engine(self, days: Optional[int] = None) -> RetentionEngine:
+        """Retention engine for the configured policies, optionally with one max age for all"""
+        policies = load_policies()
+        if days is not None:
+            policies = {memory_type: {**policy, "max_age_days": days} for memory_type, policy in policies.items()}
+        return RetentionEngine(self, policies, checkpoint_path=state_path("retention-checkpoint.json"))
+    
+    def apply_retention(
+        self,
+        days: Optional[int] = None,
+        dry_run: bool = False,
+        max_days: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Roll up and delete expired memories; returns the retention report"""
+        return self.retention_engine(days).run(dry_run=dry_run, max_days=max_days)
+    
+    def cleanup_old_memories(self, days: Optional[int] = None) -> int:
+        """Apply retention policies (see retention.py); returns how many memories were removed"""
+        return self.apply_retention(days=days)["deleted"]
 
 
 if __name__ == "__main__":
@@ -158,7 +1717,7 @@ if __name__ == "__main__":
         "affected_files": ["src/mem0_client.py", "README.md"]
     }
     
-    result = client.add_task_update(test_task)
+    result = client.add_task_update(test_task, wait=True)
     print(f"Test task added: {result}")
     
     # Get current context
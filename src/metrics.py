@@ -0,0 +1,174 @@
+"""
+Metrics for Utlyze Taskmaster-Mem0
+Minimal Prometheus-compatible counters, gauges and histograms
+"""
+
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Callable, Tuple
+
+# Latency buckets (seconds) sized for cloud API round trips
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    """Base class for a labelled metric family"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.values: Dict[Tuple[str, ...], object] = {}
+        self.callbacks: Dict[Tuple[str, ...], Callable[[], float]] = {}
+        self.lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+    
+    def set_function(self, callback: Callable[[], float], **labels: str):
+        """Read the value from callback whenever metrics are scraped"""
+        with self.lock:
+            self.callbacks[self._key(labels)] = callback
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            callbacks = list(self.callbacks.items())
+        for key, callback in callbacks:
+            try:
+                value = float(callback())
+            except Exception:
+                continue
+            with self.lock:
+                self.values[key] = value
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+    
+    kind = "counter"
+    
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+    
+    kind = "gauge"
+    
+    def set(self, value: float, **labels: str):
+        with self.lock:
+            self.values[self._key(labels)] = value
+    
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+    
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+    
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted((key, dict(state, counts=list(state["counts"]))) for key, state in self.values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                le = _format_labels(self.label_names, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {state['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {state['count']}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+    
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.lock = threading.Lock()
+    
+    def _register(self, cls, name: str, help_text: str, labels: Tuple[str, ...] = (), **kwargs) -> Metric:
+        # Re-registering returns the existing metric so modules can share names
+        with self.lock:
+            if name not in self.metrics:
+                self.metrics[name] = cls(name, help_text, labels, **kwargs)
+            return self.metrics[name]
+    
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labels)
+    
+    def gauge(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labels)
+    
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Optional[Tuple[float, ...]] = None) -> Histogram:
+        return self._register(Histogram, name, help_text, labels, buckets=buckets or DEFAULT_BUCKETS)
+    
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry shared by the client, bridge and other components
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
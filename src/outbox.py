@@ -0,0 +1,187 @@
+"""
+Durable Outbox for Mem0 Writes
+Append-only journal of pending writes so nothing is lost while Mem0 is unreachable
+"""
+
+import os
+import json
+import time
+import uuid
+import fcntl
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """Journal of pending Mem0 writes, shared safely between local processes"""
+    
+    def __init__(self, path: str, fsync_interval: float = 0.2):
+        """
+        Open (or create) the journal
+        
+        Args:
+            path: Journal file; records are JSON lines
+            fsync_interval: Max seconds appended records may wait for fsync
+        """
+        self.path = path
+        self.lock_path = path + ".lock"
+        root, ext = os.path.splitext(path)
+        # Writes Mem0 will never accept are set aside here for inspection
+        self.dead_letter_path = root + ".dead" + (ext or ".jsonl")
+        self.fsync_interval = fsync_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        
+        self.lock = threading.Lock()
+        self.fd = None
+        self.inode = None
+        self.lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.dirty = threading.Event()
+        self.stats = {"appended": 0, "acked": 0, "replayed": 0, "dead_lettered": 0, "compactions": 0}
+        
+        self.syncer = threading.Thread(target=self._sync_loop, daemon=True)
+        self.syncer.start()
+    
+    @contextmanager
+    def _file_lock(self, mode: int):
+        """Shared lock for appends, exclusive lock for compaction"""
+        fcntl.flock(self.lock_fd, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+    
+    def _write(self, record: Dict[str, Any]):
+        """Append one record, reopening the journal if it was compacted"""
+        line = (json.dumps(record, default=str) + "\n").encode()
+        # The thread lock comes first: flock locks are per open file, so
+        # threads of one process must not interleave their flock calls
+        with self.lock, self._file_lock(fcntl.LOCK_SH):
+            try:
+                current_inode = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current_inode = None
+            if self.fd is None or current_inode != self.inode:
+                if self.fd is not None:
+                    os.close(self.fd)
+                self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                self.inode = os.fstat(self.fd).st_ino
+            # O_APPEND keeps concurrent single-write appends from interleaving
+            os.write(self.fd, line)
+        self.dirty.set()
+    
+    def append(self, item: Dict[str, Any]) -> str:
+        """Record a pending write and return its idempotency key"""
+        key = uuid.uuid4().hex
+        self._write({"op": "put", "key": key, "ts": time.time(), "item": item})
+        self.stats["appended"] += 1
+        return key
+    
+    def ack(self, key: str):
+        """Mark a write as stored in Mem0"""
+        self._write({"op": "ack", "key": key})
+        self.stats["acked"] += 1
+    
+    def dead_letter(self, record: Dict[str, Any], error: str):
+        """Move a pending write Mem0 keeps rejecting to the dead-letter file"""
+        line = json.dumps({**record, "error": error, "dead_lettered_at": time.time()}, default=str) + "\n"
+        with open(self.dead_letter_path, "a") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        # Only acked once it is safely on disk elsewhere
+        self.ack(record["key"])
+        self.stats["dead_lettered"] += 1
+        logger.error(f"Outbox write {record['key']} moved to {self.dead_letter_path}: {error}")
+    
+    def _read(self) -> List[Dict[str, Any]]:
+        """Read all journal records, skipping a torn trailing line"""
+        records = []
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+    
+    def pending(self, min_age: float = 0.0) -> List[Dict[str, Any]]:
+        """Unacknowledged writes at least min_age seconds old, oldest first"""
+        puts: Dict[str, Dict[str, Any]] = {}
+        for record in self._read():
+            if record.get("op") == "put":
+                puts[record["key"]] = record
+            elif record.get("op") == "ack":
+                puts.pop(record.get("key"), None)
+        cutoff = time.time() - min_age
+        return [record for record in puts.values() if record["ts"] <= cutoff]
+    
+    def size(self) -> int:
+        """Journal size in bytes"""
+        try:
+            return os.stat(self.path).st_size
+        except FileNotFoundError:
+            return 0
+    
+    def compact(self) -> int:
+        """Rewrite the journal with only unacknowledged writes"""
+        with self.lock, self._file_lock(fcntl.LOCK_EX):
+            pending = self.pending()
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                for record in pending:
+                    f.write(json.dumps(record, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        self.stats["compactions"] += 1
+        logger.info(f"Outbox compacted, {len(pending)} writes still pending")
+        return len(pending)
+    
+    def sync(self):
+        """fsync appended records now"""
+        self.dirty.clear()
+        with self.lock:
+            if self.fd is not None:
+                os.fsync(self.fd)
+    
+    def _sync_loop(self):
+        """Batch fsyncs so appends don't each pay for one"""
+        while True:
+            self.dirty.wait()
+            time.sleep(self.fsync_interval)
+            try:
+                self.sync()
+            except OSError as e:
+                logger.error(f"Outbox fsync failed: {e}")
+    
+    @contextmanager
+    def replay_lock(self):
+        """Non-blocking exclusive lock so only one process replays at a time"""
+        fd = os.open(self.path + ".replay.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+    
+    def close(self):
+        """fsync and close the journal"""
+        self.sync()
+        with self.lock:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
@@ -0,0 +1,278 @@
+"""
+Mem0 Rate Limiter
+Token bucket shared by local processes that backs off when Mem0 throttles
+"""
+
+import os
+import json
+import time
+import fcntl
+import threading
+from email.utils import parsedate_to_datetime
+from contextlib import contextmanager
+from typing import Dict, Optional, Any
+import httpx
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Adaptive token bucket
+    
+    The refill rate starts at max_rate, is cut by decrease on every 429
+    and climbs back by recovery requests/s per second while calls
+    succeed. Without a max_rate calls are not paced at all until Mem0
+    first throttles; the rate then starts from the request rate just
+    seen and pacing stops again once it has climbed back there. The
+    bucket is kept in process until Mem0 throttles; from then until the
+    rate has recovered, a state file (if given) shares the bucket,
+    current rate and any Retry-After pause with every local process
+    that is being throttled too.
+    """
+    
+    # Shared state left untouched this long is from an earlier episode
+    STALE_AFTER = 60.0
+    
+    def __init__(
+        self,
+        max_rate: Optional[float],
+        burst: float,
+        min_rate: float = 0.5,
+        path: Optional[str] = None,
+        decrease: float = 0.5,
+        recovery: float = 1.0
+    ):
+        """
+        Create the limiter
+        
+        Args:
+            max_rate: Requests per second allowed by the Mem0 plan (None if unknown)
+            burst: Tokens that can accumulate while idle
+            min_rate: Floor the rate never drops below
+            path: Shared state file; None keeps the state in this process
+            decrease: Factor applied to the rate on each throttling response
+            recovery: Requests/s regained per second of successful calls
+        """
+        self.max_rate = max_rate
+        self.burst = max(1.0, burst)
+        self.min_rate = min(min_rate, max_rate) if max_rate is not None else min_rate
+        self.decrease = decrease
+        self.recovery = recovery
+        self.path = path
+        
+        self.lock = threading.Lock()
+        self.fd = None
+        self.shared = False
+        self.local_state = self._initial_state()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # Requests counted over the last second or so, to know the rate
+        # Mem0 rejected when no max_rate is configured
+        self.window_start = time.time()
+        self.window_count = 0
+        self.observed_rate = 0.0
+        self.stats = {"acquired": 0, "throttled": 0, "waited": 0.0}
+    
+    def _initial_state(self) -> Dict[str, Any]:
+        # A rate of None means calls are not paced
+        return {
+            "tokens": self.burst,
+            "rate": self.max_rate,
+            "ceiling": self.max_rate,
+            "updated": time.time(),
+            "blocked_until": 0.0,
+            "cooldown_until": 0.0
+        }
+    
+    @contextmanager
+    def _state(self):
+        """Load the bucket under lock, yield it for changes and store it back"""
+        # Thread lock first: flock locks are per open file, not per thread
+        with self.lock:
+            if self.fd is None or not self.shared:
+                yield self.local_state
+                return
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                try:
+                    state = json.loads(os.pread(self.fd, 4096, 0) or b"{}")
+                    if not isinstance(state, dict) or "rate" not in state:
+                        state = self._initial_state()
+                except ValueError:
+                    # Torn or foreign contents; start over
+                    state = self._initial_state()
+                now = time.time()
+                if now - float(state["updated"]) > self.STALE_AFTER and now >= float(state["blocked_until"]):
+                    state = self._initial_state()
+                if self.max_rate is not None:
+                    # The plan limit may have been lowered since the file was written
+                    state["rate"] = min(float(state["rate"] or self.max_rate), self.max_rate)
+                    state["ceiling"] = self.max_rate
+                yield state
+                self.local_state = state
+                data = json.dumps(state).encode()
+                os.ftruncate(self.fd, 0)
+                os.pwrite(self.fd, data, 0)
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+    
+    def _count(self, now: float):
+        """Track the request rate while calls are not paced"""
+        self.window_count += 1
+        if now - self.window_start >= 1.0:
+            self.observed_rate = self.window_count / (now - self.window_start)
+            self.window_start, self.window_count = now, 0
+    
+    def _recent_rate(self, now: float) -> float:
+        """Requests per second just before Mem0 throttled"""
+        # Counted over at least a second, so a short burst isn't overestimated
+        current = self.window_count / max(now - self.window_start, 1.0)
+        return max(self.min_rate, self.observed_rate, current)
+    
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take one token, waiting for the bucket to refill if needed
+        
+        Returns False if no token became available within timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = 0.0
+        while True:
+            with self._state() as state:
+                now = time.time()
+                if now < state["blocked_until"]:
+                    wait = state["blocked_until"] - now
+                elif state["rate"] is None:
+                    # Not paced: nothing to spend until Mem0 throttles
+                    self._count(now)
+                    wait = 0.0
+                else:
+                    elapsed = max(0.0, now - state["updated"])
+                    state["tokens"] = min(self.burst, state["tokens"] + elapsed * state["rate"])
+                    state["updated"] = now
+                    if state["tokens"] >= 1:
+                        state["tokens"] -= 1
+                        wait = 0.0
+                    else:
+                        wait = (1 - state["tokens"]) / state["rate"]
+            
+            if wait <= 0:
+                self.stats["acquired"] += 1
+                self.stats["waited"] += waited
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats["waited"] += waited
+                    return False
+                wait = min(wait, remaining)
+            # Re-check periodically since other processes share the bucket
+            wait = min(wait, 1.0)
+            time.sleep(wait)
+            waited += wait
+    
+    def throttled(self, retry_after: Optional[float] = None):
+        """Record a 429: pause callers and lower the rate"""
+        self.stats["throttled"] += 1
+        # Pace through the shared state from now on so local processes back
+        # off together instead of each finding the quota on its own
+        self.shared = self.fd is not None
+        with self._state() as state:
+            now = time.time()
+            if state["rate"] is None:
+                # No quota configured; the rate just rejected is the best guess
+                state["rate"] = state["ceiling"] = self._recent_rate(now)
+                state["cooldown_until"] = 0.0
+            pause = retry_after if retry_after is not None else 1.0 / state["rate"]
+            state["blocked_until"] = max(state["blocked_until"], now + pause)
+            state["tokens"] = 0.0
+            state["updated"] = now
+            # Concurrent requests rejected by the same burst count as one signal
+            if now >= state["cooldown_until"]:
+                state["rate"] = max(self.min_rate, state["rate"] * self.decrease)
+                state["cooldown_until"] = now + max(pause, 1.0)
+                logger.warning(f"Mem0 rate limited, slowing to {state['rate']:.2f} requests/s for at least {pause:g}s")
+    
+    def succeeded(self):
+        """Record an accepted call and recover the rate towards max_rate"""
+        # The last state seen by acquire is recent enough to skip the file
+        # lock once the rate is back at the limit
+        rate, ceiling = self.local_state["rate"], self.local_state.get("ceiling")
+        if rate is None or (ceiling is not None and rate >= ceiling):
+            if self.shared and time.time() >= self.local_state["blocked_until"]:
+                # Recovered; back to the in-process bucket
+                self.shared = False
+            return
+        with self._state() as state:
+            if state["rate"] is None:
+                return
+            ceiling = state.get("ceiling") or self.max_rate or state["rate"]
+            state["rate"] = min(ceiling, state["rate"] + self.recovery / state["rate"])
+            if self.max_rate is None and state["rate"] >= ceiling:
+                # Back where Mem0 throttled; stop pacing until it does again
+                state["rate"] = state["ceiling"] = None
+    
+    def current_rate(self) -> Optional[float]:
+        """Refill rate in requests per second (None while calls are not paced)"""
+        return self.local_state["rate"]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "rate": self.current_rate(),
+            "max_rate": self.max_rate,
+            "shared": self.fd is not None,
+            "coordinating": self.shared
+        }
+    
+    def close(self):
+        with self.lock:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """httpx transport that spends a token per request and retries 429 responses"""
+    
+    def __init__(self, transport: httpx.BaseTransport, limiter: RateLimiter, retries: int = 3):
+        self.transport = transport
+        self.limiter = limiter
+        self.retries = retries
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            response = self.transport.handle_request(request)
+            if response.status_code != 429:
+                self.limiter.succeeded()
+                return response
+            
+            self.limiter.throttled(parse_retry_after(response.headers.get("Retry-After")))
+            if attempt >= self.retries:
+                return response
+            # The request was rejected outright, so resending it is safe
+            response.close()
+            attempt += 1
+    
+    def close(self):
+        self.transport.close()
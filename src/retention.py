@@ -0,0 +1,338 @@
+"""
+Memory Retention for Utlyze
+Rolls old activity memories up into daily digests and deletes the originals
+"""
+
+import os
+import json
+import fcntl
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-type policy: memories older than max_age_days are rolled up into one
+# digest per day and project/branch ("digest") or just removed ("delete").
+# Types without a policy are kept forever.
+DEFAULT_POLICIES = {
+    "development_activity": {"max_age_days": 7, "action": "digest"},
+    "terminal_activity": {"max_age_days": 7, "action": "digest"},
+    "file_activity": {"max_age_days": 14, "action": "digest"},
+    "sync_summary": {"max_age_days": 30, "action": "delete"},
+}
+
+DIGEST_TYPE = "activity_digest"
+
+# Lines that differ in every memory and would drown out the useful ones
+NOISE_PREFIXES = ("time:", "last updated:")
+
+
+def load_policies(source: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Default policies overridden by MEM0_RETENTION_POLICIES
+    
+    The override is inline JSON or the path of a JSON file mapping memory
+    types to {"max_age_days": N, "action": "digest" | "delete" | "keep"}.
+    """
+    policies = {memory_type: dict(policy) for memory_type, policy in DEFAULT_POLICIES.items()}
+    source = source if source is not None else os.getenv("MEM0_RETENTION_POLICIES", "")
+    if not source:
+        return policies
+    if not source.lstrip().startswith("{"):
+        with open(os.path.expanduser(source)) as f:
+            source = f.read()
+    for memory_type, policy in json.loads(source).items():
+        policies[memory_type] = {**policies.get(memory_type, {}), **policy}
+    return policies
+
+
+class RetentionEngine:
+    """Applies retention policies to stored memories, a day at a time"""
+    
+    def __init__(
+        self,
+        client,
+        policies: Optional[Dict[str, Dict[str, Any]]] = None,
+        checkpoint_path: Optional[str] = None,
+        delete_batch_size: int = 100
+    ):
+        """
+        Initialize the engine
+        
+        Args:
+            client: UtlyzeMem0Client used to list, write and delete memories
+            policies: Retention policy per memory type (see DEFAULT_POLICIES)
+            checkpoint_path: Where progress is kept so an interrupted run resumes
+            delete_batch_size: Memories removed per batch delete call
+        """
+        self.client = client
+        self.policies = policies if policies is not None else load_policies()
+        self.checkpoint_path = checkpoint_path
+        self.delete_batch_size = delete_batch_size
+        self.checkpoint = self._load_checkpoint()
+    
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        if not self.checkpoint_path:
+            return {}
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.checkpoint, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    @contextmanager
+    def run_lock(self):
+        """Non-blocking exclusive lock so only one local process applies retention"""
+        if not self.checkpoint_path:
+            yield True
+            return
+        fd = os.open(self.checkpoint_path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+    
+    def last_run(self) -> Optional[datetime]:
+        """When retention last completed a (non dry) run"""
+        last_run = self.checkpoint.get("last_run")
+        return datetime.fromisoformat(last_run) if last_run else None
+    
+    def run(self, dry_run: bool = False, max_days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Apply every policy and report what was (or would be) done
+        
+        Each policy handles its expired memories one UTC calendar day at
+        a time, oldest first. max_days bounds the days handled per policy
+        in this run; the rest is picked up by the next one. A dry run
+        changes nothing, including the checkpoint.
+        """
+        report = {"dry_run": dry_run, "complete": True, "types": {}, "started": datetime.now().isoformat()}
+        with self.run_lock() as acquired:
+            if not acquired:
+                logger.info("Retention already running in another process")
+                report["complete"] = False
+                report["skipped"] = "locked"
+                return report
+            
+            for memory_type, policy in self.policies.items():
+                if policy.get("action", "keep") == "keep" or not policy.get("max_age_days"):
+                    continue
+                result = self._apply(memory_type, policy, dry_run, max_days)
+                report["types"][memory_type] = result
+                report["complete"] = report["complete"] and result["complete"]
+            
+            if not dry_run:
+                self.checkpoint["last_run"] = datetime.now().isoformat()
+                self._save_checkpoint()
+        
+        totals = {
+            key: sum(result[key] for result in report["types"].values())
+            for key in ("memories", "digests", "deleted")
+        }
+        report.update(totals)
+        logger.info(
+            f"Retention {'dry run' if dry_run else 'run'}: {totals['memories']} old memories, "
+            f"{totals['digests']} digests, {totals['deleted']} deleted"
+        )
+        return report
+    
+    def _apply(
+        self,
+        memory_type: str,
+        policy: Dict[str, Any],
+        dry_run: bool,
+        max_days: Optional[int]
+    ) -> Dict[str, Any]:
+        """Walk one type's expired memories day by day, oldest day first"""
+        result = {"action": policy["action"], "days": 0, "memories": 0, "digests": 0, "deleted": 0, "complete": True}
+        # Mem0 timestamps are UTC; whole UTC days before the cutoff day are
+        # older than max_age_days, so nothing younger is ever touched
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=policy["max_age_days"])).date()
+        
+        # Days already handled are empty now and don't come up again; a day
+        # that was interrupted is finished from its checkpoint
+        for day in self._expired_days(memory_type, cutoff):
+            memories = list(self.client.iter_memories(self._day_conditions(memory_type, day)))
+            if not memories:
+                continue
+            if max_days is not None and result["days"] >= max_days:
+                result["complete"] = False
+                break
+            self._apply_day(memory_type, policy, day, memories, dry_run, result)
+            result["days"] += 1
+        return result
+    
+    def _apply_day(
+        self,
+        memory_type: str,
+        policy: Dict[str, Any],
+        day,
+        memories: List[Dict[str, Any]],
+        dry_run: bool,
+        result: Dict[str, Any]
+    ):
+        """Digest and/or delete one day's memories of one type"""
+        state = self.checkpoint.setdefault(memory_type, {})
+        if state.get("day") != day.isoformat():
+            state.update(day=day.isoformat(), digested=[])
+        
+        result["memories"] += len(memories)
+        groups = self._group(memories) if policy["action"] == "digest" else {}
+        for key, group in groups.items():
+            group_id = "/".join(key)
+            if group_id in state["digested"]:
+                # Written before an interruption; only its originals remain
+                continue
+            if not dry_run:
+                content, metadata = self.digest(memory_type, day, key, group)
+                self.client.add_memory(content, metadata, wait=True)
+                state["digested"].append(group_id)
+                self._save_checkpoint()
+            result["digests"] += 1
+        
+        if not dry_run:
+            self.client.delete_memories(
+                [memory["id"] for memory in memories if memory.get("id")],
+                memory_type=memory_type,
+                batch_size=self.delete_batch_size
+            )
+            state.update(digested=[], completed=day.isoformat())
+            self._save_checkpoint()
+        result["deleted"] += len(memories)
+    
+    @staticmethod
+    def _day_start(day: date) -> datetime:
+        """Midnight UTC at the start of a day"""
+        return datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+    
+    @staticmethod
+    def _created_day(memory: Dict[str, Any]) -> Optional[date]:
+        """UTC calendar day a memory was created on, if its created_at parses"""
+        try:
+            created = datetime.fromisoformat(str(memory.get("created_at") or "").replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if created.tzinfo is None:
+            # Mem0 timestamps carry an offset; a bare one is taken as UTC
+            created = created.replace(tzinfo=timezone.utc)
+        return created.astimezone(timezone.utc).date()
+    
+    def _day_conditions(self, memory_type: str, day: date) -> List[Dict[str, Any]]:
+        start = self._day_start(day)
+        return [
+            {"metadata": {"type": memory_type}},
+            {"created_at": {"gte": start.isoformat()}},
+            {"created_at": {"lt": (start + timedelta(days=1)).isoformat()}}
+        ]
+    
+    def _expired_days(self, memory_type: str, cutoff: date) -> List[date]:
+        """
+        UTC days before cutoff with memories of a type, oldest first
+        
+        One pass over the expired memories, keeping only their dates, so
+        the order Mem0 lists them in doesn't matter.
+        """
+        conditions = [{"metadata": {"type": memory_type}}, {"created_at": {"lt": self._day_start(cutoff).isoformat()}}]
+        days = set()
+        for memory in self.client.iter_memories(conditions):
+            day = self._created_day(memory)
+            if day is not None and day < cutoff:
+                days.add(day)
+        return sorted(days)
+    
+    def _group(self, memories: List[Dict[str, Any]]) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """Split a day's memories by project and git branch"""
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for memory in memories:
+            metadata = memory.get("metadata") or {}
+            project = metadata.get("project") or os.path.basename(str(metadata.get("cwd") or "")) or "unknown"
+            branch = metadata.get("git_branch") or metadata.get("branch") or "-"
+            groups.setdefault((str(project), str(branch)), []).append(memory)
+        return groups
+    
+    def digest(
+        self,
+        memory_type: str,
+        day,
+        key: Tuple[str, str],
+        memories: List[Dict[str, Any]],
+        max_lines: int = 20
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Content and metadata of the digest replacing a group of memories"""
+        project, branch = key
+        lines: Counter = Counter()
+        files: Counter = Counter()
+        for memory in memories:
+            metadata = memory.get("metadata") or {}
+            for line in (memory.get("memory") or "").splitlines():
+                line = line.strip().lstrip("-* ").strip()
+                if line and not line.lower().startswith(NOISE_PREFIXES):
+                    lines[line] += 1
+            for file_path in [metadata.get("file_path"), *(metadata.get("file_paths") or [])]:
+                if file_path:
+                    files[str(file_path)] += 1
+        
+        created = sorted(memory.get("created_at") or "" for memory in memories)
+        content = [
+            f"Daily {memory_type} digest for {project} ({branch}) on {day.isoformat()}",
+            f"Memories rolled up: {len(memories)}, from {created[0]} to {created[-1]}"
+        ]
+        if files:
+            content.append("Files: " + ", ".join(path for path, _ in files.most_common(max_lines)))
+        content.append("Most frequent entries:")
+        content.extend(f"- {line} (x{count})" if count > 1 else f"- {line}" for line, count in lines.most_common(max_lines))
+        
+        metadata = {
+            "type": DIGEST_TYPE,
+            "digest_of": memory_type,
+            "project": project,
+            "git_branch": None if branch == "-" else branch,
+            "date": day.isoformat(),
+            "memory_count": len(memories),
+            "source": "retention",
+            # Dated by the day it covers so it sorts with that day's memories
+            "timestamp": created[-1] or day.isoformat()
+        }
+        return "\n".join(content), metadata
+
+
+def main():
+    """Apply retention policies from the command line"""
+    import argparse
+    from mem0_client import UtlyzeMem0Client
+    
+    parser = argparse.ArgumentParser(description="Roll up and delete old Utlyze memories")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without changing anything")
+    parser.add_argument("--days", type=int, help="Override every policy's max age in days")
+    parser.add_argument("--max-days", type=int, help="Calendar days handled per type in this run")
+    args = parser.parse_args()
+    
+    client = UtlyzeMem0Client(write_behind=False)
+    try:
+        report = client.apply_retention(days=args.days, dry_run=args.dry_run, max_days=args.max_days)
+        print(json.dumps(report, indent=2))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,20 @@ Receives task updates and syncs them to Mem0 cloud
 
 import os
 import json
+import time
 import asyncio
+from collections import deque
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, Any, Optional
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from typing import Dict, Any, Optional, Callable, Awaitable, Iterable
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
 import logging
-from mem0_client import UtlyzeMem0Client
+from mem0_client import UtlyzeMem0Client, CircuitOpenError
+from metrics import REGISTRY, CONTENT_TYPE
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,6 +37,29 @@ app.add_middleware(
 # Initialize Mem0 client
 mem0_client = UtlyzeMem0Client()
 
+HTTP_REQUESTS = REGISTRY.counter(
+    "bridge_http_requests_total", "HTTP requests handled by the bridge", ("method", "path", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "bridge_http_request_duration_seconds", "Bridge request latency", ("method", "path")
+)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count and time every request by route template"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        HTTP_REQUESTS.inc(method=request.method, path=path, status=str(status))
+        HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, path=path)
+
 
 class TaskUpdate(BaseModel):
     """Task update model from Taskmaster"""
@@ -50,6 +79,101 @@ class TaskmasterSync(BaseModel):
     timestamp: Optional[str] = None
 
 
+class TaskCoalescer:
+    """Debounces task updates per task id, keeping only the latest state"""
+    
+    # Statuses that are written right away instead of waiting out the window
+    FLUSH_STATUSES = {"completed", "failed", "cancelled"}
+    
+    def __init__(self, process: Callable[[Dict[str, Any]], Awaitable[None]], window: float = 2.0):
+        """
+        Initialize the coalescer
+        
+        Args:
+            process: Coroutine function that stores one task update
+            window: Seconds an update may wait for newer ones for the same task
+        """
+        self.process = process
+        self.window = window
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.timers: Dict[str, asyncio.TimerHandle] = {}
+        self.in_flight = set()
+        self.stats = {"received": 0, "coalesced": 0, "flushed": 0}
+    
+    def submit(self, task_data: Dict[str, Any]):
+        """Queue an update, replacing any pending one for the same task"""
+        task_id = task_data["id"]
+        self.stats["received"] += 1
+        
+        previous = self.pending.get(task_id)
+        if previous is not None:
+            if previous.get("status") != task_data.get("status"):
+                # Status transitions are always recorded, so write the old state first
+                self.flush(task_id)
+            else:
+                self.stats["coalesced"] += 1
+        
+        self.pending[task_id] = task_data
+        if self.window <= 0 or task_data.get("status") in self.FLUSH_STATUSES:
+            self.flush(task_id)
+        elif task_id not in self.timers:
+            # The window starts at the first pending update, so a steady stream
+            # of progress reports is still written at least once per window
+            loop = asyncio.get_running_loop()
+            self.timers[task_id] = loop.call_later(self.window, self.flush, task_id)
+    
+    def flush(self, task_id: str):
+        """Hand the latest pending update for a task to the processor"""
+        timer = self.timers.pop(task_id, None)
+        if timer is not None:
+            timer.cancel()
+        task_data = self.pending.pop(task_id, None)
+        if task_data is None:
+            return
+        
+        job = asyncio.ensure_future(self.process(task_data))
+        self.in_flight.add(job)
+        job.add_done_callback(self.in_flight.discard)
+        self.stats["flushed"] += 1
+    
+    async def drain(self):
+        """Flush everything pending and wait for it to be processed"""
+        for task_id in list(self.pending):
+            self.flush(task_id)
+        if self.in_flight:
+            await asyncio.gather(*self.in_flight, return_exceptions=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self.pending), "in_flight": len(self.in_flight)}
+
+
+# File context is written as one memory per batch of files ("batched")
+# or as one memory per file ("per_file")
+FILE_CONTEXT_MODE = os.getenv("TASKMASTER_FILE_CONTEXT_MODE", "batched")
+FILE_CONTEXT_BATCH_SIZE = int(os.getenv("TASKMASTER_FILE_CONTEXT_BATCH_SIZE", "100"))
+
+# Coalesce bursts of updates for the same task before they reach Mem0
+task_coalescer = TaskCoalescer(
+    lambda task_data: process_task_update(task_data),
+    window=float(os.getenv("TASKMASTER_DEBOUNCE_SECONDS", "2"))
+)
+
+
+REGISTRY.gauge(
+    "bridge_task_updates_pending", "Task updates waiting out their debounce window"
+).set_function(lambda: len(task_coalescer.pending))
+REGISTRY.gauge(
+    "bridge_background_jobs_in_flight", "Task updates being processed in the background"
+).set_function(lambda: len(task_coalescer.in_flight))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush pending task updates and buffered memory writes before exiting"""
+    await task_coalescer.drain()
+    mem0_client.close()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -60,18 +184,31 @@ async def root():
     }
 
 
+@app.get("/stats")
+async def get_stats():
+    """Mem0 client and task update pipeline counters"""
+    return {
+        **mem0_client.get_stats(),
+        "task_updates": task_coalescer.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for Mem0 calls, webhooks and background queues"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 @app.post("/webhook/task-update")
-async def handle_task_update(task: TaskUpdate, background_tasks: BackgroundTasks):
+async def handle_task_update(task: TaskUpdate):
     """Handle individual task updates from Taskmaster"""
     try:
         # Log the update
         logger.info(f"Received task update: {task.name} ({task.status})")
         
-        # Add to background tasks to not block the response
-        background_tasks.add_task(
-            process_task_update,
-            task.dict()
-        )
+        # Processed in the background once the task's debounce window closes
+        task_coalescer.submit(task.dict())
         
         return {
             "status": "accepted",
@@ -85,18 +222,41 @@ async def handle_task_update(task: TaskUpdate, background_tasks: BackgroundTasks
 
 
 @app.post("/webhook/sync")
-async def handle_full_sync(sync_data: TaskmasterSync):
-    """Handle full Taskmaster state sync"""
+async def handle_full_sync(
+    sync_data: TaskmasterSync,
+    concurrency: Optional[int] = None,
+    force: bool = False,
+    full: bool = False
+):
+    """
+    Handle Taskmaster state sync (only tasks changed since the last sync are written)
+    
+    Pass full=true when the body holds every task, so tasks missing from
+    it are recorded as removed; without it the list may be partial.
+    concurrency lowers the parallel writes below MEM0_SYNC_CONCURRENCY.
+    """
     try:
         logger.info(f"Received full sync with {len(sync_data.tasks)} tasks")
         
-        # Perform sync
-        result = mem0_client.sync_with_taskmaster(sync_data.dict())
+        # Perform sync off the event loop; the client fans tasks out itself
+        result = await run_in_threadpool(
+            mem0_client.sync_with_taskmaster,
+            sync_data.dict(),
+            concurrency,
+            force,
+            full
+        )
         
         return {
             "status": "synced",
             "synced_tasks": result["synced_tasks"],
+            "unchanged_tasks": result["unchanged_tasks"],
+            "skipped_tasks": result["skipped_tasks"],
+            "added": result["added"],
+            "changed": result["changed"],
+            "removed": result["removed"],
             "errors": result["errors"],
+            "results": result["results"],
             "timestamp": datetime.now().isoformat()
         }
     
@@ -105,32 +265,265 @@ async def handle_full_sync(sync_data: TaskmasterSync):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Bulk ingest: writes allowed in flight before reading more of the body,
+# the longest accepted line, and how many error details a summary keeps
+INGEST_MAX_IN_FLIGHT = int(os.getenv("TASKMASTER_INGEST_MAX_IN_FLIGHT", "200"))
+INGEST_MAX_LINE_BYTES = int(os.getenv("TASKMASTER_INGEST_MAX_LINE_BYTES", str(1024 * 1024)))
+INGEST_MAX_ERRORS = 100
+
+
+async def ndjson_lines(request: Request):
+    """Yield (line number, bytes) per non-empty line of a streamed body; None for oversized lines"""
+    buffer = b""
+    line_number = 0
+    discarding = False
+    async for chunk in request.stream():
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            line_number += 1
+            if discarding:
+                # Tail of an oversized line; resume at the next one
+                discarding = False
+            elif len(line) > INGEST_MAX_LINE_BYTES:
+                yield line_number, None
+            elif line.strip():
+                yield line_number, line
+        if not discarding and len(buffer) > INGEST_MAX_LINE_BYTES:
+            yield line_number + 1, None
+            discarding = True
+        if discarding:
+            buffer = b""
+    if buffer.strip() and not discarding:
+        yield line_number + 1, buffer
+
+
+@app.post("/webhook/ingest")
+async def ingest_tasks(request: Request, max_in_flight: int = INGEST_MAX_IN_FLIGHT):
+    """
+    Bulk-ingest a Taskmaster export sent as NDJSON, one task per line
+    
+    Tasks are validated and queued as their lines arrive. Once
+    max_in_flight writes are pending, the body is not read further until
+    the oldest completes, so memory stays flat for any export size.
+    Tasks unchanged since the last sync are skipped.
+    """
+    started = time.monotonic()
+    summary = {"received": 0, "stored": 0, "unchanged": 0, "invalid": 0, "failed": 0, "errors": []}
+    pending = deque()
+    max_in_flight = max(1, max_in_flight)
+    
+    def note_error(message: str):
+        if len(summary["errors"]) < INGEST_MAX_ERRORS:
+            summary["errors"].append(message)
+    
+    async def settle(line_number: int, task: Dict[str, Any], future: Future):
+        try:
+            await asyncio.wrap_future(future)
+            mem0_client.task_snapshot.record(task)
+            summary["stored"] += 1
+        except Exception as e:
+            summary["failed"] += 1
+            note_error(f"line {line_number}: {str(e)}")
+    
+    # Hold the full sync's lock so neither checks or records tasks against a
+    # snapshot the other is changing
+    await run_in_threadpool(mem0_client.sync_lock.acquire)
+    try:
+        async for line_number, line in ndjson_lines(request):
+            summary["received"] += 1
+            if line is None:
+                summary["invalid"] += 1
+                note_error(f"line {line_number}: longer than {INGEST_MAX_LINE_BYTES} bytes")
+                continue
+            try:
+                task = TaskUpdate(**json.loads(line)).dict()
+            except ValidationError as e:
+                summary["invalid"] += 1
+                fields = ", ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+                note_error(f"line {line_number}: {fields}")
+                continue
+            except (ValueError, TypeError) as e:
+                summary["invalid"] += 1
+                note_error(f"line {line_number}: {str(e)}")
+                continue
+            
+            if mem0_client.task_snapshot.is_current(task):
+                summary["unchanged"] += 1
+                continue
+            
+            try:
+                result = await run_in_threadpool(mem0_client.add_task_update, task)
+            except Exception as e:
+                summary["failed"] += 1
+                note_error(f"line {line_number}: {str(e)}")
+                continue
+            
+            if isinstance(result, dict) and isinstance(result.get("future"), Future):
+                pending.append((line_number, task, result["future"]))
+            elif isinstance(result, dict) and result.get("status") == "duplicate":
+                mem0_client.task_snapshot.record(task)
+                summary["unchanged"] += 1
+            else:
+                mem0_client.task_snapshot.record(task)
+                summary["stored"] += 1
+            
+            if len(pending) >= max_in_flight:
+                # Stop reading the body until the oldest write lands
+                if mem0_client.write_queue is not None:
+                    mem0_client.write_queue.request_flush()
+                while len(pending) >= max_in_flight:
+                    await settle(*pending.popleft())
+            
+            if summary["received"] % 1000 == 0:
+                logger.info(f"Ingest progress: {summary['received']} tasks received, {summary['stored']} stored")
+        
+        if pending and mem0_client.write_queue is not None:
+            mem0_client.write_queue.request_flush()
+        while pending:
+            await settle(*pending.popleft())
+        await run_in_threadpool(mem0_client.task_snapshot.save)
+    finally:
+        mem0_client.sync_lock.release()
+    
+    summary["duration"] = round(time.monotonic() - started, 3)
+    logger.info(f"Ingest finished: {summary['received']} received, {summary['stored']} stored, {summary['unchanged']} unchanged, {summary['invalid']} invalid, {summary['failed']} failed")
+    return {"status": "ingested", **summary, "timestamp": datetime.now().isoformat()}
+
+
+# Largest page a read endpoint returns; more is available through the cursor
+MAX_PAGE_SIZE = int(os.getenv("TASKMASTER_MAX_PAGE_SIZE", "500"))
+
+
+def wants_ndjson(request: Request, stream: bool) -> bool:
+    """Stream when asked via ?stream=true or an application/x-ndjson Accept header"""
+    return stream or "application/x-ndjson" in request.headers.get("accept", "")
+
+
+def start_offset(cursor: Optional[str], offset: Optional[int]) -> int:
+    """Resolve cursor/offset query parameters, rejecting bad cursors with 400"""
+    if cursor:
+        try:
+            return mem0_client.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return max(offset or 0, 0)
+
+
+def ndjson_response(memories: Iterable[Dict[str, Any]]) -> StreamingResponse:
+    """One JSON document per line, fetched from Mem0 a page at a time"""
+    def lines():
+        try:
+            for memory in memories:
+                yield json.dumps(memory, default=str) + "\n"
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            logger.error(f"Error streaming memories: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.get("/context")
-async def get_current_context(limit: int = 10):
-    """Get current project context from Mem0"""
+async def get_current_context(
+    request: Request,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    offset: Optional[int] = None,
+    stream: bool = False,
+    task_id: Optional[str] = None,
+    type: Optional[str] = None,
+    file: Optional[str] = None,
+    project: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
+    """
+    Get current project context from Mem0
+    
+    Returns the most recent memories, optionally narrowed by task_id,
+    type, file, project and a since/until range (ISO time or an age
+    such as 24h or 7d). A cursor, offset or streaming pages through
+    every match instead of returning only the first limit.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    filters = {"task_id": task_id, "type": type, "file_path": file, "project": project, "since": since, "until": until}
     try:
-        context = mem0_client.get_current_context(limit=limit)
+        try:
+            plan = mem0_client.plan_query(**filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        if wants_ndjson(request, stream):
+            memories = mem0_client.iter_memories(plan["conditions"], offset=start_offset(cursor, offset))
+            return ndjson_response(mem0_client.context_entry(memory) for memory in memories)
+        
+        if cursor or offset is not None:
+            page = await run_in_threadpool(
+                mem0_client.get_memories_page,
+                plan["conditions"],
+                limit=limit,
+                offset=start_offset(cursor, offset),
+                local_filters=plan["filters"]
+            )
+            context = [mem0_client.context_entry(memory) for memory in page["memories"]]
+            return {
+                "context": context,
+                "count": len(context),
+                "next_cursor": page["next_cursor"],
+                "stale": page.get("stale", False),
+                "timestamp": datetime.now().isoformat()
+            }
+        
+        context = await run_in_threadpool(mem0_client.get_current_context, limit=limit, **plan["filters"])
         return {
             "context": context,
             "count": len(context),
+            "stale": any(entry.get("stale") for entry in context),
             "timestamp": datetime.now().isoformat()
         }
+    except HTTPException:
+        raise
+    except (TimeoutError, CircuitOpenError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting context: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/task/{task_id}/history")
-async def get_task_history(task_id: str):
-    """Get all memories related to a specific task"""
+async def get_task_history(
+    request: Request,
+    task_id: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    offset: Optional[int] = None,
+    stream: bool = False
+):
+    """Get memories related to a specific task, a page at a time"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
     try:
-        memories = mem0_client.get_task_context(task_id)
+        if wants_ndjson(request, stream):
+            return ndjson_response(mem0_client.iter_memories(
+                mem0_client.task_conditions(task_id),
+                offset=start_offset(cursor, offset)
+            ))
+        
+        page = await run_in_threadpool(
+            mem0_client.get_task_history, task_id, limit=limit, offset=start_offset(cursor, offset)
+        )
         return {
             "task_id": task_id,
-            "memories": memories,
-            "count": len(memories),
+            "memories": page["memories"],
+            "count": len(page["memories"]),
+            "next_cursor": page["next_cursor"],
+            "stale": page.get("stale", False),
             "timestamp": datetime.now().isoformat()
         }
+    except HTTPException:
+        raise
+    except (TimeoutError, CircuitOpenError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting task history: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -139,8 +532,14 @@ async def get_task_history(task_id: str):
 async def process_task_update(task_data: Dict[str, Any]):
     """Process task update in background"""
     try:
-        # Add to Mem0
-        mem0_client.add_task_update(task_data)
+        # Add to Mem0; client calls journal, mirror and may block on a full
+        # write queue, so they run off the event loop
+        result = await run_in_threadpool(mem0_client.add_task_update, task_data)
+        if isinstance(result, dict) and isinstance(result.get("future"), Future):
+            await asyncio.wrap_future(result["future"])
+        # A later full sync carrying this same state then skips it, and one
+        # carrying an older state rewrites it
+        mem0_client.task_snapshot.record(task_data)
         
         # If task is completed, trigger additional actions
         if task_data.get("status") == "completed":
@@ -165,12 +564,10 @@ async def handle_task_completion(task_data: Dict[str, Any]):
     This task is now complete and can be referenced for future similar tasks.
     """
     
-    # Use messages format for mem0 API
-    messages = [{"role": "user", "content": completion_memory}]
-    mem0_client.client.add(
-        messages,
-        user_id="utlyze",
-        metadata={
+    await run_in_threadpool(
+        mem0_client.add_memory,
+        completion_memory,
+        {
             "type": "task_completion",
             "task_id": task_data['id'],
             "timestamp": datetime.now().isoformat()
@@ -180,22 +577,50 @@ async def handle_task_completion(task_data: Dict[str, Any]):
 
 async def add_file_context(task_data: Dict[str, Any]):
     """Add context about files mentioned in the task"""
-    for file_path in task_data.get("affected_files", []):
+    affected_files = task_data.get("affected_files", [])
+    
+    if FILE_CONTEXT_MODE == "per_file":
+        # One memory per file; the client's write queue bounds concurrency
+        for file_path in affected_files:
+            file_memory = f"""
+            File Activity: {file_path}
+            Related Task: {task_data['name']}
+            Task Status: {task_data['status']}
+            Last Modified: {datetime.now().isoformat()}
+            """
+            
+            await run_in_threadpool(
+                mem0_client.add_memory,
+                file_memory,
+                {
+                    "type": "file_activity",
+                    "file_path": file_path,
+                    "task_id": task_data['id'],
+                    "timestamp": datetime.now().isoformat()
+                }
+            )
+        return
+    
+    # Batched: one memory per chunk of files, with the paths kept in metadata
+    for start in range(0, len(affected_files), FILE_CONTEXT_BATCH_SIZE):
+        files = affected_files[start:start + FILE_CONTEXT_BATCH_SIZE]
+        file_lines = "\n".join(f"        - {file_path}" for file_path in files)
         file_memory = f"""
-        File Activity: {file_path}
+        File Activity ({len(files)} files):
+{file_lines}
         Related Task: {task_data['name']}
         Task Status: {task_data['status']}
         Last Modified: {datetime.now().isoformat()}
         """
         
-        # Use messages format for mem0 API
-        messages = [{"role": "user", "content": file_memory}]
-        mem0_client.client.add(
-            messages,
-            user_id="utlyze",
-            metadata={
+        await run_in_threadpool(
+            mem0_client.add_memory,
+            file_memory,
+            {
                 "type": "file_activity",
-                "file_path": file_path,
+                "file_paths": files,
+                "file_count": len(files),
+                "file_batch": start // FILE_CONTEXT_BATCH_SIZE,
                 "task_id": task_data['id'],
                 "timestamp": datetime.now().isoformat()
             }
@@ -0,0 +1,69 @@
+"""
+Shared setup for the unit tests
+Modules are imported from src/ the same way the scripts do
+"""
+
+import os
+import sys
+import socket
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# Keep the Mem0 SDK from reporting usage while tests import it
+os.environ.setdefault("MEM0_TELEMETRY", "False")
+
+
+@pytest.fixture(scope="session")
+def fake_mem0():
+    """URL of a fake Mem0 API served from a background thread"""
+    import uvicorn
+    import fake_mem0_server
+    
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(fake_mem0_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture(scope="session")
+def bridge(fake_mem0, tmp_path_factory):
+    """Test client for the Taskmaster bridge, talking to the fake Mem0 API"""
+    state_dir = tmp_path_factory.mktemp("state")
+    # The bridge builds its Mem0 client at import, so configure it first
+    os.environ.update(
+        MEM0_API_KEY="test",
+        MEM0_HOST=fake_mem0,
+        UTLYZE_STATE_DIR=str(state_dir),
+        UTLYZE_SPOOL=str(state_dir / "activity.spool"),
+        TASKMASTER_DEBOUNCE_SECONDS="0"
+    )
+    from fastapi.testclient import TestClient
+    import taskmaster_bridge
+    
+    with TestClient(taskmaster_bridge.app) as client:
+        yield client
+
+
+@pytest.fixture
+def wait_for():
+    """Poll until condition() is true or timeout seconds pass"""
+    def wait(condition, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.02)
+        return condition()
+    
+    return wait
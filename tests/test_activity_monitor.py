@@ -0,0 +1,27 @@
+"""
+Tests for the activity monitor's git state caches
+"""
+
+import threading
+from collections import OrderedDict
+
+from activity_monitor import ActivityMonitor
+
+
+def test_git_caches_keep_only_recent_directories(tmp_path):
+    # get_git_info only needs the cache map, so skip building a Mem0 client
+    monitor = ActivityMonitor.__new__(ActivityMonitor)
+    monitor.git_caches = OrderedDict()
+    monitor.git_caches_lock = threading.Lock()
+    monitor.max_git_caches = 2
+    dirs = [tmp_path / name for name in ("a", "b", "c")]
+    for path in dirs:
+        path.mkdir()
+    
+    monitor.get_git_info(str(dirs[0]))
+    monitor.get_git_info(str(dirs[1]))
+    monitor.get_git_info(str(dirs[0]))
+    monitor.get_git_info(str(dirs[2]))
+    
+    assert list(monitor.git_caches) == [str(dirs[0]), str(dirs[2])]
+    assert set(monitor._git_cache_stats()) == {str(dirs[0]), str(dirs[2])}
@@ -0,0 +1,153 @@
+"""
+Tests for the Taskmaster bridge endpoints against the fake Mem0 API
+"""
+
+import json
+import uuid
+
+import pytest
+
+
+def task(task_id, status="in_progress", progress=50, **fields):
+    return {"id": task_id, "name": f"Task {task_id}", "status": status, "progress": progress, **fields}
+
+
+def test_webhook_update_records_snapshot_for_later_syncs(bridge, wait_for):
+    from taskmaster_bridge import mem0_client
+    
+    task_id = f"snapshot-{uuid.uuid4().hex[:8]}"
+    old, new = task(task_id, progress=10), task(task_id, progress=80)
+    assert bridge.post("/webhook/sync", json={"tasks": [old]}).json()["synced_tasks"] == 1
+    
+    assert bridge.post("/webhook/task-update", json=new).status_code == 200
+    assert wait_for(lambda: mem0_client.task_snapshot.is_current(new))
+    
+    # The webhook state is current, so an unchanged sync of it is skipped...
+    assert bridge.post("/webhook/sync", json={"tasks": [new]}).json()["skipped_tasks"] == 1
+    # ...and a sync of the older state is written again instead of skipped
+    result = bridge.post("/webhook/sync", json={"tasks": [old]}).json()
+    assert result["changed"] == [task_id]
+    assert result["synced_tasks"] == 1
+
+
+def test_sync_results_follow_request_order_and_concurrency_is_capped(bridge, monkeypatch):
+    import concurrent.futures
+    import mem0_client as client_module
+    from taskmaster_bridge import mem0_client
+    
+    pools = []
+    real_pool = concurrent.futures.ThreadPoolExecutor
+    
+    def recording_pool(max_workers=None, **kwargs):
+        pools.append(max_workers)
+        return real_pool(max_workers=max_workers, **kwargs)
+    
+    monkeypatch.setattr(client_module, "ThreadPoolExecutor", recording_pool)
+    monkeypatch.setattr(mem0_client, "sync_concurrency", 2)
+    prefix = f"order-{uuid.uuid4().hex[:8]}"
+    known = task(f"{prefix}-b")
+    bridge.post("/webhook/sync", json={"tasks": [known]})
+    
+    tasks = [task(f"{prefix}-a"), {**known, "progress": 90}, task(f"{prefix}-c")]
+    result = bridge.post("/webhook/sync", params={"concurrency": 10000}, json={"tasks": tasks}).json()
+    
+    assert [entry["task_id"] for entry in result["results"]] == [t["id"] for t in tasks]
+    assert pools[-1] == 2
+
+
+@pytest.fixture
+def history(bridge):
+    """Id of a task with seven stored memories, and their contents newest first"""
+    from taskmaster_bridge import mem0_client
+    
+    task_id = f"paging-{uuid.uuid4().hex[:8]}"
+    for n in range(7):
+        mem0_client.add_memory(f"Note {n} on {task_id}", {"type": "task_update", "task_id": task_id}, wait=True)
+    return task_id, [f"Note {n} on {task_id}" for n in reversed(range(7))]
+
+
+def ndjson(response):
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_history_cursor_walks_every_page_once(bridge, history):
+    task_id, notes = history
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {"offset": 0})}
+        body = bridge.get(f"/task/{task_id}/history", params=params).json()
+        pages.append([memory["memory"] for memory in body["memories"]])
+        assert body["count"] == len(body["memories"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    
+    assert pages == [notes[0:3], notes[3:6], notes[6:]]
+
+
+def test_history_offset_need_not_align_with_pages(bridge, history):
+    task_id, notes = history
+    body = bridge.get(f"/task/{task_id}/history", params={"limit": 3, "offset": 2}).json()
+    
+    assert [memory["memory"] for memory in body["memories"]] == notes[2:5]
+    # The cursor resumes exactly where the offset page ended
+    following = bridge.get(f"/task/{task_id}/history", params={"limit": 3, "cursor": body["next_cursor"]}).json()
+    assert [memory["memory"] for memory in following["memories"]] == notes[5:]
+    assert following["next_cursor"] is None
+
+
+def test_history_limit_is_clamped(bridge, history, monkeypatch):
+    import taskmaster_bridge
+    
+    task_id, notes = history
+    monkeypatch.setattr(taskmaster_bridge, "MAX_PAGE_SIZE", 4)
+    body = bridge.get(f"/task/{task_id}/history", params={"limit": 1000}).json()
+    assert [memory["memory"] for memory in body["memories"]] == notes[:4]
+    assert body["next_cursor"] is not None
+    
+    body = bridge.get(f"/task/{task_id}/history", params={"limit": 0}).json()
+    assert body["count"] == 1
+
+
+def test_history_stream_returns_every_memory(bridge, history):
+    task_id, notes = history
+    response = bridge.get(f"/task/{task_id}/history", params={"stream": "true", "limit": 2})
+    assert [memory["memory"] for memory in ndjson(response)] == notes
+    
+    cursor = bridge.get(f"/task/{task_id}/history", params={"limit": 3}).json()["next_cursor"]
+    response = bridge.get(f"/task/{task_id}/history", params={"stream": "true", "cursor": cursor})
+    assert [memory["memory"] for memory in ndjson(response)] == notes[3:]
+
+
+def test_context_pages_match_its_stream(bridge, history):
+    task_id, notes = history
+    first = bridge.get("/context", params={"task_id": task_id, "limit": 4, "offset": 0}).json()
+    second = bridge.get("/context", params={"task_id": task_id, "limit": 4, "cursor": first["next_cursor"]}).json()
+    paged = [entry["content"] for entry in first["context"] + second["context"]]
+    
+    assert (first["count"], second["count"], second["next_cursor"]) == (4, 3, None)
+    assert paged == notes
+    
+    streamed = ndjson(bridge.get("/context", params={"task_id": task_id, "stream": "true"}))
+    assert [entry["content"] for entry in streamed] == notes
+    assert streamed[0]["metadata"]["task_id"] == task_id
+    # The Accept header asks for the same stream
+    accepted = bridge.get("/context", params={"task_id": task_id}, headers={"Accept": "application/x-ndjson"})
+    assert ndjson(accepted) == streamed
+
+
+def test_context_limit_is_clamped(bridge, history, monkeypatch):
+    import taskmaster_bridge
+    
+    task_id, notes = history
+    monkeypatch.setattr(taskmaster_bridge, "MAX_PAGE_SIZE", 5)
+    body = bridge.get("/context", params={"task_id": task_id, "limit": 1000, "offset": 0}).json()
+    
+    assert [entry["content"] for entry in body["context"]] == notes[:5]
+    assert body["next_cursor"] is not None
+
+
+def test_malformed_cursor_is_rejected(bridge):
+    assert bridge.get("/task/any/history", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert bridge.get("/context", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,138 @@
+"""
+Tests for the Mem0 circuit breaker, read deadlines and stale fallbacks
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mem0_client import CircuitBreaker, CircuitOpenError, LastGoodResults, UtlyzeMem0Client
+
+
+def expire(breaker):
+    """Pretend the breaker has been open for its whole reset timeout"""
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record(None)
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    breaker.record(None)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.get_stats() == {"opened": 1, "rejected": 1, "state": "open", "failures": 3}
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record(None)
+    breaker.record(0.1)
+    breaker.record(None)
+    
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker(failure_threshold=2, slow_call=1.0)
+    breaker.record(1.5)
+    breaker.record(2.0)
+    
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record(None)
+    expire(breaker)
+    
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.state_code() == 1
+    # Other callers wait for the probe's outcome
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_circuit():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record(None)
+    expire(breaker)
+    breaker.allow()
+    breaker.record(0.1)
+    
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_circuit():
+    breaker = CircuitBreaker(failure_threshold=3)
+    for _ in range(3):
+        breaker.record(None)
+    expire(breaker)
+    breaker.allow()
+    breaker.record(None)
+    
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.state_code() == 2
+    assert not breaker.allow()
+    assert breaker.get_stats()["opened"] == 2
+
+
+@pytest.fixture
+def client():
+    client = UtlyzeMem0Client.__new__(UtlyzeMem0Client)
+    client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, slow_call=5)
+    client.deadlines = {"search": 0.1}
+    client.read_executor = ThreadPoolExecutor(max_workers=2)
+    client.last_good = LastGoodResults()
+    yield client
+    client.read_executor.shutdown(wait=False)
+
+
+def test_read_over_deadline_times_out(client):
+    release = threading.Event()
+    try:
+        with pytest.raises(TimeoutError, match="deadline"):
+            client._guarded_read("search", ("q",), lambda: release.wait(5))
+    finally:
+        release.set()
+    assert client.breaker.failures == 1
+
+
+def test_failed_read_serves_last_good_result_marked_stale(client):
+    fresh = [{"id": "m1", "memory": "login"}]
+    assert client._guarded_read("search", ("q",), lambda: fresh) == (fresh, False)
+    
+    def fail():
+        raise ConnectionError("Mem0 unreachable")
+    
+    result, stale = client._guarded_read("search", ("q",), fail)
+    assert stale
+    assert result[0]["memory"] == "login"
+    assert result[0]["stale"] and result[0]["stale_since"]
+    assert "stale" not in fresh[0]
+    assert client.last_good.served == 1
+
+
+def test_failed_read_without_last_good_result_raises(client):
+    def fail():
+        raise ConnectionError("Mem0 unreachable")
+    
+    with pytest.raises(ConnectionError):
+        client._guarded_read("search", ("q",), fail)
+
+
+def test_open_circuit_skips_mem0_and_serves_stale(client):
+    client._guarded_read("search", ("q",), lambda: [{"memory": "login"}])
+    for _ in range(2):
+        client.breaker.record(None)
+    calls = []
+    
+    result, stale = client._guarded_read("search", ("q",), lambda: calls.append(1) or [])
+    assert stale and result[0]["memory"] == "login"
+    assert calls == []
+    with pytest.raises(CircuitOpenError):
+        client._guarded_read("search", ("other",), lambda: [])
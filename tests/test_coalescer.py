@@ -0,0 +1,79 @@
+"""
+Tests for debouncing bursts of task updates
+"""
+
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def coalescer(bridge):
+    from taskmaster_bridge import TaskCoalescer
+    
+    processed = []
+    
+    async def process(task_data):
+        processed.append((task_data["id"], task_data["status"], task_data.get("progress")))
+    
+    coalescer = TaskCoalescer(process, window=0.05)
+    coalescer.processed = processed
+    return coalescer
+
+
+def update(task_id, status="in_progress", progress=0):
+    return {"id": task_id, "status": status, "progress": progress}
+
+
+def test_burst_for_one_task_is_written_once(coalescer):
+    async def run():
+        for progress in (10, 20, 30):
+            coalescer.submit(update("1", progress=progress))
+        await asyncio.sleep(0.15)
+    
+    asyncio.run(run())
+    assert coalescer.processed == [("1", "in_progress", 30)]
+    assert coalescer.get_stats() == {"received": 3, "coalesced": 2, "flushed": 1, "pending": 0, "in_flight": 0}
+
+
+def test_tasks_are_debounced_separately(coalescer):
+    async def run():
+        coalescer.submit(update("1", progress=10))
+        coalescer.submit(update("2", progress=20))
+        coalescer.submit(update("1", progress=15))
+        await asyncio.sleep(0.15)
+    
+    asyncio.run(run())
+    assert sorted(coalescer.processed) == [("1", "in_progress", 15), ("2", "in_progress", 20)]
+
+
+def test_status_change_writes_previous_state_first(coalescer):
+    async def run():
+        coalescer.submit(update("1", "pending"))
+        coalescer.submit(update("1", "in_progress", 5))
+        await coalescer.drain()
+    
+    asyncio.run(run())
+    assert coalescer.processed == [("1", "pending", 0), ("1", "in_progress", 5)]
+
+
+def test_final_status_is_written_right_away(coalescer):
+    async def run():
+        coalescer.submit(update("1", "completed", 100))
+        await asyncio.sleep(0)
+        return coalescer.get_stats()
+    
+    stats = asyncio.run(run())
+    assert coalescer.processed == [("1", "completed", 100)]
+    assert stats["pending"] == 0
+
+
+def test_drain_flushes_updates_still_in_their_window(coalescer):
+    coalescer.window = 60
+    
+    async def run():
+        coalescer.submit(update("1", progress=40))
+        await coalescer.drain()
+    
+    asyncio.run(run())
+    assert coalescer.processed == [("1", "in_progress", 40)]
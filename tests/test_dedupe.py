@@ -0,0 +1,142 @@
+"""
+Tests for suppressing writes that repeat the last stored memory
+"""
+
+import logging
+
+import pytest
+
+from mem0_client import DedupeIndex, UtlyzeMem0Client
+
+TASK = {"type": "task_update", "task_id": "42", "status": "in_progress"}
+
+
+def test_unrecorded_write_is_not_duplicate():
+    index = DedupeIndex()
+    
+    assert not index.is_duplicate("Task: login", TASK)
+    # Checking alone records nothing, so a failed write can be retried
+    assert not index.is_duplicate("Task: login", TASK)
+
+
+def test_recorded_write_suppresses_repeat():
+    index = DedupeIndex()
+    index.record("Task: login", TASK)
+    
+    assert index.is_duplicate("Task: login", TASK)
+    assert index.get_stats()["suppressed"] == 1
+    assert index.get_stats()["by_type"] == {"task_update": 1}
+
+
+def test_changed_content_or_metadata_is_written():
+    index = DedupeIndex()
+    index.record("Task: login", TASK)
+    
+    assert not index.is_duplicate("Task: signup", TASK)
+    assert not index.is_duplicate("Task: login", {**TASK, "status": "completed"})
+
+
+def test_volatile_lines_and_metadata_are_ignored():
+    index = DedupeIndex()
+    index.record("Task: login\nLast Updated: 2026-01-01T10:00:00", {**TASK, "timestamp": "2026-01-01T10:00:00"})
+    
+    assert index.is_duplicate(
+        "Task: login\nLast Updated: 2026-01-02T11:00:00",
+        {**TASK, "timestamp": "2026-01-02T11:00:00", "idempotency_key": "abc"}
+    )
+
+
+def test_only_the_last_write_per_key_counts():
+    index = DedupeIndex()
+    index.record("Task: login", TASK)
+    index.record("Task: login v2", TASK)
+    
+    assert not index.is_duplicate("Task: login", TASK)
+    assert index.is_duplicate("Task: login v2", TASK)
+
+
+def test_other_types_are_never_deduplicated():
+    index = DedupeIndex()
+    metadata = {"type": "task_completion", "task_id": "42"}
+    index.record("done", metadata)
+    
+    assert index.key_for(metadata) is None
+    assert not index.is_duplicate("done", metadata)
+
+
+def test_keys_are_per_subject():
+    index = DedupeIndex()
+    index.record("ls", {"type": "terminal_activity", "cwd": "/a"})
+    
+    assert index.is_duplicate("ls", {"type": "terminal_activity", "cwd": "/a"})
+    assert not index.is_duplicate("ls", {"type": "terminal_activity", "cwd": "/b"})
+
+
+def test_least_recent_keys_are_evicted():
+    index = DedupeIndex(max_keys=2)
+    for task_id in ("1", "2", "3"):
+        index.record("same", {**TASK, "task_id": task_id})
+    
+    assert not index.is_duplicate("same", {**TASK, "task_id": "1"})
+    assert index.is_duplicate("same", {**TASK, "task_id": "3"})
+
+
+def test_saved_hashes_are_loaded(tmp_path):
+    path = str(tmp_path / "dedupe.json")
+    index = DedupeIndex(path)
+    index.record("Task: login", TASK)
+    index.save()
+    
+    assert DedupeIndex(path).is_duplicate("Task: login", TASK)
+
+
+def test_concurrent_saves_merge(tmp_path):
+    path = str(tmp_path / "dedupe.json")
+    first, second = DedupeIndex(path), DedupeIndex(path)
+    first.record("one", {**TASK, "task_id": "1"})
+    second.record("two", {**TASK, "task_id": "2"})
+    first.save()
+    second.save()
+    
+    merged = DedupeIndex(path)
+    assert merged.is_duplicate("one", {**TASK, "task_id": "1"})
+    assert merged.is_duplicate("two", {**TASK, "task_id": "2"})
+    # The later saver also picked up the other process's entry
+    assert second.is_duplicate("one", {**TASK, "task_id": "1"})
+
+
+def test_local_change_wins_over_saved_entry(tmp_path):
+    path = str(tmp_path / "dedupe.json")
+    first, second = DedupeIndex(path), DedupeIndex(path)
+    first.record("old", TASK)
+    first.save()
+    second.record("new", TASK)
+    second.save()
+    
+    assert DedupeIndex(path).is_duplicate("new", TASK)
+
+
+def test_batched_file_chunks_have_their_own_keys():
+    index = DedupeIndex()
+    first = {"type": "file_activity", "task_id": "42", "file_paths": ["a.py", "b.py"], "file_batch": 0}
+    second = {"type": "file_activity", "task_id": "42", "file_paths": ["c.py"], "file_batch": 1}
+    index.record("Files: a.py, b.py", first)
+    index.record("Files: c.py", second)
+    
+    assert index.key_for(first) != index.key_for(second)
+    assert index.is_duplicate("Files: a.py, b.py", first)
+    assert index.is_duplicate("Files: c.py", second)
+
+
+@pytest.mark.parametrize("result, message", [
+    ({"status": "duplicate"}, "Task update unchanged, not stored: Login"),
+    ({"status": "queued", "future": None}, "Task update queued: Login"),
+    ({"results": [{"id": "m1"}]}, "Task update stored: Login")
+])
+def test_task_update_logs_its_outcome(caplog, result, message):
+    client = UtlyzeMem0Client.__new__(UtlyzeMem0Client)
+    client.add_memory = lambda *args, **kwargs: result
+    
+    with caplog.at_level(logging.INFO, logger="mem0_client"):
+        assert client.add_task_update({"id": "42", "name": "Login", "status": "pending"}) is result
+    assert [record.getMessage() for record in caplog.records] == [message]
@@ -0,0 +1,147 @@
+"""
+Tests for the SQLite mirror of Mem0 memories
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from local_mirror import LocalMemoryMirror
+from mem0_client import UtlyzeMem0Client
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    db = LocalMemoryMirror(str(tmp_path / "mirror.db"))
+    yield db
+    db.close()
+
+
+def test_full_text_search_ranks_matches(mirror):
+    mirror.add("Fixed the login redirect bug", {"type": "task_update", "task_id": "1"})
+    mirror.add("Refactored billing exports", {"type": "task_update", "task_id": "2"})
+    
+    results = mirror.search("login bug")
+    assert [result["memory"] for result in results] == ["Fixed the login redirect bug"]
+    assert results[0]["metadata"]["task_id"] == "1"
+    assert results[0]["source"] == "local_mirror"
+
+
+def test_filters_without_query_return_newest_first(mirror):
+    mirror.add("old", {"type": "task_update", "timestamp": "2026-01-01T00:00:00"})
+    mirror.add("new", {"type": "task_update", "timestamp": "2026-01-02T00:00:00"})
+    mirror.add("other", {"type": "terminal_activity", "timestamp": "2026-01-03T00:00:00"})
+    
+    assert [result["memory"] for result in mirror.search(filters={"type": "task_update"})] == ["new", "old"]
+    assert [result["memory"] for result in mirror.search(filters={"since": "2026-01-02"})] == ["other", "new"]
+
+
+def test_unknown_filter_is_rejected(mirror):
+    with pytest.raises(ValueError):
+        mirror.search(filters={"agent": "claude"})
+
+
+def test_batched_file_activity_matches_each_path(mirror):
+    mirror.add("Edited 2 files", {"type": "file_activity", "file_paths": ["src/a.py", "src/b.py"]}, "mem-1")
+    mirror.add("Edited c", {"type": "file_activity", "file_path": "src/c.py"}, "mem-2")
+    
+    assert [result["id"] for result in mirror.search(filters={"file_path": "src/b.py"})] == ["mem-1"]
+    assert [result["id"] for result in mirror.search(filters={"file_path": "src/c.py"})] == ["mem-2"]
+    
+    assert mirror.delete(["mem-1"]) == 1
+    assert mirror.search(filters={"file_path": "src/b.py"}) == []
+
+
+def test_remote_upsert_refreshes_by_memory_id(mirror):
+    mirror.upsert_remote([{"id": "mem-1", "memory": "first", "metadata": {"type": "task_update"}}])
+    mirror.upsert_remote([{"id": "mem-1", "memory": "second", "metadata": {"type": "task_update"}}, {"memory": "no id"}])
+    
+    assert mirror.count() == 1
+    assert [result["memory"] for result in mirror.search("second")] == ["second"]
+    assert mirror.search("first") == []
+
+
+def test_attaching_id_already_pulled_keeps_remote_copy(mirror):
+    mirror.upsert_remote([{"id": "mem-1", "memory": "remote", "metadata": {}}])
+    row_id = mirror.add("local", {})
+    mirror.attach_memory_id(row_id, "mem-1")
+    
+    assert mirror.count() == 1
+    assert mirror.search(filters={})[0]["memory"] == "remote"
+
+
+def test_remote_upsert_reindexes_file_paths(mirror):
+    mirror.upsert_remote([{"id": "mem-1", "memory": "Edited", "metadata": {"file_paths": ["src/a.py", "src/b.py"]}}])
+    mirror.upsert_remote([{"id": "mem-1", "memory": "Edited", "metadata": {"file_paths": ["src/c.py"]}}])
+    
+    assert mirror.search(filters={"file_path": "src/a.py"}) == []
+    assert [result["id"] for result in mirror.search(filters={"file_path": "src/c.py"})] == ["mem-1"]
+    
+    mirror.upsert_remote([{"id": "mem-1", "memory": "Edited", "metadata": {}}])
+    assert mirror.search(filters={"file_path": "src/c.py"}) == []
+
+
+class FakeRemote:
+    """Stands in for iter_memories, recording the conditions of each listing"""
+    
+    def __init__(self, memories):
+        self.memories = memories
+        self.listings = []
+    
+    def __call__(self, conditions=None, page_size=100):
+        self.listings.append(conditions)
+        return iter(list(self.memories))
+
+
+@pytest.fixture
+def puller(mirror):
+    client = UtlyzeMem0Client.__new__(UtlyzeMem0Client)
+    client.mirror = mirror
+    client.mirror_stats = {"pulled": 0, "dropped": 0, "last_pull": None}
+    client.mirror_reconcile_interval = 3600
+    client.iter_memories = FakeRemote([
+        {"id": "mem-1", "memory": "first", "metadata": {}},
+        {"id": "mem-2", "memory": "second", "metadata": {}}
+    ])
+    return client
+
+
+def test_first_pull_lists_everything(puller):
+    assert puller.pull_remote_memories() == 2
+    assert puller.iter_memories.listings == [None]
+    assert puller.mirror.memory_ids() == {"mem-1", "mem-2"}
+
+
+def test_later_pulls_list_only_recent_changes(puller):
+    puller.pull_remote_memories()
+    puller.iter_memories.memories = [{"id": "mem-3", "memory": "third", "metadata": {}}]
+    
+    assert puller.pull_remote_memories() == 1
+    (condition,) = puller.iter_memories.listings[-1]
+    mark = condition["OR"][0]["created_at"]["gte"]
+    assert condition["OR"][1] == {"updated_at": {"gte": mark}}
+    assert datetime.fromisoformat(mark) < datetime.fromisoformat(puller.mirror.get_meta("pulled_through"))
+    # Nothing is dropped just because an incremental listing omits it
+    assert puller.mirror.memory_ids() == {"mem-1", "mem-2", "mem-3"}
+
+
+def test_full_pull_drops_remotely_deleted_memories(puller):
+    puller.pull_remote_memories()
+    puller.mirror.add("not yet in Mem0", {})
+    puller.iter_memories.memories = [{"id": "mem-2", "memory": "second", "metadata": {}}]
+    
+    puller.pull_remote_memories(full=True)
+    assert puller.iter_memories.listings[-1] is None
+    assert puller.mirror.memory_ids() == {"mem-2"}
+    assert puller.mirror_stats["dropped"] == 1
+    # Rows still waiting for a Mem0 id are kept
+    assert puller.mirror.count() == 2
+
+
+def test_reconcile_interval_forces_full_pull(puller):
+    puller.pull_remote_memories()
+    stale = datetime.now(timezone.utc) - timedelta(hours=2)
+    puller.mirror.set_meta("reconciled_at", stale.isoformat())
+    
+    puller.pull_remote_memories()
+    assert puller.iter_memories.listings[-1] is None
@@ -0,0 +1,207 @@
+"""
+Tests for the durable write outbox and its replay
+"""
+
+import json
+
+import pytest
+from mem0.exceptions import MemoryError as Mem0Error, NetworkError, ValidationError
+
+from outbox import Outbox
+from mem0_client import UtlyzeMem0Client
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.jsonl"), fsync_interval=0.01)
+    yield box
+    box.close()
+
+
+def test_append_returns_key_and_is_pending(outbox):
+    key = outbox.append({"messages": [{"role": "user", "content": "a"}], "metadata": {}})
+    
+    pending = outbox.pending()
+    assert [record["key"] for record in pending] == [key]
+    assert pending[0]["item"]["messages"][0]["content"] == "a"
+    assert outbox.stats["appended"] == 1
+
+
+def test_ack_removes_write_from_pending(outbox):
+    first = outbox.append({"n": 1})
+    second = outbox.append({"n": 2})
+    outbox.ack(first)
+    
+    assert [record["key"] for record in outbox.pending()] == [second]
+    assert outbox.stats["acked"] == 1
+
+
+def test_pending_respects_min_age(outbox):
+    outbox.append({"n": 1})
+    
+    assert outbox.pending(min_age=60) == []
+    assert len(outbox.pending(min_age=0)) == 1
+
+
+def test_torn_trailing_line_is_skipped(outbox):
+    key = outbox.append({"n": 1})
+    with open(outbox.path, "a") as f:
+        f.write('{"op": "put", "key": "torn"')
+    
+    assert [record["key"] for record in outbox.pending()] == [key]
+
+
+def test_compact_keeps_only_unacknowledged_writes(outbox):
+    keys = [outbox.append({"n": n}) for n in range(10)]
+    for key in keys[:9]:
+        outbox.ack(key)
+    size_before = outbox.size()
+    
+    assert outbox.compact() == 1
+    assert outbox.size() < size_before
+    with open(outbox.path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["key"] for record in records] == [keys[9]]
+    assert outbox.stats["compactions"] == 1
+
+
+def test_appends_after_compaction_go_to_new_journal(outbox):
+    outbox.ack(outbox.append({"n": 1}))
+    outbox.compact()
+    key = outbox.append({"n": 2})
+    
+    assert [record["key"] for record in outbox.pending()] == [key]
+
+
+def test_second_writer_shares_journal(tmp_path):
+    path = str(tmp_path / "outbox.jsonl")
+    first, second = Outbox(path), Outbox(path)
+    try:
+        key = first.append({"n": 1})
+        second.ack(key)
+        other = second.append({"n": 2})
+        
+        assert [record["key"] for record in first.pending()] == [other]
+    finally:
+        first.close()
+        second.close()
+
+
+def test_replay_lock_is_exclusive(outbox):
+    with outbox.replay_lock() as acquired:
+        assert acquired
+        with outbox.replay_lock() as again:
+            assert not again
+    with outbox.replay_lock() as acquired:
+        assert acquired
+
+
+@pytest.fixture
+def replaying_client(outbox):
+    """Client shell with just the state replay_outbox uses; sends are recorded and acked"""
+    client = UtlyzeMem0Client.__new__(UtlyzeMem0Client)
+    client.outbox = outbox
+    client.outbox_in_flight = set()
+    client.replay_grace = 0
+    client.replay_max_attempts = 3
+    client.replay_max_backoff = 300
+    client.replay_attempts = {}
+    client.sent = []
+    # Errors to raise for particular writes, keyed by their metadata "n"
+    client.failures = {}
+    
+    def send(item):
+        error = client.failures.get(item["metadata"].get("n"))
+        if error is not None:
+            raise error
+        client.sent.append(item)
+        outbox.ack(item["outbox_key"])
+    
+    client._send_memory = send
+    return client
+
+
+def test_replay_sends_and_acks_pending_writes(replaying_client, outbox):
+    keys = [outbox.append({"messages": [], "metadata": {"n": n}}) for n in range(3)]
+    
+    assert replaying_client.replay_outbox() == 3
+    assert [item["outbox_key"] for item in replaying_client.sent] == keys
+    assert outbox.pending() == []
+    assert outbox.stats["replayed"] == 3
+
+
+def test_replay_skips_writes_still_queued_in_process(replaying_client, outbox):
+    queued = outbox.append({"messages": [], "metadata": {}})
+    lost = outbox.append({"messages": [], "metadata": {}})
+    replaying_client.outbox_in_flight.add(queued)
+    
+    assert replaying_client.replay_outbox() == 1
+    assert [item["outbox_key"] for item in replaying_client.sent] == [lost]
+    assert [record["key"] for record in outbox.pending()] == [queued]
+
+
+def test_replay_waits_out_grace_period(replaying_client, outbox):
+    replaying_client.replay_grace = 60
+    outbox.append({"messages": [], "metadata": {}})
+    
+    assert replaying_client.replay_outbox() == 0
+
+
+def test_replay_yields_to_another_replayer(replaying_client, outbox):
+    outbox.append({"messages": [], "metadata": {}})
+    with outbox.replay_lock():
+        assert replaying_client.replay_outbox() == 0
+    assert replaying_client.replay_outbox() == 1
+
+
+def rejected(status):
+    return ValidationError("bad metadata", f"HTTP_{status}", debug_info={"status_code": status})
+
+
+def test_rejected_write_is_dead_lettered_without_blocking_others(replaying_client, outbox):
+    bad = outbox.append({"messages": [], "metadata": {"n": 0}})
+    good = [outbox.append({"messages": [], "metadata": {"n": n}}) for n in range(1, 4)]
+    replaying_client.failures[0] = rejected(400)
+    
+    assert replaying_client.replay_outbox() == 3
+    assert [item["outbox_key"] for item in replaying_client.sent] == good
+    assert outbox.pending() == []
+    assert outbox.stats["dead_lettered"] == 1
+    with open(outbox.dead_letter_path) as f:
+        dead = [json.loads(line) for line in f]
+    assert [record["key"] for record in dead] == [bad]
+    assert "HTTP 400" in dead[0]["error"]
+
+
+def test_failing_write_backs_off_then_is_dead_lettered(replaying_client, outbox):
+    failing = outbox.append({"messages": [], "metadata": {"n": 0}})
+    outbox.append({"messages": [], "metadata": {"n": 1}})
+    replaying_client.failures[0] = Mem0Error("boom", "HTTP_500", debug_info={"status_code": 500})
+    
+    assert replaying_client.replay_outbox() == 1
+    assert replaying_client.replay_attempts[failing]["attempts"] == 1
+    # Still backing off, so the next pass leaves it alone
+    assert replaying_client.replay_outbox() == 0
+    assert replaying_client.replay_attempts[failing]["attempts"] == 1
+    
+    for _ in range(2):
+        replaying_client.replay_attempts[failing]["next_try"] = 0.0
+        replaying_client.replay_outbox()
+    assert failing not in replaying_client.replay_attempts
+    assert outbox.pending() == []
+    assert outbox.stats["dead_lettered"] == 1
+
+
+def test_network_error_ends_pass_without_charging_write(replaying_client, outbox):
+    key = outbox.append({"messages": [], "metadata": {"n": 0}})
+    outbox.append({"messages": [], "metadata": {"n": 1}})
+    replaying_client.failures[0] = NetworkError("unreachable", "NET_CONNECT")
+    
+    with pytest.raises(NetworkError):
+        replaying_client.replay_outbox()
+    assert replaying_client.sent == []
+    assert key not in replaying_client.replay_attempts
+    
+    del replaying_client.failures[0]
+    assert replaying_client.replay_outbox() == 2
+    assert outbox.stats["dead_lettered"] == 0
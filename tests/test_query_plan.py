@@ -0,0 +1,109 @@
+"""
+Tests for routing lookups to filtered listings or semantic search
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from mem0_client import UtlyzeMem0Client
+
+
+@pytest.fixture
+def client():
+    # plan_query only parses its input, so no Mem0 connection is needed
+    return UtlyzeMem0Client.__new__(UtlyzeMem0Client)
+
+
+def test_structured_terms_route_to_listing(client):
+    plan = client.plan_query("task:42 type:task_update")
+    
+    assert plan["route"] == "list"
+    assert plan["text"] == ""
+    assert plan["filters"] == {"task_id": "42", "type": "task_update"}
+    assert plan["conditions"] == [{"metadata": {"task_id": "42"}}, {"metadata": {"type": "task_update"}}]
+    assert plan["tags"] == ["task:42", "type:task_update"]
+
+
+def test_free_text_routes_to_search(client):
+    plan = client.plan_query("Type:task_update login  redirect bug")
+    
+    assert plan["route"] == "search"
+    assert plan["text"] == "login redirect bug"
+    assert plan["filters"] == {"type": "task_update"}
+
+
+def test_quoted_values_keep_spaces(client):
+    plan = client.plan_query('project:"utlyze web"')
+    
+    assert plan["filters"] == {"project": "utlyze web"}
+    assert plan["route"] == "list"
+
+
+def test_unknown_fields_stay_in_text(client):
+    plan = client.plan_query("error:timeout task:7")
+    
+    assert plan["route"] == "search"
+    assert plan["text"] == "error:timeout"
+    assert plan["filters"] == {"task_id": "7"}
+
+
+def test_file_path_matches_batched_memories(client):
+    plan = client.plan_query(file_path="src/app.py")
+    
+    assert plan["conditions"] == [{"OR": [
+        {"metadata": {"file_path": "src/app.py"}},
+        {"metadata": {"file_paths": {"contains": "src/app.py"}}}
+    ]}]
+
+
+def test_relative_since_becomes_created_at_bound(client):
+    plan = client.plan_query("since:7d")
+    
+    bound = datetime.fromisoformat(plan["filters"]["since"])
+    assert bound.utcoffset() == timedelta(0)
+    assert abs(bound - (datetime.now(timezone.utc) - timedelta(days=7))) < timedelta(minutes=1)
+    assert plan["conditions"] == [{"created_at": {"gte": plan["filters"]["since"]}}]
+
+
+def test_naive_until_is_taken_as_utc(client):
+    plan = client.plan_query(until="2026-03-01")
+    
+    assert plan["filters"]["until"] == "2026-03-01T00:00:00+00:00"
+    assert plan["conditions"] == [{"created_at": {"lte": "2026-03-01T00:00:00+00:00"}}]
+
+
+def test_offset_times_are_converted_to_utc(client):
+    plan = client.plan_query('since:"2026-03-01T17:00:00-07:00"')
+    
+    assert plan["filters"]["since"] == "2026-03-02T00:00:00+00:00"
+
+
+def test_invalid_time_is_rejected(client):
+    with pytest.raises(ValueError, match="Invalid time"):
+        client.plan_query("since:yesterday")
+
+
+def test_keyword_arguments_override_and_none_is_ignored(client):
+    plan = client.plan_query("task:1", task_id="2", type=None)
+    
+    assert plan["filters"] == {"task_id": "2"}
+    assert plan["tags"] == ["task:2"]
+
+
+def test_empty_lookup_lists_everything(client):
+    plan = client.plan_query()
+    
+    assert plan["route"] == "list"
+    assert plan["conditions"] == []
+    assert plan["tags"] == ["any"]
+
+
+def test_relative_bounds_match_utc_created_at(client):
+    from fake_mem0_server import _matches
+    
+    two_hours_ago = datetime.now(timezone.utc) - timedelta(hours=2)
+    for created_at in (two_hours_ago.isoformat(), two_hours_ago.replace(tzinfo=None).isoformat()):
+        memory = {"memory": "x", "metadata": {}, "created_at": created_at}
+        assert not _matches(memory, {"AND": client.plan_query("since:1h")["conditions"]})
+        assert _matches(memory, {"AND": client.plan_query("since:3h")["conditions"]})
@@ -0,0 +1,187 @@
+"""
+Tests for pacing Mem0 calls and backing off after a 429
+"""
+
+import json
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from rate_limiter import RateLimiter, RateLimitedTransport, parse_retry_after
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "rate_limit.json")
+
+
+def test_parse_retry_after_seconds_and_dates():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("soon") is None
+    assert 25 < parse_retry_after(formatdate(time.time() + 30, usegmt=True)) <= 30
+    assert parse_retry_after(formatdate(time.time() - 30, usegmt=True)) == 0.0
+
+
+def test_burst_is_spent_then_calls_wait():
+    limiter = RateLimiter(max_rate=1000, burst=5)
+    for _ in range(5):
+        assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0)
+    assert limiter.acquire(timeout=1)
+
+
+def test_throttled_halves_rate_down_to_floor():
+    limiter = RateLimiter(max_rate=8, burst=1, min_rate=3)
+    limiter.throttled(retry_after=0)
+    assert limiter.current_rate() == 4
+    
+    # Another 429 inside the cooldown is the same burst being rejected
+    limiter.throttled(retry_after=0)
+    assert limiter.current_rate() == 4
+    assert limiter.get_stats()["throttled"] == 2
+    
+    limiter.local_state["cooldown_until"] = 0.0
+    limiter.throttled(retry_after=0)
+    assert limiter.current_rate() == 3
+
+
+def test_acquire_waits_out_retry_after():
+    limiter = RateLimiter(max_rate=1000, burst=10)
+    limiter.throttled(retry_after=0.3)
+    
+    assert not limiter.acquire(timeout=0.1)
+    started = time.monotonic()
+    assert limiter.acquire(timeout=2)
+    assert time.monotonic() - started >= 0.15
+
+
+def test_state_file_untouched_until_throttled(state_path):
+    limiter = RateLimiter(max_rate=1000, burst=10, path=state_path)
+    try:
+        for _ in range(5):
+            limiter.acquire()
+            limiter.succeeded()
+        with open(state_path) as f:
+            assert f.read() == ""
+        assert not limiter.get_stats()["coordinating"]
+        
+        limiter.throttled(retry_after=0)
+        with open(state_path) as f:
+            assert json.load(f)["rate"] == 500
+        assert limiter.get_stats()["coordinating"]
+    finally:
+        limiter.close()
+
+
+def test_throttling_is_shared_with_other_processes(state_path):
+    first = RateLimiter(max_rate=10, burst=1, path=state_path)
+    second = RateLimiter(max_rate=10, burst=1, path=state_path)
+    try:
+        first.throttled(retry_after=5)
+        # A limiter that has been throttled itself reads the shared pause
+        second.throttled(retry_after=0)
+        assert second.current_rate() == 5
+        assert not second.acquire(timeout=0.1)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_succeeded_recovers_rate_and_goes_back_to_local(state_path):
+    limiter = RateLimiter(max_rate=4, burst=1, path=state_path, recovery=100)
+    try:
+        limiter.throttled(retry_after=0)
+        assert limiter.current_rate() == 2
+        
+        limiter.succeeded()
+        assert limiter.current_rate() == 4
+        assert limiter.get_stats()["coordinating"]
+        
+        limiter.succeeded()
+        assert not limiter.get_stats()["coordinating"]
+    finally:
+        limiter.close()
+
+
+def test_stale_shared_state_is_reset(state_path):
+    with open(state_path, "w") as f:
+        json.dump({"tokens": 0, "rate": 1, "updated": time.time() - 600, "blocked_until": 0, "cooldown_until": 0}, f)
+    limiter = RateLimiter(max_rate=10, burst=1, path=state_path)
+    try:
+        limiter.throttled(retry_after=0)
+        assert limiter.current_rate() == 5
+    finally:
+        limiter.close()
+
+
+def test_transport_retries_429_after_retry_after():
+    responses = iter([429, 429, 200])
+    calls = []
+    
+    def handler(request):
+        calls.append(time.monotonic())
+        status = next(responses)
+        return httpx.Response(status, headers={"Retry-After": "0.1"} if status == 429 else {})
+    
+    limiter = RateLimiter(max_rate=1000, burst=10)
+    transport = RateLimitedTransport(httpx.MockTransport(handler), limiter, retries=3)
+    with httpx.Client(transport=transport) as client:
+        assert client.get("http://mem0.test/v1/memories/").status_code == 200
+    
+    assert len(calls) == 3
+    assert calls[2] - calls[1] >= 0.08
+    assert limiter.get_stats()["throttled"] == 2
+
+
+def test_transport_gives_up_after_retries():
+    limiter = RateLimiter(max_rate=1000, burst=10)
+    transport = RateLimitedTransport(httpx.MockTransport(lambda request: httpx.Response(429, headers={"Retry-After": "0"})), limiter, retries=1)
+    with httpx.Client(transport=transport) as client:
+        assert client.get("http://mem0.test/v1/memories/").status_code == 429
+    assert limiter.get_stats()["throttled"] == 2
+
+
+def test_without_quota_calls_are_not_paced(state_path):
+    limiter = RateLimiter(max_rate=None, burst=1, path=state_path)
+    try:
+        for _ in range(500):
+            assert limiter.acquire(timeout=0)
+        assert limiter.current_rate() is None
+        with open(state_path) as f:
+            assert f.read() == ""
+    finally:
+        limiter.close()
+
+
+def test_without_quota_first_429_paces_below_rejected_rate(state_path):
+    limiter = RateLimiter(max_rate=None, burst=1, path=state_path, recovery=1000)
+    try:
+        limiter.window_start = time.time() - 0.5
+        for _ in range(40):
+            limiter.acquire()
+        limiter.throttled(retry_after=0)
+        
+        assert 15 <= limiter.current_rate() <= 25
+        assert limiter.get_stats()["coordinating"]
+        assert not limiter.acquire(timeout=0)
+        
+        # Back at the rejected rate: pacing stops until the next 429
+        limiter.succeeded()
+        assert limiter.current_rate() is None
+        limiter.succeeded()
+        assert not limiter.get_stats()["coordinating"]
+        assert limiter.acquire(timeout=0)
+    finally:
+        limiter.close()
+
+
+def test_without_quota_retry_after_is_honoured():
+    limiter = RateLimiter(max_rate=None, burst=1)
+    limiter.throttled(retry_after=0.3)
+    
+    assert not limiter.acquire(timeout=0.1)
+    assert limiter.acquire(timeout=2)
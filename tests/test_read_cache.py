@@ -0,0 +1,93 @@
+"""
+Tests for the read-through cache of Mem0 reads
+"""
+
+import pytest
+
+from mem0_client import ReadCache, UtlyzeMem0Client
+
+
+def test_cached_value_is_returned_as_copy():
+    cache = ReadCache()
+    cache.set(("q",), [{"id": "m1"}], ["any"], cache.begin_read())
+    
+    hit, value = cache.get(("q",))
+    assert hit and value == [{"id": "m1"}]
+    value.append({"id": "m2"})
+    assert cache.get(("q",))[1] == [{"id": "m1"}]
+
+
+def test_entries_expire_after_ttl():
+    cache = ReadCache(ttl=30)
+    cache.set(("q",), ["a"], ["any"], cache.begin_read())
+    cache.entries[("q",)]["stored_at"] -= 31
+    
+    assert cache.get(("q",)) == (False, None)
+    assert cache.get_stats()["size"] == 0
+
+
+def test_zero_ttl_disables_caching():
+    cache = ReadCache(ttl=0)
+    cache.set(("q",), ["a"], ["any"], cache.begin_read())
+    
+    assert cache.get(("q",)) == (False, None)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ReadCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.set((key,), [key], ["any"], cache.begin_read())
+    cache.get(("a",))
+    cache.set(("c",), ["c"], ["any"], cache.begin_read())
+    
+    assert cache.get(("b",)) == (False, None)
+    assert cache.get(("a",))[0] and cache.get(("c",))[0]
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_invalidation_drops_only_tagged_entries():
+    cache = ReadCache()
+    cache.set(("task 42",), ["a"], ["any", "task:42"], cache.begin_read())
+    cache.set(("task 7",), ["b"], ["task:7"], cache.begin_read())
+    cache.invalidate(["task:42"])
+    
+    assert cache.get(("task 42",)) == (False, None)
+    assert cache.get(("task 7",))[0]
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_read_racing_a_write_is_not_cached():
+    cache = ReadCache()
+    generation = cache.begin_read()
+    cache.invalidate(["any"])
+    cache.set(("q",), ["before the write"], ["any"], generation)
+    
+    assert cache.get(("q",)) == (False, None)
+
+
+class FakeMem0:
+    def add(self, messages, user_id=None, metadata=None):
+        return {"results": [{"id": "m1"}]}
+
+
+@pytest.fixture
+def client():
+    client = UtlyzeMem0Client.__new__(UtlyzeMem0Client)
+    client.client = FakeMem0()
+    client.user_id = "test"
+    client.cache = ReadCache()
+    client.dedupe = client.outbox = client.mirror = client.write_queue = None
+    client.outbox_in_flight = set()
+    return client
+
+
+def test_write_invalidates_reads_it_affects(client):
+    cache = client.cache
+    cache.set(("task 42",), ["a"], ["task:42"], cache.begin_read())
+    cache.set(("task 7",), ["b"], ["task:7"], cache.begin_read())
+    cache.set(("recent",), ["c"], ["any"], cache.begin_read())
+    
+    client.add_memory("Task 42 done", {"type": "task_completion", "task_id": "42"})
+    assert cache.get(("task 42",)) == (False, None)
+    assert cache.get(("recent",)) == (False, None)
+    assert cache.get(("task 7",))[0]
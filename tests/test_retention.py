@@ -0,0 +1,201 @@
+"""
+Tests for rolling old memories up into daily digests
+"""
+
+import json
+import random
+import uuid
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+
+from fake_mem0_server import _matches
+from retention import DIGEST_TYPE, RetentionEngine, load_policies
+
+POLICIES = {
+    "terminal_activity": {"max_age_days": 7, "action": "digest"},
+    "sync_summary": {"max_age_days": 30, "action": "delete"}
+}
+
+
+class FakeClient:
+    """Stands in for UtlyzeMem0Client, listing memories in no particular order"""
+    
+    def __init__(self):
+        self.memories = []
+        self.fail_adds_after = None
+    
+    def store(self, content, metadata, created_at):
+        self.memories.append({"id": str(uuid.uuid4()), "memory": content, "metadata": metadata, "created_at": created_at})
+    
+    def iter_memories(self, conditions):
+        matches = [memory for memory in self.memories if _matches(memory, {"AND": conditions})]
+        random.shuffle(matches)
+        return iter(matches)
+    
+    def add_memory(self, content, metadata, wait=False):
+        if self.fail_adds_after is not None:
+            if self.fail_adds_after == 0:
+                raise RuntimeError("Mem0 unavailable")
+            self.fail_adds_after -= 1
+        self.store(content, metadata, datetime.now(timezone.utc).isoformat())
+    
+    def delete_memories(self, memory_ids, memory_type=None, batch_size=100):
+        ids = set(memory_ids)
+        self.memories = [memory for memory in self.memories if memory["id"] not in ids]
+    
+    def of_type(self, memory_type):
+        return [memory for memory in self.memories if memory["metadata"].get("type") == memory_type]
+
+
+def days_ago(days, hour=12, offset_hours=0):
+    """ISO timestamp at a local hour on the UTC day `days` ago"""
+    day = (datetime.now(timezone.utc) - timedelta(days=days)).date()
+    return datetime.combine(day, time(hour), tzinfo=timezone(timedelta(hours=offset_hours))).isoformat()
+
+
+def terminal(client, command, created_at, project="web", branch="main"):
+    client.store(
+        f"Command: {command}\nTime: {created_at}",
+        {"type": "terminal_activity", "project": project, "git_branch": branch},
+        created_at
+    )
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+@pytest.fixture
+def engine(client, tmp_path):
+    return RetentionEngine(client, POLICIES, checkpoint_path=str(tmp_path / "retention.json"))
+
+
+def test_load_policies_merges_overrides(tmp_path):
+    policies = load_policies('{"terminal_activity": {"max_age_days": 3}, "custom": {"max_age_days": 1, "action": "delete"}}')
+    assert policies["terminal_activity"] == {"max_age_days": 3, "action": "digest"}
+    assert policies["custom"]["action"] == "delete"
+    assert policies["file_activity"]["max_age_days"] == 14
+    
+    path = tmp_path / "policies.json"
+    path.write_text(json.dumps({"sync_summary": {"action": "keep"}}))
+    assert load_policies(str(path))["sync_summary"]["action"] == "keep"
+    assert load_policies("") == load_policies("{}")
+
+
+def test_old_memories_become_one_digest_per_day_and_branch(client, engine):
+    for command in ("npm test", "npm test", "git push"):
+        terminal(client, command, days_ago(10))
+    terminal(client, "git rebase", days_ago(10), branch="feature")
+    terminal(client, "npm test", days_ago(9))
+    terminal(client, "npm run dev", days_ago(1))
+    
+    report = engine.run()
+    
+    assert report["memories"] == 5
+    assert report["digests"] == 3
+    assert report["deleted"] == 5
+    assert [memory["memory"] for memory in client.of_type("terminal_activity")] == ["Command: npm run dev\nTime: " + days_ago(1)]
+    digests = {(d["metadata"]["date"], d["metadata"]["git_branch"]): d for d in client.of_type(DIGEST_TYPE)}
+    main = digests[(days_ago(10)[:10], "main")]
+    assert main["metadata"]["memory_count"] == 3
+    assert "- Command: npm test (x2)" in main["memory"]
+    assert "Time:" not in main["memory"]
+    assert (days_ago(10)[:10], "feature") in digests
+
+
+def test_delete_policy_removes_without_digest(client, engine):
+    client.store("Synced 5 tasks", {"type": "sync_summary"}, days_ago(40))
+    client.store("Synced 6 tasks", {"type": "sync_summary"}, days_ago(2))
+    
+    report = engine.run()
+    
+    assert report["types"]["sync_summary"] == {"action": "delete", "days": 1, "memories": 1, "digests": 0, "deleted": 1, "complete": True}
+    assert [memory["memory"] for memory in client.of_type("sync_summary")] == ["Synced 6 tasks"]
+    assert client.of_type(DIGEST_TYPE) == []
+
+
+def test_dry_run_changes_nothing(client, engine, tmp_path):
+    terminal(client, "ls", days_ago(10))
+    before = list(client.memories)
+    
+    report = engine.run(dry_run=True)
+    
+    assert report["digests"] == 1
+    assert report["deleted"] == 1
+    assert client.memories == before
+    assert not (tmp_path / "retention.json").exists()
+
+
+def test_max_days_handles_oldest_days_first(client, engine):
+    for days in (12, 11, 10):
+        terminal(client, "ls", days_ago(days))
+    
+    report = engine.run(max_days=2)
+    
+    assert not report["complete"]
+    assert sorted(d["metadata"]["date"] for d in client.of_type(DIGEST_TYPE)) == [days_ago(12)[:10], days_ago(11)[:10]]
+    assert engine.run(max_days=2)["complete"]
+    assert len(client.of_type(DIGEST_TYPE)) == 3
+
+
+def test_days_are_utc_whatever_the_offset(client, engine):
+    # 20:00 at -07:00 is 03:00 UTC the next day
+    terminal(client, "late", days_ago(10, hour=20, offset_hours=-7))
+    terminal(client, "early", days_ago(10, hour=1))
+    
+    engine.run()
+    
+    dates = sorted(d["metadata"]["date"] for d in client.of_type(DIGEST_TYPE))
+    assert dates == [days_ago(10)[:10], days_ago(9)[:10]]
+    assert client.of_type("terminal_activity") == []
+
+
+def test_memories_inside_max_age_are_kept(client, engine):
+    terminal(client, "recent", days_ago(6, hour=0))
+    
+    assert engine.run()["memories"] == 0
+    assert len(client.of_type("terminal_activity")) == 1
+
+
+def test_interrupted_day_resumes_without_duplicate_digests(client, engine, tmp_path):
+    terminal(client, "ls", days_ago(10), branch="a")
+    terminal(client, "ls", days_ago(10), branch="b")
+    client.fail_adds_after = 1
+    
+    with pytest.raises(RuntimeError):
+        engine.run()
+    assert len(client.of_type(DIGEST_TYPE)) == 1
+    assert len(client.of_type("terminal_activity")) == 2
+    
+    client.fail_adds_after = None
+    resumed = RetentionEngine(client, POLICIES, checkpoint_path=str(tmp_path / "retention.json"))
+    report = resumed.run()
+    
+    assert report["digests"] == 1
+    assert sorted(d["metadata"]["git_branch"] for d in client.of_type(DIGEST_TYPE)) == ["a", "b"]
+    assert client.of_type("terminal_activity") == []
+    assert resumed.last_run() is not None
+
+
+def test_rerun_is_idempotent(client, engine):
+    terminal(client, "ls", days_ago(10))
+    engine.run()
+    snapshot = list(client.memories)
+    
+    assert engine.run()["memories"] == 0
+    assert client.memories == snapshot
+
+
+def test_second_process_skips_while_locked(client, engine, tmp_path):
+    terminal(client, "ls", days_ago(10))
+    other = RetentionEngine(client, POLICIES, checkpoint_path=str(tmp_path / "retention.json"))
+    
+    with engine.run_lock() as acquired:
+        assert acquired
+        report = other.run()
+    
+    assert report["skipped"] == "locked"
+    assert not report["complete"]
+    assert len(client.of_type("terminal_activity")) == 1
@@ -0,0 +1,97 @@
+"""
+Tests for diffing Taskmaster state against the last sync
+"""
+
+from mem0_client import TaskSnapshot
+
+
+def task(task_id, status="pending", **fields):
+    return {"id": task_id, "name": f"Task {task_id}", "status": status, "progress": 0, **fields}
+
+
+def test_first_diff_reports_everything_added():
+    snapshot = TaskSnapshot()
+    
+    diff = snapshot.diff([task("1"), task("2")])
+    assert [t["id"] for t in diff["added"]] == ["1", "2"]
+    assert diff["changed"] == diff["unchanged"] == diff["removed"] == []
+
+
+def test_recorded_tasks_are_unchanged_until_edited():
+    snapshot = TaskSnapshot()
+    for t in (task("1"), task("2")):
+        snapshot.record(t)
+    
+    diff = snapshot.diff([task("1"), task("2", status="done"), task("3")])
+    assert [t["id"] for t in diff["unchanged"]] == ["1"]
+    assert [t["id"] for t in diff["changed"]] == ["2"]
+    assert [t["id"] for t in diff["added"]] == ["3"]
+
+
+def test_fields_outside_the_memory_are_ignored():
+    snapshot = TaskSnapshot()
+    snapshot.record(task("1"))
+    
+    assert snapshot.is_current(task("1", updated_at="2026-01-01", dependencies=["2"]))
+
+
+def test_missing_tasks_are_removed_only_on_full_diff():
+    snapshot = TaskSnapshot()
+    for t in (task("1"), task("2")):
+        snapshot.record(t)
+    
+    assert snapshot.diff([task("1")])["removed"] == []
+    assert snapshot.diff([task("1")], full=True)["removed"] == ["2"]
+
+
+def test_forgotten_task_is_added_again():
+    snapshot = TaskSnapshot()
+    snapshot.record(task("1"))
+    snapshot.forget("1")
+    
+    assert [t["id"] for t in snapshot.diff([task("1")])["added"]] == ["1"]
+
+
+def test_raw_and_defaulted_tasks_hash_the_same():
+    snapshot = TaskSnapshot()
+    raw = task("1")
+    validated = task("1", description="", agent="unassigned", affected_files=[])
+    
+    assert TaskSnapshot.canonical(raw) == TaskSnapshot.canonical(validated)
+    assert snapshot.digest(raw) == snapshot.digest(validated)
+    assert snapshot.digest(raw) != snapshot.digest(task("1", agent="claude"))
+
+
+def test_ids_are_compared_as_strings():
+    snapshot = TaskSnapshot()
+    snapshot.record(task(7))
+    
+    assert snapshot.is_current(task("7"))
+
+
+def test_snapshot_survives_restart(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    snapshot = TaskSnapshot(path)
+    snapshot.record(task("1"))
+    snapshot.save()
+    
+    reloaded = TaskSnapshot(path)
+    assert len(reloaded) == 1
+    assert reloaded.is_current(task("1"))
+
+
+def test_unreadable_snapshot_starts_empty(tmp_path):
+    path = tmp_path / "snapshot.json"
+    path.write_text("{not json")
+    
+    assert len(TaskSnapshot(str(path))) == 0
+
+
+def test_unchanged_snapshot_does_not_overwrite_newer_file(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    reader, writer = TaskSnapshot(path), TaskSnapshot(path)
+    writer.record(task("1"))
+    writer.save()
+    
+    reader.save()
+    assert TaskSnapshot(path).is_current(task("1"))
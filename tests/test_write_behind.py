@@ -0,0 +1,92 @@
+"""
+Tests for the write-behind queue that batches Mem0 writes
+"""
+
+import threading
+import time
+
+import pytest
+
+from mem0_client import WriteBehindQueue
+
+
+class Recorder:
+    """Send function that records items and can be held or made to fail"""
+    
+    def __init__(self):
+        self.sent = []
+        self.release = threading.Event()
+        self.release.set()
+        self.lock = threading.Lock()
+    
+    def __call__(self, item):
+        self.release.wait(5)
+        if item.get("fail"):
+            raise ConnectionError("Mem0 unreachable")
+        with self.lock:
+            self.sent.append(item["n"])
+        return {"id": f"m{item['n']}"}
+
+
+@pytest.fixture
+def send():
+    recorder = Recorder()
+    yield recorder
+    recorder.release.set()
+
+
+def test_full_batch_is_sent_without_waiting_for_age(send):
+    queue = WriteBehindQueue(send, max_batch=3, max_age=60)
+    try:
+        futures = [queue.put({"n": n}) for n in range(3)]
+        assert [future.result(timeout=5) for future in futures] == [{"id": "m0"}, {"id": "m1"}, {"id": "m2"}]
+        assert queue.stats["batches"] == 1
+    finally:
+        queue.close()
+
+
+def test_partial_batch_is_sent_once_old_enough(send):
+    queue = WriteBehindQueue(send, max_batch=10, max_age=0.05)
+    try:
+        started = time.monotonic()
+        assert queue.put({"n": 1}).result(timeout=5) == {"id": "m1"}
+        assert time.monotonic() - started >= 0.05
+    finally:
+        queue.close()
+
+
+def test_failed_write_sets_its_future_exception(send):
+    queue = WriteBehindQueue(send, max_batch=2, max_age=60)
+    try:
+        good, bad = queue.put({"n": 1}), queue.put({"n": 2, "fail": True})
+        assert good.result(timeout=5) == {"id": "m1"}
+        with pytest.raises(ConnectionError):
+            bad.result(timeout=5)
+        assert queue.stats["sent"] == 1 and queue.stats["failed"] == 1
+    finally:
+        queue.close()
+
+
+def test_close_flushes_buffered_writes(send):
+    queue = WriteBehindQueue(send, max_batch=100, max_age=60)
+    futures = [queue.put({"n": n}) for n in range(5)]
+    queue.close()
+    
+    assert all(future.done() for future in futures)
+    assert sorted(send.sent) == list(range(5))
+    assert queue.depth() == 0
+    with pytest.raises(RuntimeError):
+        queue.put({"n": 6})
+
+
+def test_flush_times_out_while_writes_are_stuck(send):
+    send.release.clear()
+    queue = WriteBehindQueue(send, max_batch=100, max_age=60)
+    try:
+        queue.put({"n": 1})
+        assert not queue.flush(timeout=0.1)
+        assert queue.depth() == 1
+        send.release.set()
+        assert queue.flush(timeout=5)
+    finally:
+        queue.close()